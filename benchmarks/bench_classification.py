@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк классификации устройств: исходная реализация против
+предкомпилированного FingerprintMatcher
+
+Запуск:
+    python benchmarks/bench_classification.py [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_scanner.fingerprints import FingerprintMatcher, ahocorasick  # noqa: E402
+
+# Типичные страницы: роутеры, NAS, камеры, принтеры и "прочее"
+CORPUS = [
+    ("小米路由器", "<html><body>小米路由器 登录 管理界面 WAN LAN</body></html>", "nginx"),
+    ("TP-LINK Wireless Router", "<form>Username Password</form> Wireless settings WAN", "httpd"),
+    ("Synology DiskStation", "<div>Storage manager: disk volume, share folder</div>", "nginx"),
+    ("IPCam Viewer", "<div>Live video stream, PTZ zoom control for camera</div>", ""),
+    ("HP LaserJet", "<div>Printer status: toner cartridge low, print and scan</div>", "HP HTTP Server"),
+    ("pfSense - Login", "Please login to the pfSense firewall", "nginx"),
+    ("Welcome to my site", "This is a personal blog about programming " * 30, "Apache"),
+    ("No title", "<html><body>" + "<p>Lorem ipsum dolor sit amet</p>" * 40 + "</body></html>", ""),
+]
+
+
+def legacy_analyze_device_type(title, content, server=""):
+    """Исходная реализация NetworkScanner.analyze_device_type"""
+    full_text = (title + ' ' + content[:1000]).lower()
+
+    device_types = {
+        'router': {
+            'keywords': ['router', 'gateway', 'wireless', 'wifi', 'wan', 'lan',
+                         '小米', 'huawei', 'tplink', 'asus', 'dlink', 'netgear'],
+            'signs': [('login', 'password'), ('admin', 'settings')],
+            'server_hints': ['nginx', 'lighttpd', 'busybox', 'httpd']
+        },
+        'nas': {
+            'keywords': ['nas', 'synology', 'qnap', 'wd', 'seagate', 'storage'],
+            'signs': [('share', 'folder'), ('disk', 'volume')]
+        },
+        'camera': {
+            'keywords': ['camera', 'ipcam', 'dvr', 'nvr', 'surveillance'],
+            'signs': [('video', 'stream'), ('ptz', 'zoom')]
+        },
+        'printer': {
+            'keywords': ['printer', 'hp', 'canon', 'epson', 'brother', 'print'],
+            'signs': [('print', 'scan'), ('toner', 'cartridge')]
+        }
+    }
+
+    for device_type, rules in device_types.items():
+        keyword_score = sum(1 for kw in rules['keywords'] if kw in full_text)
+        sign_score = 0
+        for sign_pair in rules.get('signs', []):
+            if all(sign in full_text for sign in sign_pair):
+                sign_score += 2
+        server_score = 0
+        if server and 'server_hints' in rules:
+            server_score = sum(1 for hint in rules['server_hints'] if hint in server.lower())
+        total_score = keyword_score + sign_score + server_score
+        if device_type == 'router' and total_score >= 2:
+            return 'router'
+        elif device_type != 'router' and total_score >= 3:
+            return device_type
+
+    return 'unknown'
+
+
+def legacy_is_router_interface(title, content, content_type=""):
+    """Исходная реализация NetworkScanner.is_router_interface"""
+    if not title and len(content) < 100:
+        return False
+
+    full_text = title + ' ' + content[:1000]
+    text_lower = full_text.lower()
+
+    manufacturers = {
+        'xiaomi': ['小米', 'xiaomi', 'mi router', 'redmi', 'å°ç±³'],
+        'huawei': ['华为', 'huawei'],
+        'tp-link': ['tplink', 'tp-link', '普联'],
+        'asus': ['asus', '华硕'],
+        'd-link': ['dlink', 'd-link', '友讯'],
+        'netgear': ['netgear'],
+        'pfsense': ['pfsense'],
+        'ubiquiti': ['ubiquiti', 'unifi'],
+        'mikrotik': ['mikrotik', 'routeros'],
+        'generic': [
+            '路由器', 'router', 'gateway',
+            '无线路由器', 'wireless router',
+            '管理界面', 'admin panel',
+            '登录', 'login', 'sign in',
+            '设置', 'settings', 'configuration'
+        ]
+    }
+
+    for brand, keywords in manufacturers.items():
+        for keyword in keywords:
+            if keyword in full_text or keyword.lower() in text_lower:
+                if brand == 'xiaomi' and '路由器' in full_text:
+                    return True
+                elif any(marker in text_lower for marker in ['admin', 'login', 'wireless', 'wan']):
+                    return True
+                elif brand in ['pfsense', 'ubiquiti', 'mikrotik']:
+                    return True
+
+    common_signs = [
+        ('login', 'password'),
+        ('wireless', 'settings'),
+        ('wan', 'lan'),
+        ('admin', 'configuration'),
+    ]
+    for sign_pair in common_signs:
+        if all(sign in text_lower for sign in sign_pair):
+            return True
+
+    if '<form' in content.lower() and any(field in content.lower() for field in ['password', 'username', 'login']):
+        return True
+
+    return False
+
+
+def legacy_classify(title, content, server):
+    """Классификация так, как ее делал check_web_service до оптимизации"""
+    device_type = legacy_analyze_device_type(title, content, server)
+    if device_type == 'unknown' and legacy_is_router_interface(title, content):
+        device_type = 'router'
+    return device_type
+
+
+def measure(function, rounds):
+    """Возвращает число классификаций в секунду"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for title, content, server in CORPUS:
+            function(title, content, server)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+def measure_startup(backend):
+    """Время компиляции базы отпечатков и загрузки ее из дискового кеша"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        FingerprintMatcher.load(backend=backend, cache_dir=cache_dir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        FingerprintMatcher.load(backend=backend, cache_dir=cache_dir)
+        warm = time.perf_counter() - start
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classification micro-benchmark')
+    parser.add_argument('--rounds', type=int, default=2000, help='Passes over the corpus (default: 2000)')
+    args = parser.parse_args()
+
+    backends = ['regex']
+    if ahocorasick is not None:
+        backends.insert(0, 'aho-corasick')
+
+    before = measure(legacy_classify, args.rounds)
+    print(f"{'legacy':14} {before:12,.0f} classifications/s")
+
+    for backend in backends:
+        matcher = FingerprintMatcher(backend=backend)
+
+        # Сначала убеждаемся, что результаты совпадают
+        for title, content, server in CORPUS:
+            expected = legacy_classify(title, content, server)
+            actual = matcher.classify(title, content, server)['device_type']
+            assert expected == actual, f"{title!r}: {expected} != {actual}"
+
+        after = measure(lambda t, c, s: matcher.classify(t, c, s), args.rounds)
+        print(f"{backend:14} {after:12,.0f} classifications/s  (x{after / before:.2f})")
+
+    for backend in backends:
+        cold, warm = measure_startup(backend)
+        print(f"{backend:14} startup: compile {cold * 1000:.1f} ms, from cache {warm * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
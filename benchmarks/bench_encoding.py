@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк определения кодировки: пробное декодирование всего тела
+против BOM/meta и статистики байтов по началу страницы
+
+Запуск:
+    python benchmarks/bench_encoding.py [--rounds 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_scanner.encoding import detect_charset  # noqa: E402
+
+GARBLED_PATTERNS = [
+    'å°', 'ç±³', 'è·¯', 'ç±å¨',
+    'Ã', 'Â', 'â', '€', '™',
+    'Ð', 'Ñ', 'Ò', 'Ó',
+]
+
+
+def page(text, encoding, size):
+    """HTML-страница примерно size байт с текстом в нужной кодировке"""
+    body = (f"<p>{text}</p>\n" * (size // (len(text.encode(encoding)) + 8) + 1)).encode(encoding)
+    return b"<html><head><title>" + text.encode(encoding) + b"</title></head><body>" + body + b"</body></html>"
+
+
+# (страница, ожидаемая кодировка): типичные ответы без charset в Content-Type
+CORPUS = [
+    (page("小米路由器 管理界面 无线设置", 'gbk', 64 * 1024), 'gbk'),
+    (page("Настройки беспроводной сети роутера", 'cp1251', 64 * 1024), 'windows-1251'),
+    (page("Router admin panel, настройки", 'utf-8', 64 * 1024), 'utf-8'),
+    (page("繁體中文路由器管理介面設定", 'big5', 32 * 1024), 'big5'),
+    (page("Welcome to the printer web page", 'ascii', 16 * 1024), 'utf-8'),
+]
+
+
+def legacy_has_garbled_text(text):
+    """Исходная NetworkScanner.has_garbled_text"""
+    for pattern in GARBLED_PATTERNS:
+        if pattern in text:
+            return True
+    if text and ord(text[0]) < 32:
+        return True
+    return False
+
+
+def legacy_detect_encoding(content):
+    """Исходный перебор кодировок из NetworkScanner.detect_encoding"""
+    encodings_to_try = [
+        'utf-8',
+        'gbk', 'gb2312', 'gb18030', 'big5',
+        'windows-1251', 'iso-8859-1', 'iso-8859-5',
+        'shift-jis', 'euc-jp', 'cp866'
+    ]
+    for encoding in encodings_to_try:
+        try:
+            decoded = content.decode(encoding, errors='strict')
+            if legacy_has_garbled_text(decoded):
+                continue
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'utf-8'
+
+
+def measure(function, rounds):
+    """Возвращает число страниц в секунду"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content, _ in CORPUS:
+            function(content)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Charset detection micro-benchmark')
+    parser.add_argument('--rounds', type=int, default=200, help='Passes over the corpus (default: 200)')
+    args = parser.parse_args()
+
+    for content, expected in CORPUS:
+        legacy = legacy_detect_encoding(content)
+        actual = detect_charset(content)
+        print(f"{len(content) // 1024:4} KiB  expected {expected:13} legacy {legacy:13} new {actual}")
+
+    before = measure(legacy_detect_encoding, args.rounds)
+    after = measure(detect_charset, args.rounds)
+    print(f"{'legacy':8} {before:12,.0f} pages/s")
+    print(f"{'new':8} {after:12,.0f} pages/s  (x{after / before:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк исправления кракозябр в заголовках: исходный перебор
+таблицы замен против однопроходного repair_mojibake
+
+Запуск:
+    python benchmarks/bench_mojibake.py [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_scanner.encoding import repair_mojibake  # noqa: E402
+
+# Заголовки реальных веб-интерфейсов
+TITLES = [
+    "小米路由器",
+    "TP-LINK Wireless Router – Настройки",
+    "Página de configuración del router",
+    "Modem Arayüzü – Giriş",
+    "Startseite – FRITZ!Box 7590",
+    "Synology DiskStation — Вход",
+    "HUAWEI 华为路由器",
+    "Камера наблюдения™",
+    "Welcome to nginx!",
+    "pfSense - Login",
+]
+
+
+def garble(text):
+    """UTF-8, прочитанный браузером как windows-1252 (неопределенные байты - как C1)"""
+    return ''.join(
+        bytes([byte]).decode('cp1252', errors='ignore') or chr(byte)
+        for byte in text.encode('utf-8')
+    )
+
+
+# Испорченные заголовки и известный случай Xiaomi с потерянными байтами
+CORPUS = [(garble(title), title) for title in TITLES] + [("å°ç±³è·¯ç±å¨", "小米路由器")]
+
+GARBLED_PATTERNS = [
+    'å°', 'ç±³', 'è·¯', 'ç±å¨',
+    'Ã', 'Â', 'â', '€', '™',
+    'Ð', 'Ñ', 'Ò', 'Ó',
+]
+
+
+def legacy_has_garbled_text(text):
+    """Исходная NetworkScanner.has_garbled_text"""
+    for pattern in GARBLED_PATTERNS:
+        if pattern in text:
+            return True
+    if text and ord(text[0]) < 32:
+        return True
+    return False
+
+
+def legacy_fix(text):
+    """Исходная NetworkScanner.fix_common_encoding_issues"""
+    if not text:
+        return text
+    if "å°ç±³è·¯ç±å¨" in text:
+        text = text.replace("å°ç±³è·¯ç±å¨", "小米路由器")
+    utf8_latin1_fixes = {
+        'Ã¡': 'á', 'Ã©': 'é', 'Ã': 'í', 'Ã³': 'ó', 'Ãº': 'ú',
+        'Ã±': 'ñ', 'Ã¼': 'ü', 'Ã§': 'ç', 'Ã¤': 'ä', 'Ã¶': 'ö',
+        'Ã¬': 'ì', 'Ãª': 'ê', 'Ã«': 'ë', 'Ã¨': 'è', 'Ã¢': 'â',
+        'Ã£': 'ã', 'Ã¥': 'å', 'Ã¦': 'æ', 'Ã°': 'ð', 'Ã²': 'ò',
+        'Ã´': 'ô', 'Ãµ': 'õ', 'Ã¸': 'ø', 'Ã¹': 'ù', 'Ã»': 'û',
+        'Ã½': 'ý', 'Ã¾': 'þ',
+        'â‚¬': '€', 'â€š': '‚', 'â€ž': '„', 'â€¦': '…',
+        'â€¡': '‡', 'â€°': '‰', 'â€¹': '‹', 'â€˜': '‘',
+        'â€™': '’', 'â€œ': '“', 'â€�': '”', 'â€¢': '•',
+        'â€“': '–', 'â€”': '—', 'â„¢': '™', 'â€º': '›',
+        'â€¼': '¼', 'â€½': '½', 'â€¾': '¾',
+    }
+    for wrong, correct in utf8_latin1_fixes.items():
+        if wrong in text:
+            text = text.replace(wrong, correct)
+    if any(char in text for char in ['Ã', 'â', '€']):
+        fixed = text.encode('latin-1', errors='ignore').decode('utf-8', errors='ignore')
+        if fixed and not legacy_has_garbled_text(fixed):
+            return fixed
+    return text
+
+
+def measure(function, rounds):
+    """Возвращает число заголовков в секунду"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for garbled, _ in CORPUS:
+            function(garbled)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mojibake repair micro-benchmark')
+    parser.add_argument('--rounds', type=int, default=2000, help='Passes over the corpus (default: 2000)')
+    args = parser.parse_args()
+
+    legacy_ok = sum(legacy_fix(garbled) == title for garbled, title in CORPUS)
+    new_ok = sum(repair_mojibake(garbled)[0] == title for garbled, title in CORPUS)
+    print(f"repaired correctly: legacy {legacy_ok}/{len(CORPUS)}, new {new_ok}/{len(CORPUS)}")
+
+    before = measure(legacy_fix, args.rounds)
+    after = measure(repair_mojibake, args.rounds)
+    print(f"{'legacy':8} {before:12,.0f} titles/s")
+    print(f"{'new':8} {after:12,.0f} titles/s  (x{after / before:.2f})")
+
+
+if __name__ == '__main__':
+    main()
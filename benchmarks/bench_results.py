@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк памяти результатов: словарь на находку против models.ScanResult
+
+Строит count синтетических находок обоими способами и сообщает байты на
+результат (tracemalloc), время подсчета роутеров и сериализации в JSON.
+Строки каждой находки создаются заново, как при разборе ответа, поэтому
+словари не получают бесплатного разделения строк. Построение идет под
+tracemalloc и на миллионе находок занимает несколько минут.
+
+Запуск:
+    python benchmarks/bench_results.py [--count 1000000]
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_scanner.models import ScanResult, as_dict  # noqa: E402
+
+# (заголовок, Server, тип устройства, вендор, правила): типичные находки
+PAGES = [
+    ('TP-LINK Wireless Router', 'httpd', 'router', 'tp-link', ['router:keyword:wireless', 'router:keyword:router']),
+    ('Synology DiskStation', 'nginx', 'nas', 'unknown', ['nas:keyword:synology']),
+    ('IPCam Viewer', 'GoAhead-Webs', 'camera', 'unknown', ['camera:keyword:ipcam']),
+    ('HP LaserJet', 'HP HTTP Server', 'printer', 'unknown', ['printer:keyword:hp']),
+    ('No title', 'Unknown', 'unknown', 'unknown', []),
+]
+PORTS = (80, 443, 8080, 8443)
+
+
+def fresh(text):
+    """Новый объект строки, как после декодирования ответа"""
+    return text.encode('utf-8').decode('utf-8')
+
+
+def fields(i):
+    """Поля i-й синтетической находки"""
+    title, server, device_type, vendor, rules = PAGES[i % len(PAGES)]
+    ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+    port = PORTS[i % len(PORTS)]
+    scheme = 'https' if port in (443, 8443) else 'http'
+    return {
+        'ip': ip,
+        'port': port,
+        'url': f"{scheme}://{ip}:{port}",
+        'status_code': 200 if i % 3 else 401,
+        'title': fresh(title),
+        'server': fresh(server),
+        'content_type': fresh('text/html; charset=utf-8'),
+        'is_router': device_type == 'router',
+        'device_type': fresh(device_type),
+        'vendor': fresh(vendor),
+        'matched_rules': [fresh(rule) for rule in rules],
+        'content_length': 1024 + i % 4096,
+        'encoding': fresh('utf-8'),
+        'etag': None,
+        'last_modified': None,
+        'body_hash': hashlib.sha1(title.encode() + bytes([i % 7])).hexdigest(),
+    }
+
+
+def build(factory, count):
+    """Строит count находок и возвращает (список, байт на находку)"""
+    gc.collect()
+    tracemalloc.start()
+    results = [factory(fields(i)) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, size / count
+
+
+def timed(function, results):
+    """Секунд на проход function по всем находкам"""
+    start = time.perf_counter()
+    for result in results:
+        function(result)
+    return time.perf_counter() - start
+
+
+def count_router(result):
+    return result['is_router']
+
+
+def dump(result):
+    return json.dumps(as_dict(result), ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan result memory benchmark')
+    parser.add_argument('--count', type=int, default=1_000_000,
+                        help='Number of synthetic results (default: 1000000)')
+    args = parser.parse_args()
+
+    rows = []
+    for name, factory in (('dict', dict), ('ScanResult', ScanResult.from_dict)):
+        results, per_result = build(factory, args.count)
+        rows.append((name, per_result, timed(count_router, results), timed(dump, results)))
+        assert dump(results[-1]) == json.dumps(fields(args.count - 1), ensure_ascii=False), \
+            'ScanResult must serialise to the same JSON'
+        del results
+
+    print(f"{args.count:,} results")
+    for name, per_result, routers, dumped in rows:
+        print(f"{name:11} {per_result:6.0f} bytes/result  {per_result * args.count / 2 ** 20:8.1f} MiB  "
+              f"is_router {routers:5.2f}s  json {dumped:6.2f}s")
+    print(f"memory: x{rows[0][1] / rows[1][1]:.2f} smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк сканирования парка поддельных устройств
+
+Запускает парк HTTP/HTTPS-устройств на loopback (см. fleet.py), сканирует
+его NetworkScanner или AsyncNetworkScanner и сообщает скорость (хостов в
+секунду), задержку на хост (p50/p99), пиковую память и процессорное
+время процесса сканера. Результат сохраняется в JSON, чтобы сравнивать
+запуски между коммитами.
+
+Запуск:
+    python benchmarks/bench_scan.py [--hosts 200] [--engine threads|asyncio]
+        [--json results.json] [--compare baseline.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fleet import Fleet, aliases_supported, build_fleet  # noqa: E402
+from network_scanner.adaptive import percentile  # noqa: E402
+from network_scanner.async_scanner import AsyncNetworkScanner  # noqa: E402
+from network_scanner.scanner import NetworkScanner  # noqa: E402
+from network_scanner.targets import address_to_key, key_to_address  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Метрики для сравнения с базовым запуском: путь, больше - лучше
+COMPARED = (
+    ('hosts_per_s', True),
+    ('probes_per_s', True),
+    ('latency_ms.p50', False),
+    ('latency_ms.p99', False),
+    ('cpu_s.total', False),
+    ('peak_rss_mb', False),
+)
+
+
+class TimedScanner(NetworkScanner):
+    """NetworkScanner, замеряющий время сканирования каждого хоста"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.host_times = []
+        self._times_lock = threading.Lock()
+
+    def scan_ip(self, ip):
+        started = time.perf_counter()
+        try:
+            return super().scan_ip(ip)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._times_lock:
+                self.host_times.append(elapsed)
+
+
+class TimedAsyncScanner(AsyncNetworkScanner):
+    """AsyncNetworkScanner, замеряющий время от первой до последней пробы хоста"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spans = {}
+
+    @property
+    def host_times(self):
+        return [end - start for start, end in self.spans.values()]
+
+    async def probe(self, ip, port):
+        started = time.perf_counter()
+        try:
+            return await super().probe(ip, port)
+        finally:
+            span = self.spans.setdefault(ip, [started, started])
+            span[0] = min(span[0], started)
+            span[1] = max(span[1], time.perf_counter())
+
+
+def peak_rss_mb():
+    """Пиковый размер резидентной памяти процесса в МБ"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def cpu_times():
+    """Процессорное время процесса (пользователь, система) в секундах"""
+    if resource is None:
+        return time.process_time(), 0.0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime, usage.ru_stime
+
+
+def git_commit():
+    """Текущий коммит репозитория, если он доступен"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def scan_targets(devices, empty):
+    """
+    Цели и порты сканирования для парка
+
+    Args:
+        devices (list): Устройства парка
+        empty (int): Сколько адресов без устройств добавить после парка
+
+    Returns:
+        tuple: (цели, порты)
+    """
+    addresses = sorted({device.address for device in devices}, key=address_to_key)
+    ports = sorted({device.port for device in devices})
+    last = key_to_address(address_to_key(addresses[-1]) + empty)
+    return f"{addresses[0]}-{last}", ports
+
+
+def run_benchmark(args):
+    """Проводит один запуск и возвращает отчет"""
+    addressing = args.addressing
+    if addressing == 'aliases' and not aliases_supported():
+        print("Loopback aliases are not available, falling back to one port per device")
+        addressing = 'ports'
+
+    devices = build_fleet(
+        args.hosts, slow=args.slow, blackhole=args.blackhole, https=args.https,
+        addressing=addressing, seed=args.seed,
+    )
+    network, ports = scan_targets(devices, args.empty if addressing == 'aliases' else 0)
+
+    with Fleet(devices, slow_delay=args.slow_delay) as fleet:
+        if fleet.failed:
+            print(f"{len(fleet.failed)} devices could not start (ports in use or no openssl)")
+        expected = [
+            device for device in devices
+            if (device.address, device.port) not in fleet.failed
+            and device.behavior != 'blackhole'
+            and (device.behavior != 'slow' or args.slow_delay < args.timeout)
+        ]
+
+        if args.engine == 'asyncio':
+            scanner = TimedAsyncScanner(network=network, timeout=args.timeout, concurrency=args.concurrency)
+        else:
+            scanner = TimedScanner(network=network, timeout=args.timeout, threads=args.threads)
+        scanner.common_ports = ports
+
+        rss_before = peak_rss_mb()
+        user_before, system_before = cpu_times()
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results = scanner.scan_network()
+        elapsed = time.perf_counter() - started
+        user_after, system_after = cpu_times()
+
+    host_times = sorted(scanner.host_times)
+    hosts = len(scanner.get_hosts())
+    by_type = {}
+    for result in results:
+        by_type[result['device_type']] = by_type.get(result['device_type'], 0) + 1
+
+    return {
+        'benchmark': 'scan',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'engine': args.engine,
+            'devices': args.hosts,
+            'empty': args.empty,
+            'addressing': addressing,
+            'slow': args.slow,
+            'slow_delay': args.slow_delay,
+            'blackhole': args.blackhole,
+            'https': args.https if fleet.https else 0,
+            'timeout': args.timeout,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'ports': ports,
+        },
+        'hosts': hosts,
+        'elapsed_s': round(elapsed, 3),
+        'hosts_per_s': round(hosts / elapsed, 1),
+        # При адресации по портам весь парк - один хост, сравнивать нужно пробы
+        'probes_per_s': round(hosts * len(ports) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(host_times, 0.5) * 1000, 1) if host_times else None,
+            'p99': round(percentile(host_times, 0.99) * 1000, 1) if host_times else None,
+            'max': round(host_times[-1] * 1000, 1) if host_times else None,
+        },
+        'cpu_s': {
+            'user': round(user_after - user_before, 3),
+            'system': round(system_after - system_before, 3),
+            'total': round(user_after - user_before + system_after - system_before, 3),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_before_mb': rss_before,
+        'found': len(results),
+        'expected': len(expected),
+        'by_device_type': by_type,
+    }
+
+
+def metric(report, path):
+    """Значение метрики по пути вида 'latency_ms.p50'"""
+    value = report
+    for part in path.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(report, baseline):
+    """Печатает изменения метрик относительно базового запуска"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    for path, higher_is_better in COMPARED:
+        before, after = metric(baseline, path), metric(report, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        better = change > 0 if higher_is_better else change < 0
+        verdict = 'better' if better else 'worse' if change else 'same'
+        print(f"  {path:16} {before:>10} -> {after:>10}  {change:+.1%} ({verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scan benchmark against a local fake-device fleet')
+    parser.add_argument('--hosts', type=int, default=200, help='Fake devices in the fleet (default: 200)')
+    parser.add_argument('--empty', type=int, default=56,
+                        help='Extra addresses without devices to scan (default: 56)')
+    parser.add_argument('--slow', type=float, default=0.05, help='Share of slow responders (default: 0.05)')
+    parser.add_argument('--slow-delay', type=float, default=0.5,
+                        help='Response delay of slow devices in seconds (default: 0.5)')
+    parser.add_argument('--blackhole', type=float, default=0.05,
+                        help='Share of black-holed ports that drop SYNs (default: 0.05)')
+    parser.add_argument('--https', type=float, default=0.1, help='Share of HTTPS devices (default: 0.1)')
+    parser.add_argument('--addressing', choices=['aliases', 'ports'], default='aliases',
+                        help='One loopback address per device, or one port per device on 127.0.0.1')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='threads')
+    parser.add_argument('--threads', type=int, default=50, help='Threads for the threads engine (default: 50)')
+    parser.add_argument('--concurrency', type=int, default=1000,
+                        help='Simultaneous probes for the asyncio engine (default: 1000)')
+    parser.add_argument('--timeout', type=float, default=1.0, help='Scanner timeout in seconds (default: 1)')
+    parser.add_argument('--seed', type=int, default=1, help='Fleet layout seed (default: 1)')
+    parser.add_argument('--json', metavar='PATH', help='Save the report as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='Baseline report JSON to compare with')
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print(f"{report['config']['engine']}: {report['hosts']} hosts in {report['elapsed_s']:.2f} s, "
+          f"{report['hosts_per_s']:,.1f} hosts/s")
+    print(f"per-host latency: p50 {report['latency_ms']['p50']} ms, p99 {report['latency_ms']['p99']} ms, "
+          f"max {report['latency_ms']['max']} ms")
+    print(f"CPU: {report['cpu_s']['total']:.2f} s (user {report['cpu_s']['user']:.2f}, "
+          f"system {report['cpu_s']['system']:.2f}), peak RSS {report['peak_rss_mb']} MB")
+    print(f"found {report['found']} of {report['expected']} reachable services: {report['by_device_type']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Saved to {args.json}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Парк поддельных устройств на loopback для бенчмарков сканирования
+
+Каждое устройство - HTTP- или HTTPS-сервер со страницей роутера, NAS,
+камеры, принтера или обычного сайта на своем адресе 127.x.y.z (в Linux
+весь 127.0.0.0/8 принадлежит loopback) или на своем порту 127.0.0.1.
+Часть устройств отвечает с задержкой, часть портов "черные дыры":
+очередь подключений заполнена, и SYN остаются без ответа, как у
+отфильтрованного порта.
+
+Все серверы работают в отдельном процессе на одном цикле asyncio,
+поэтому процессорное время и память процесса сканера не смешиваются
+с затратами парка.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from network_scanner.async_scanner import raise_fd_limit  # noqa: E402
+from network_scanner.targets import address_to_key, key_to_address  # noqa: E402
+
+# Страницы устройств: тип -> (заголовок Server, Content-Type, тело)
+PAGES = {
+    'router': ('lighttpd', 'text/html; charset=utf-8', (
+        "<html><head><title>TP-LINK Wireless Router</title></head><body>"
+        "<form action='/login'>Username <input name='username'> Password "
+        "<input type='password' name='password'></form> Wireless settings, WAN, LAN"
+        "</body></html>"
+    )),
+    'nas': ('nginx', 'text/html; charset=utf-8', (
+        "<html><head><title>Synology DiskStation</title></head><body>"
+        "<div>Storage manager: disk volume, share folder</div>" + "<p>status ok</p>" * 50 +
+        "</body></html>"
+    )),
+    'camera': ('Boa/0.94.14rc21', 'text/html; charset=gb2312', (
+        "<html><head><title>IPCam Viewer</title></head><body>"
+        "<div>Live video stream, PTZ zoom control for camera</div>" + "<img src='/snap.jpg'>" * 20 +
+        "</body></html>"
+    )),
+    'printer': ('HP HTTP Server', 'text/html', (
+        "<html><head><title>HP LaserJet</title></head><body>"
+        "<div>Printer status: toner cartridge low, print and scan</div>"
+        "</body></html>"
+    )),
+    'generic': ('Apache', 'text/html; charset=utf-8', (
+        "<html><head><title>Welcome to my site</title></head><body>" +
+        "<p>This is a personal blog about programming and travel.</p>" * 200 +
+        "</body></html>"
+    )),
+}
+
+# Доли типов устройств в парке
+DEVICE_MIX = (('router', 0.35), ('camera', 0.25), ('nas', 0.15), ('printer', 0.1), ('generic', 0.15))
+
+# Первый адрес парка при адресации по алиасам loopback
+FIRST_ADDRESS = '127.1.0.1'
+
+Device = namedtuple('Device', 'address port device_type scheme behavior')
+
+
+def build_fleet(hosts, slow=0.05, blackhole=0.05, https=0.1, addressing='aliases',
+                http_port=8080, https_port=8443, seed=1):
+    """
+    Описание парка устройств
+
+    Args:
+        hosts (int): Число устройств
+        slow (float): Доля устройств, отвечающих с задержкой
+        blackhole (float): Доля портов, не отвечающих на SYN
+        https (float): Доля HTTPS-устройств
+        addressing (str): 'aliases' - свой адрес 127.x.y.z на устройство,
+            'ports' - все на 127.0.0.1, у каждого свой порт
+        http_port (int): Порт HTTP-устройств (начальный для 'ports')
+        https_port (int): Порт HTTPS-устройств при 'aliases'
+        seed (int): Зерно генератора для воспроизводимого парка
+
+    Returns:
+        list: Device для каждого устройства
+    """
+    generator = random.Random(seed)
+    types, weights = zip(*DEVICE_MIX)
+    first = address_to_key(FIRST_ADDRESS)
+    devices = []
+    for index in range(hosts):
+        scheme = 'https' if generator.random() < https else 'http'
+        roll = generator.random()
+        behavior = 'blackhole' if roll < blackhole else 'slow' if roll < blackhole + slow else 'fast'
+        if addressing == 'aliases':
+            address = key_to_address(first + index)
+            port = https_port if scheme == 'https' else http_port
+        else:
+            # Порты 443/8443 сканер проверяет по HTTPS, остальные по HTTP
+            address, port = '127.0.0.1', http_port + index
+            scheme = 'http'
+        devices.append(Device(address, port, generator.choices(types, weights)[0], scheme, behavior))
+    return devices
+
+
+def aliases_supported():
+    """Можно ли слушать на адресах 127.x.y.z помимо 127.0.0.1 (Linux - да)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind((FIRST_ADDRESS, 0))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def create_certificate(directory):
+    """
+    Самоподписанный сертификат для HTTPS-устройств (нужен openssl)
+
+    Returns:
+        tuple: (сертификат, ключ) или None, если openssl недоступен
+    """
+    openssl = shutil.which('openssl')
+    if openssl is None:
+        return None
+    certfile = os.path.join(directory, 'fleet.pem')
+    keyfile = os.path.join(directory, 'fleet.key')
+    try:
+        subprocess.run(
+            [openssl, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=fleet.local', '-keyout', keyfile, '-out', certfile],
+            check=True, capture_output=True, timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return certfile, keyfile
+
+
+async def handle(reader, writer, device, delay):
+    """Отвечает на один HTTP-запрос страницей устройства"""
+    try:
+        request = await reader.readuntil(b'\r\n\r\n')
+        if device.behavior == 'slow':
+            await asyncio.sleep(delay)
+        path = request.split(b' ', 2)[1] if request.count(b' ') >= 2 else b'/'
+        server, content_type, page = PAGES[device.device_type]
+        if path == b'/':
+            status, body = '200 OK', page.encode('utf-8')
+        else:
+            status, body = '404 Not Found', b'Not Found'
+        head = (
+            f"HTTP/1.1 {status}\r\nServer: {server}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ssl.SSLError):
+        pass
+    finally:
+        writer.close()
+
+
+def black_hole(address, port):
+    """
+    Порт, на котором SYN остаются без ответа
+
+    Очередь подключений длиной 0 занимается одним соединением, после
+    чего ядро отбрасывает новые SYN.
+
+    Returns:
+        list: Сокеты, которые нужно держать открытыми
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((address, port))
+    listener.listen(0)
+    filler = socket.create_connection((address, port), timeout=5)
+    return [listener, filler]
+
+
+async def serve(devices, certificate, delay, control):
+    """Запускает серверы парка и работает до команды из control"""
+    context = None
+    if certificate is not None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*certificate)
+
+    servers, holes, failed = [], [], []
+    for device in devices:
+        try:
+            if device.behavior == 'blackhole':
+                holes.extend(black_hole(device.address, device.port))
+                continue
+            if device.scheme == 'https' and context is None:
+                failed.append((device.address, device.port))
+                continue
+            servers.append(await asyncio.start_server(
+                lambda reader, writer, device=device: handle(reader, writer, device, delay),
+                device.address, device.port, ssl=context if device.scheme == 'https' else None,
+                reuse_address=True, backlog=128,
+            ))
+        except OSError:
+            failed.append((device.address, device.port))
+
+    control.send(('ready', failed))
+    # Ждем команды остановки, не блокируя цикл событий
+    await asyncio.get_running_loop().run_in_executor(None, control.recv)
+    for server in servers:
+        server.close()
+    for sock in holes:
+        sock.close()
+
+
+def fleet_main(devices, certificate, delay, control):
+    """Процесс парка устройств"""
+    raise_fd_limit(len(devices) * 3 + 256)
+    asyncio.run(serve(devices, certificate, delay, control))
+
+
+class Fleet:
+    """
+    Парк устройств в отдельном процессе
+
+        with Fleet(devices) as fleet:
+            ...  # устройства доступны, fleet.failed - не запустившиеся
+    """
+
+    def __init__(self, devices, slow_delay=1.0):
+        """
+        Args:
+            devices (list): Описание парка из build_fleet
+            slow_delay (float): Задержка ответа медленных устройств в секундах
+        """
+        self.devices = devices
+        self.slow_delay = slow_delay
+        self.failed = []
+        # Запущены ли HTTPS-устройства (без openssl они пропускаются)
+        self.https = False
+        self._process = None
+        self._control = None
+        self._directory = None
+
+    def __enter__(self):
+        certificate = None
+        if any(device.scheme == 'https' for device in self.devices):
+            self._directory = tempfile.TemporaryDirectory()
+            certificate = create_certificate(self._directory.name)
+        self.https = certificate is not None
+
+        context = multiprocessing.get_context('spawn')
+        self._control, child = context.Pipe()
+        self._process = context.Process(
+            target=fleet_main, args=(self.devices, certificate, self.slow_delay, child), daemon=True
+        )
+        self._process.start()
+        if not self._control.poll(60):
+            self.__exit__(None, None, None)
+            raise RuntimeError("Парк устройств не запустился за 60 с")
+        _, self.failed = self._control.recv()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._process is not None:
+            try:
+                self._control.send('stop')
+            except OSError:
+                pass
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
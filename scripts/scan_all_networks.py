@@ -1,57 +1,51 @@
 #!/usr/bin/env python3
 """
 Сканирование всех возможных сетей для поиска повторителя
+
+Все сети сканируются одним сканером в этом же процессе: общий пул
+потоков, без повторного запуска интерпретатора для каждой сети и с
+одним общим отчетом в results/.
 """
 
-import subprocess
-import sys
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-def scan_network(network, ports=None):
-    """Сканирует одну сеть"""
-    print(f"\n🔍 Сканирую сеть {network}...")
-    
-    cmd = [sys.executable, "-m", "network_scanner.cli", "--network", network, "--save"]
-    
-    if ports:
-        cmd.extend(["--ports", ports])
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        print(result.stdout)
-        if result.stderr:
-            print(f"Ошибки: {result.stderr}")
-    except subprocess.TimeoutExpired:
-        print(f"⚠️  Таймаут при сканировании сети {network}")
+from network_scanner.scanner import NetworkScanner  # noqa: E402
+
+# Список сетей для сканирования
+NETWORKS = [
+    "192.168.1.0/24",
+    "192.168.0.0/24",
+    "192.168.2.0/24",
+    "192.168.100.0/24",
+    "10.0.0.0/24",
+    "10.1.1.0/24",
+    "172.16.0.0/24",
+    "172.16.1.0/24",
+]
+
+# Порты для проверки
+PORTS = [80, 81, 82, 443, 8080, 8081, 8443, 8888, 8000, 8001, 9000]
 
 def main():
     """Основная функция"""
     print("=" * 60)
     print("ПОИСК WIFI ПОВТОРИТЕЛЯ ВО ВСЕХ СЕТЯХ")
     print("=" * 60)
-    
-    # Список сетей для сканирования
-    networks = [
-        "192.168.1.0/24",
-        "192.168.0.0/24", 
-        "192.168.2.0/24",
-        "192.168.100.0/24",
-        "10.0.0.0/24",
-        "10.1.1.0/24",
-        "172.16.0.0/24",
-        "172.16.1.0/24",
-    ]
-    
-    # Порты для проверки
-    ports = "80,81,82,443,8080,8081,8443,8888,8000,8001,9000"
-    
-    for network in networks:
-        scan_network(network, ports)
-    
+
+    scanner = NetworkScanner(network=NETWORKS, timeout=2, threads=100)
+    scanner.common_ports = PORTS
+    scanner.scan_network()
+    scanner.save_results()
+
+    routers = [r for r in scanner.results if r['is_router']]
     print("\n" + "=" * 60)
     print("СКАНИРОВАНИЕ ЗАВЕРШЕНО!")
+    print(f"Найдено интерфейсов: {len(scanner.results)}, роутеров/повторителей: {len(routers)}")
     print("Проверьте папку results/ для просмотра результатов")
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
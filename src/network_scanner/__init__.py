@@ -7,5 +7,7 @@ __author__ = "zedraider"
 __description__ = "Network web interface scanner for local networks"
 
 from .scanner import NetworkScanner
+from .async_scanner import AsyncNetworkScanner
+from .models import ScanResult
 
-__all__ = ['NetworkScanner']
\ No newline at end of file
+__all__ = ['NetworkScanner', 'AsyncNetworkScanner', 'ScanResult']
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Адаптивный таймаут подключения и управление параллельностью
+
+Контроллер измеряет время ответа на подключение (SYN-ACK или RST) во
+время сканирования и выставляет таймаут подключения по наблюдаемому
+распределению: p99 x factor в пределах [min_timeout, max_timeout]. В
+локальной сети это миллисекунды вместо фиксированных 2 с, через VPN
+таймаут при необходимости растет.
+
+Параллельность регулируется по AIMD: после каждого окна из window
+проверенных портов считается доля потерь - портов, промолчавших у
+ответившего хоста, локальных ошибок сокетов и сбросов HTTP-соединений.
+Всплеск потерь (выше порога и вдвое выше обычного для этой сети уровня)
+уменьшает параллельность вдвое, чистое окно увеличивает ее на шаг.
+"""
+
+import collections
+import errno
+import threading
+
+# Исходы подключения к порту
+ANSWERED = 'answered'        # SYN-ACK или RST: хост ответил
+SILENT = 'silent'            # ответа не было до таймаута
+UNREACHABLE = 'unreachable'  # ICMP/ARP: хост недоступен
+FAILED = 'failed'            # локальная ошибка: не хватило буферов, портов, дескрипторов
+
+ANSWER_ERRORS = {
+    0, errno.ECONNREFUSED,
+    getattr(errno, 'WSAECONNREFUSED', 10061),
+}
+
+LOCAL_ERRORS = {
+    errno.ENOBUFS, errno.EAGAIN, errno.EMFILE, errno.ENFILE, errno.EADDRNOTAVAIL, errno.ENOMEM,
+}
+
+
+def classify_connect(error):
+    """
+    Исход подключения по коду ошибки connect
+
+    Args:
+        error (int): Код ошибки или None, если ответа не было
+
+    Returns:
+        str: ANSWERED, SILENT, UNREACHABLE или FAILED
+    """
+    if error is None:
+        return SILENT
+    if error in ANSWER_ERRORS:
+        return ANSWERED
+    if error in LOCAL_ERRORS:
+        return FAILED
+    return UNREACHABLE
+
+
+def is_connection_reset(error):
+    """Вызвана ли ошибка (в том числе обернутая requests/urllib3) сбросом соединения"""
+    pending, seen = [error], set()
+    while pending:
+        error = pending.pop()
+        if error is None or id(error) in seen:
+            continue
+        seen.add(id(error))
+        if isinstance(error, ConnectionResetError):
+            return True
+        pending.extend([error.__cause__, error.__context__])
+        pending.extend(arg for arg in error.args if isinstance(arg, BaseException))
+    return False
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)"""
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+class AdaptiveController:
+    """
+    Подбирает таймаут подключения и число одновременных проверок
+
+    Потокобезопасен: движок на потоках сообщает исходы из рабочих
+    потоков, asyncio - из цикла событий.
+    """
+
+    def __init__(self, timeout, concurrency, factor=3.0, quantile=0.99, min_timeout=0.05,
+                 max_timeout=None, window=200, min_samples=30, loss_threshold=0.05):
+        """
+        Args:
+            timeout (float): Исходный таймаут подключения в секундах
+            concurrency (int): Наибольшее число одновременных проверок
+            factor (float): Во сколько раз таймаут больше перцентиля RTT
+            quantile (float): Перцентиль RTT для таймаута
+            min_timeout (float): Нижняя граница таймаута
+            max_timeout (float): Верхняя граница таймаута (по умолчанию 4 x timeout)
+            window (int): Сколько портов в окне оценки потерь
+            min_samples (int): Сколько измерений RTT нужно до первой подстройки таймаута
+            loss_threshold (float): Доля потерь, ниже которой окно считается чистым
+        """
+        self.initial_timeout = timeout
+        self.timeout = timeout
+        self.factor = factor
+        self.quantile = quantile
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout if max_timeout is not None else timeout * 4
+        self.max_concurrency = max(1, concurrency)
+        self.concurrency = self.max_concurrency
+        self.min_reached = self.max_concurrency
+        self.step = max(1, self.max_concurrency // 20)
+        self.window = window
+        self.min_samples = min_samples
+        self.loss_threshold = loss_threshold
+
+        self.rtts = collections.deque(maxlen=2048)
+        self.baseline_loss = 0.0
+        self.backoffs = 0
+        self.probes = 0
+        self.lost = 0
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._window_probes = 0
+        self._window_lost = 0
+
+    def record_port(self, ip, outcome, rtt=None):
+        """
+        Учитывает исход подключения к порту хоста
+
+        Args:
+            ip (str): Адрес хоста
+            outcome (str): ANSWERED, SILENT, UNREACHABLE или FAILED
+            rtt (float): Время ответа в секундах, если измерено
+        """
+        with self._lock:
+            counts = self._hosts.setdefault(ip, collections.Counter())
+            counts[outcome] += 1
+            if outcome == ANSWERED and rtt is not None:
+                self.rtts.append(rtt)
+
+    def finish_host(self, ip):
+        """Закрывает учет хоста: промолчавшие порты ответившего хоста - потери"""
+        with self._lock:
+            counts = self._hosts.pop(ip, None)
+            if not counts:
+                return
+            lost = counts[FAILED] + (counts[SILENT] if counts[ANSWERED] else 0)
+            self._account(sum(counts.values()), lost)
+
+    def record_reset(self):
+        """Учитывает сброс установленного соединения (RST во время HTTP-запроса)"""
+        with self._lock:
+            self._account(0, 1)
+
+    def _account(self, probes, lost):
+        """Добавляет исходы в окно и подстраивает параметры по его заполнении (под блокировкой)"""
+        self.probes += probes
+        self.lost += lost
+        self._window_probes += probes
+        self._window_lost += lost
+        if self._window_probes < self.window:
+            return
+
+        loss = self._window_lost / self._window_probes
+        if loss > max(self.loss_threshold, 2 * self.baseline_loss):
+            # Мультипликативное уменьшение
+            self.concurrency = max(1, self.concurrency // 2)
+            self.min_reached = min(self.min_reached, self.concurrency)
+            self.backoffs += 1
+        else:
+            # Аддитивное увеличение
+            self.concurrency = min(self.max_concurrency, self.concurrency + self.step)
+        # Обычный для сети уровень потерь (фильтруемые порты и т.п.)
+        self.baseline_loss = 0.8 * self.baseline_loss + 0.2 * loss
+        self._window_probes = self._window_lost = 0
+
+        if len(self.rtts) >= self.min_samples:
+            rtt = percentile(sorted(self.rtts), self.quantile)
+            self.timeout = min(self.max_timeout, max(self.min_timeout, rtt * self.factor))
+
+    def summary(self):
+        """
+        Выбранные параметры для итогов сканирования
+
+        Returns:
+            dict: Таймаут, перцентили RTT, параллельность и потери
+        """
+        with self._lock:
+            rtts = sorted(self.rtts)
+            return {
+                'timeout': round(self.timeout, 4),
+                'initial_timeout': self.initial_timeout,
+                'rtt_samples': len(rtts),
+                'rtt_p50_ms': round(percentile(rtts, 0.5) * 1000, 2) if rtts else None,
+                'rtt_p99_ms': round(percentile(rtts, self.quantile) * 1000, 2) if rtts else None,
+                'concurrency': self.concurrency,
+                'max_concurrency': self.max_concurrency,
+                'min_concurrency': self.min_reached,
+                'backoffs': self.backoffs,
+                'loss_rate': round(self.lost / self.probes, 4) if self.probes else 0.0,
+            }
@@ -0,0 +1,386 @@
+"""
+Асинхронный движок сканирования на asyncio
+
+Вместо пула потоков, где каждый поток блокируется на connect_ex,
+все проверки портов выполняются неблокирующими соединениями в одном
+цикле событий. Количество одновременных проверок ограничивается одним
+семафором, поэтому в полете могут находиться десятки тысяч проб.
+С ограничителем скорости пробы чередуются между хостами блока, а
+одновременные пробы одного хоста ограничены своим семафором.
+"""
+
+import asyncio
+import contextlib
+import queue
+import ssl
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urljoin
+
+from .adaptive import classify_connect
+from .fingerprints import favicon_hash
+from .http_client import MAX_HEADER_BYTES, HTTPError, async_http_get, create_ssl_context
+from .ratelimit import interleave, rotated_ports
+from .scanner import FAVICON_PATH, REQUEST_HEADERS, NetworkScanner
+from .store import conditional_headers, reuse_result
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Сколько дескрипторов оставляем процессу помимо проб
+RESERVED_FDS = 64
+
+
+def raise_fd_limit(wanted):
+    """
+    Поднимает мягкий лимит открытых файлов до нужного значения
+
+    Returns:
+        int: Доступный лимит дескрипторов (или wanted, если лимитов нет)
+    """
+    if resource is None:
+        return wanted
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY:
+        wanted = min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+            soft = wanted
+        except (ValueError, OSError):
+            pass
+    return soft if soft != resource.RLIM_INFINITY else wanted
+
+
+async def close_streams(streams):
+    """Закрывает соединение asyncio"""
+    _, writer = streams
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+class AsyncNetworkScanner(NetworkScanner):
+    """Сканер сети на asyncio с теми же результатами, что и NetworkScanner"""
+
+    def __init__(self, network="192.168.1.0/24", timeout=2, threads=50, concurrency=10000):
+        """
+        Инициализация асинхронного сканера
+
+        Args:
+            network (str | list): Цели сканирования (см. NetworkScanner)
+            timeout (int): Таймаут подключения в секундах
+            threads (int): Не используется, оставлен для совместимости
+            concurrency (int): Максимальное число одновременных проб
+        """
+        super().__init__(network=network, timeout=timeout, threads=threads)
+        self.concurrency = concurrency
+        self._ssl_context = None
+        # Семафоры хостов при ограничении подключений к хосту: ip -> [семафор, пользователи]
+        self._host_slots = {}
+
+    async def open_port_async(self, ip, port):
+        """
+        Открывает неблокирующее соединение с портом
+
+        Returns:
+            tuple: (reader, writer) или None, если порт закрыт
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.wait_async()
+        started = time.monotonic()
+        error = 0
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(str(ip), port, limit=MAX_HEADER_BYTES), self.connect_timeout()
+            )
+        except asyncio.TimeoutError:
+            error = None
+            return None
+        except OSError as e:
+            error = e.errno
+            return None
+        finally:
+            rtt = time.monotonic() - started if error is not None else None
+            self.metrics.record_connect(error, rtt)
+            if self.adaptive is not None:
+                self.adaptive.record_port(ip, classify_connect(error), rtt)
+
+    async def check_port_async(self, ip, port):
+        """Проверяет, открыт ли порт, неблокирующим соединением"""
+        streams = await self.open_port_async(ip, port)
+        if streams is None:
+            return False
+        await close_streams(streams)
+        return True
+
+    async def check_web_service_async(self, ip, port, streams=None):
+        """
+        Проверяет веб-сервис на порту (асинхронная версия check_web_service)
+
+        Args:
+            ip (str): IP-адрес хоста
+            port (int): Порт
+            streams (tuple): Соединение, открытое при проверке порта; первый
+                http:// запрос уходит по нему без нового подключения
+        """
+        if self._ssl_context is None:
+            self._ssl_context = create_ssl_context()
+        previous = self.store.lookup(ip, port) if self.store is not None else None
+
+        try:
+            for url in self.candidate_urls(ip, port):
+                reuse = None
+                if streams is not None and url.startswith('http://'):
+                    reuse, streams = streams, None
+                try:
+                    response = await async_http_get(
+                        url,
+                        timeout=self.timeout,
+                        headers={**REQUEST_HEADERS, **conditional_headers(previous, url)},
+                        ssl_context=self._ssl_context,
+                        streams=reuse,
+                        body_budget=self.body_budget,
+                        max_body_bytes=self.max_body_bytes,
+                        metrics=self.metrics,
+                    )
+                    result = reuse_result(previous, url, response)
+                    if result is not None:
+                        return result
+                    favicon = await self.fetch_favicon_async(response.url) if self.wants_favicon() else None
+                    return self.build_result(ip, port, url, response, favicon=favicon)
+                except ConnectionResetError:
+                    self.metrics.increment('connection_resets')
+                    if self.adaptive is not None:
+                        self.adaptive.record_reset()
+                    continue
+                except ssl.SSLError:
+                    self.metrics.increment('tls_errors')
+                    continue
+                except (OSError, asyncio.TimeoutError, HTTPError):
+                    self.metrics.increment('http_errors')
+                    continue
+                except Exception:
+                    continue
+        finally:
+            if streams is not None:
+                await close_streams(streams)
+
+        return None
+
+    async def fetch_favicon_async(self, page_url):
+        """Загружает /favicon.ico сервиса и возвращает его хеш или None"""
+        try:
+            response = await async_http_get(
+                urljoin(page_url, FAVICON_PATH),
+                timeout=self.timeout,
+                headers=REQUEST_HEADERS,
+                ssl_context=self._ssl_context,
+                # Бюджет равен пределу: у картинки нет </title>, читаем до предела
+                body_budget=self.max_body_bytes,
+                max_body_bytes=self.max_body_bytes,
+                html_only=False,
+            )
+        except (OSError, asyncio.TimeoutError, HTTPError):
+            return None
+        if response.status_code != 200 or not response.content:
+            return None
+        return favicon_hash(response.content)
+
+    @contextlib.asynccontextmanager
+    async def host_slot(self, ip):
+        """Занимает одно из rate_limiter.per_host мест для проб хоста"""
+        limiter = self.rate_limiter
+        if limiter is None or not limiter.per_host:
+            yield
+            return
+        slot = self._host_slots.get(ip)
+        if slot is None:
+            slot = self._host_slots[ip] = [asyncio.Semaphore(limiter.per_host), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._host_slots[ip]
+
+    async def probe(self, ip, port):
+        """Проверяет порт и веб-сервис на нем по одному соединению"""
+        async with self.host_slot(ip):
+            streams = await self.open_port_async(ip, port)
+            if streams is None:
+                return None
+            return await self.check_web_service_async(ip, port, streams=streams)
+
+    async def scan_ip_async(self, ip):
+        """Сканирует один IP-адрес, проверяя все порты одновременно"""
+        ports = self.common_ports
+        if self.rate_limiter is not None:
+            ports = rotated_ports(ports, ip)
+        results = await asyncio.gather(*(self.probe(ip, port) for port in ports))
+        if self.adaptive is not None:
+            self.adaptive.finish_host(ip)
+        return [result for result in results if result]
+
+    async def scan_network_async(self, callback=None):
+        """
+        Сканирует всю сеть в цикле событий
+
+        Args:
+            callback (callable): Вызывается для каждого результата; по
+                умолчанию результаты собираются в self.results и печатаются
+        """
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Начало сканирования сети {self.network} (asyncio)")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Проверяемые порты: {self.common_ports}")
+        print("-" * 80)
+
+        try:
+            ip_list = self.get_hosts()
+        except ValueError as e:
+            print(f"Ошибка в формате сети: {e}")
+            return []
+
+        ip_list = self.prepare_hosts(ip_list)
+        start_time = time.time()
+        total = len(ip_list)
+        ports = list(self.common_ports)
+        if not total or not ports:
+            return self.results
+
+        # Каждая проба держит один сокет, поэтому ограничиваем ее числом дескрипторов
+        limit = raise_fd_limit(self.concurrency + RESERVED_FDS) - RESERVED_FDS
+        concurrency = max(1, min(self.concurrency, limit))
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Сканируем {total} адресов, "
+              f"одновременно до {concurrency} проб...")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        # Слоты семафора, придержанные, пока контроллер снижает параллельность
+        held = 0
+        remaining = {}
+        tasks = set()
+        completed = 0
+        step = max(1, total // 10)
+
+        async def run_probe(ip, port):
+            nonlocal completed
+            try:
+                result = await self.probe(ip, port)
+                if result:
+                    self.metrics.increment('services')
+                    self.emit(result)
+                    if callback is not None:
+                        callback(result)
+                    else:
+                        self.results.append(result)
+                        self.print_result(result)
+            except Exception:
+                pass
+            finally:
+                semaphore.release()
+
+            remaining[ip] -= 1
+            if remaining[ip] == 0:
+                del remaining[ip]
+                completed += 1
+                self.metrics.increment('hosts')
+                if self.adaptive is not None:
+                    self.adaptive.finish_host(ip)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_done(ip)
+                # Прогресс каждые 10%
+                if completed % step == 0:
+                    progress = (completed / total) * 100
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Прогресс: {progress:.1f}% ({completed}/{total})")
+
+        if self.rate_limiter is not None:
+            # Блок хостов заполняет все слоты, а пробы одного хоста разнесены
+            # пробами остальных хостов блока
+            probes = interleave(ip_list, ports, concurrency)
+        else:
+            probes = ((ip, port) for ip in ip_list for port in ports)
+
+        finished = False
+        try:
+            for ip, port in probes:
+                if ip not in remaining:
+                    remaining[ip] = len(ports)
+                if self.adaptive is not None:
+                    # Лишние слоты забираем по мере завершения проб, возвращаем при росте
+                    wanted = concurrency - max(1, min(concurrency, self.adaptive.concurrency))
+                    while held < wanted:
+                        await semaphore.acquire()
+                        held += 1
+                    while held > wanted:
+                        semaphore.release()
+                        held -= 1
+                # Новая проба создается только при наличии свободного слота
+                await semaphore.acquire()
+                task = asyncio.ensure_future(run_probe(ip, port))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            finished = True
+        finally:
+            self.stage_timings['port_scan'] = time.time() - start_time
+            if self.checkpoint is not None:
+                self.checkpoint.flush(finished=finished)
+        return self.results
+
+    def scan_network(self):
+        """Сканирует всю сеть (синхронная обертка над scan_network_async)"""
+        return asyncio.run(self.scan_network_async())
+
+    def iter_scan(self):
+        """
+        Сканирует сеть, отдавая результаты по мере нахождения
+
+        Цикл событий работает в отдельном потоке и передает результаты
+        через очередь; если перебор прервать, сканирование отменяется.
+
+        Yields:
+            dict: Найденный веб-интерфейс
+        """
+        found = queue.Queue()
+        finished = object()
+        state = {}
+
+        async def run():
+            state['loop'] = asyncio.get_running_loop()
+            state['task'] = asyncio.current_task()
+            await self.scan_network_async(callback=found.put)
+
+        def worker():
+            try:
+                asyncio.run(run())
+            except asyncio.CancelledError:
+                pass
+            except BaseException as e:
+                state['error'] = e
+            finally:
+                found.put(finished)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = found.get()
+                if result is finished:
+                    break
+                yield result
+        finally:
+            if thread.is_alive() and 'task' in state:
+                state['loop'].call_soon_threadsafe(state['task'].cancel)
+            thread.join()
+
+        if 'error' in state:
+            raise state['error']
@@ -0,0 +1,156 @@
+"""
+Кеш классификации страниц
+
+Устройства одной модели отдают одинаковые страницы входа, поэтому
+результат разбора (кодировка, заголовок, тип устройства) запоминается
+по хешу того, от чего он зависит: базы отпечатков, заголовков Server и
+Content-Type, хеша favicon и прочитанной части тела. Кеш ограничен по
+размеру (LRU) и может сохраняться между запусками.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+# Наибольшее число страниц в кеше по умолчанию
+CACHE_SIZE = 4096
+
+CACHE_VERSION = 1
+
+
+def page_key(digest, server, content_type, content, favicon=None):
+    """
+    Ключ кеша для ответа
+
+    Args:
+        digest (str): Отпечаток базы (FingerprintMatcher.digest)
+        server (str): Заголовок Server
+        content_type (str): Заголовок Content-Type (задает кодировку)
+        content (bytes): Прочитанная часть тела
+        favicon (str): Хеш favicon, если загружался
+
+    Returns:
+        str: Хеш в шестнадцатеричном виде
+    """
+    key = hashlib.blake2b(digest_size=16)
+    for part in (digest, server, content_type, favicon or ''):
+        key.update(part.encode('utf-8', errors='surrogateescape'))
+        key.update(b'\0')
+    key.update(content)
+    return key.hexdigest()
+
+
+class ClassificationCache:
+    """
+    LRU-кеш результатов классификации
+
+    Потокобезопасен: к нему обращаются все рабочие потоки сканера.
+    Значение - словарь с title, encoding, device_type, vendor, is_router
+    и matched_rules.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        """
+        Args:
+            maxsize (int): Наибольшее число записей
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Возвращает запись и учитывает попадание или промах
+
+        Returns:
+            dict: Копия записи или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return dict(entry, matched_rules=list(entry['matched_rules']))
+
+    def put(self, key, entry):
+        """Запоминает запись, вытесняя самую давно использованную"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Счетчики для итогов сканирования
+
+        Returns:
+            dict: hits, misses, size и hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self, path):
+        """
+        Загружает записи, сохраненные save
+
+        Поврежденный или чужой файл игнорируется: кеш - только ускорение.
+
+        Returns:
+            int: Число загруженных записей
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return 0
+            entries = data['entries']
+        except (OSError, ValueError, KeyError, AttributeError):
+            return 0
+        with self._lock:
+            for key, entry in entries[-self.maxsize:]:
+                self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return len(entries)
+
+    def save(self, path):
+        """Атомарно сохраняет записи в порядке использования"""
+        path = Path(path)
+        with self._lock:
+            data = {'version': CACHE_VERSION, 'entries': list(self._entries.items())}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,124 @@
+"""
+Контрольная точка для возобновления длинных сканирований
+
+Завершенные хосты хранятся как отсортированные непересекающиеся
+диапазоны целочисленных адресов (targets.RangeSet): при сканировании
+хосты завершаются почти по порядку, поэтому даже для /16 список
+остается из нескольких диапазонов. Файл перезаписывается атомарно раз в несколько секунд.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from .targets import RangeSet, address_to_key
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint:
+    """
+    Журнал завершенных хостов сканирования
+
+    Хост отмечается завершенным только после того, как его результаты
+    записаны в приемники, поэтому при возобновлении ничего не теряется.
+    """
+
+    def __init__(self, path, flush_interval=5.0):
+        """
+        Args:
+            path (str): Файл контрольной точки
+            flush_interval (float): Как часто сбрасывать журнал на диск, в секундах
+        """
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.completed = RangeSet()
+        self.network = None
+        self.ports = None
+        self.jsonl = None
+        self.finished = False
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def load(self):
+        """
+        Загружает журнал с диска
+
+        Returns:
+            bool: Был ли журнал
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Не удалось прочитать контрольную точку {self.path}: {e}")
+
+        self.network = data.get('network')
+        self.ports = data.get('ports')
+        self.jsonl = data.get('jsonl')
+        self.finished = data.get('finished', False)
+        self.completed = RangeSet(data.get('completed', []))
+        return True
+
+    def bind(self, network, ports, jsonl=None):
+        """
+        Привязывает журнал к параметрам сканирования
+
+        Raises:
+            ValueError: Журнал записан для другой сети или других портов
+        """
+        network, ports = str(network), sorted(ports)
+        if self.network is not None and (self.network != network or sorted(self.ports or []) != ports):
+            raise ValueError(
+                f"Контрольная точка {self.path} относится к сканированию "
+                f"{self.network} (порты {self.ports}), а не {network} (порты {ports})"
+            )
+        self.network = network
+        self.ports = ports
+        if jsonl is not None:
+            self.jsonl = str(jsonl)
+
+    def is_done(self, ip):
+        """Завершен ли хост"""
+        return address_to_key(ip) in self.completed
+
+    def mark_done(self, ip):
+        """Отмечает хост завершенным и при необходимости сбрасывает журнал"""
+        key = address_to_key(ip)
+        self.mark_runs([(key, key)])
+
+    def mark_runs(self, runs):
+        """Отмечает завершенными диапазоны ключей адресов (targets.address_to_key)"""
+        for start, end in runs:
+            self.completed.add_range(start, end)
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, finished=None):
+        """Атомарно записывает журнал на диск"""
+        if finished is not None:
+            self.finished = finished
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'network': self.network,
+            'ports': self.ports,
+            'jsonl': self.jsonl,
+            'finished': self.finished,
+            'completed': self.completed.runs(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._dirty = False
+        self._last_flush = time.monotonic()
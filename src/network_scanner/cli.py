@@ -4,16 +4,139 @@
 """
 
 import argparse
+import json
+import os
+import sqlite3
 import sys
+from pathlib import Path
 from .scanner import NetworkScanner
+from .async_scanner import AsyncNetworkScanner
+from .adaptive import AdaptiveController
+from .checkpoint import Checkpoint
+from .distributed import LEASE_TIMEOUT, TOKEN_ENV, Coordinator, parse_address, run_worker
+from .metrics import MetricsServer
+from .output import OUTPUT_FORMATS, ScanOutput
+from .parallel import ProcessScanner
+from .profiling import PROFILE_MODES, SHARED_PROFILER, ScanProfiler
+from .ratelimit import RateLimiter
+from .sinks import JSONLinesSink, read_jsonl, unique_results
+from .store import DEFAULT_STORE, ResultStore
+from .table import TABLE_FORMATS, ResultTable, arrow_available
+from .targets import read_targets_file
 import time
 import urllib3
 
 # Отключаем предупреждения о SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+DEFAULT_NETWORK = '192.168.1.0/24'
+
+def interrupted(args):
+    """Сообщение о прерывании по Ctrl-C; рабочие потоки и процессы к этому моменту остановлены"""
+    print("\nScan interrupted")
+    if args.checkpoint:
+        print(f"Finished hosts are saved in {args.checkpoint}, continue with --checkpoint {args.checkpoint} --resume")
+    return 130
+
+def print_changes(store, color=True):
+    """Печатает сервисы, появившиеся, изменившиеся и пропавшие с прошлого сканирования"""
+    counts = store.counts()
+    print(f"Changes since last scan: {counts['new']} new, {counts['changed']} changed, "
+          f"{counts['gone']} gone, {counts['unchanged']} unchanged")
+    marks = {'new': '\033[92m+', 'changed': '\033[93m~', 'gone': '\033[91m-'}
+    reset = '\033[0m'
+    if not color:
+        marks, reset = {'new': '+', 'changed': '~', 'gone': '-'}, ''
+    for item in store.changes():
+        result = item['result']
+        line = f"  {marks[item['change']]} {item['ip']}:{item['port']}{reset} - {result['title']} [{result['device_type']}]"
+        if item['fields']:
+            previous = item['previous']
+            details = [f"{field}: {previous.get(field)!r} -> {result.get(field)!r}"
+                       for field in item['fields'] if field != 'body_hash']
+            if 'body_hash' in item['fields']:
+                details.append('page content changed')
+            line += f" ({', '.join(details)})"
+        print(line)
+
+def print_metrics(metrics):
+    """Печатает задержки этапов и счетчики ошибок (--verbose)"""
+    snapshot = metrics.snapshot()
+    stages = ', '.join(f"{stage} {stats['p50_ms']}/{stats['p99_ms']}"
+                       for stage, stats in snapshot['stages'].items() if stats['count'])
+    if stages:
+        print(f"Stage latency p50/p99 ms: {stages}")
+    counters = snapshot['counters']
+    print(f"Connect: {counters['ports_open']} open, {counters['connect_refused']} refused, "
+          f"{counters['connect_timeouts']} timeouts, {counters['connect_unreachable']} unreachable; "
+          f"HTTP: {counters['connection_resets']} resets, {counters['tls_errors']} TLS errors, "
+          f"{counters['http_errors']} other errors")
+
+def save_stats(path, scanner, elapsed):
+    """Сохраняет метрики сканирования в JSON (--stats-json)"""
+    stats = {
+        'network': scanner.network,
+        'elapsed_s': round(elapsed, 3),
+        'stage_timings': {stage: round(seconds, 3) for stage, seconds in dict(scanner.stage_timings).items()},
+        **scanner.metrics.snapshot(),
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+
+def print_table(table, limit=5):
+    """Печатает находки по типам устройств и самые населенные подсети /24 (--table)"""
+    if not len(table):
+        return
+    types = ', '.join(f"{value} {count}" for value, count in table.count_by('device_type'))
+    print(f"Device types: {types}")
+    subnets = sorted(table.by_subnet(24), key=lambda pair: -pair[1])[:limit]
+    print(f"Top subnets: {', '.join(f'{subnet} {count}' for subnet, count in subnets)}")
+
+def print_profile(profiler):
+    """Сохраняет профиль в results/ и печатает самые затратные функции"""
+    try:
+        paths = profiler.save('results')
+    except OSError as e:
+        print(f"Cannot save profile: {e}")
+        paths = []
+    rows = profiler.top()
+    if not rows:
+        print("Profile is empty: the scan finished before any samples were taken")
+        return
+    print(f"\nProfile ({profiler.mode}, {profiler.elapsed:.2f}s): {', '.join(str(path) for path in paths)}")
+    print(f"  {'own s':>8} {'total s':>8} {'calls':>8}  function")
+    for label, calls, tottime, cumtime in rows:
+        print(f"  {tottime:8.3f} {cumtime:8.3f} {calls:8}  {label}")
+
+def worker_main(argv):
+    """CLI рабочего узла: network-scanner worker HOST:PORT"""
+    parser = argparse.ArgumentParser(
+        prog='network-scanner worker',
+        description='Scan work units leased from a network-scanner coordinator'
+    )
+    parser.add_argument('coordinator', help='Coordinator address, HOST:PORT')
+    parser.add_argument('--name', help='Worker name shown by the coordinator (default: host:pid)')
+    parser.add_argument('--fingerprints', metavar='PATH',
+                       help='Fingerprint database (JSON or YAML) to use instead of the bundled one')
+    parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                       help=f'Shared token expected by the coordinator (default: ${TOKEN_ENV})')
+    args = parser.parse_args(argv)
+    
+    try:
+        units = run_worker(parse_address(args.coordinator), name=args.name, fingerprints=args.fingerprints,
+                           token=args.token)
+    except OSError as e:
+        print(f"Cannot connect to coordinator {args.coordinator}: {e}")
+        return 1
+    print(f"Worker finished: {units} work units scanned")
+    return 0
+
 def main():
     """Основная функция CLI"""
+    if sys.argv[1:2] == ['worker']:
+        return worker_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description='Network web interface scanner for local networks',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -21,34 +144,198 @@ def main():
 Examples:
   network-scanner                    # Default network scan
   network-scanner -n 192.168.0.0/24  # Scan specific network
+  network-scanner -n 10.0.0.0/24,10.0.5.1-99 -x 10.0.0.1  # Several targets with exclusions
+  network-scanner --targets-file networks.txt --save   # One merged report for many networks
   network-scanner --save             # Save results
   network-scanner -p 80,443,8080     # Check specific ports
+  network-scanner -n 10.0.0.0/16 --engine asyncio  # Large network via asyncio
+  network-scanner -n 10.0.0.0/16 --processes 4      # Spread page analysis over 4 CPU cores
+  network-scanner -n 10.0.0.0/8 --coordinator 0.0.0.0:7878 --token s3cret  # Lease the scan to worker nodes...
+  network-scanner worker scanhost:7878 --token s3cret   # ...started like this on each node
+  network-scanner -n 10.0.0.0/22 --discover        # Skip hosts that are down
+  network-scanner -n 10.0.0.0/16 --rate 500 --max-per-host 2  # Gentle scan of a production segment
+  network-scanner --fingerprints my_devices.json   # Custom fingerprint database
+  network-scanner -n 10.0.0.0/16 --jsonl found.jsonl  # Stream findings to a file
+  network-scanner -n 10.0.0.0/16 --checkpoint scan.ckpt --resume  # Continue an interrupted scan
+  network-scanner -n 10.0.0.0/24 --incremental     # Show only what changed since the last scan
+  network-scanner -n 10.0.0.0/16 --stats-json stats.json --metrics-port 9464  # Where did the time go?
+  network-scanner -n 10.0.0.0/24 --profile sampling  # Hot functions and a flame graph of a real scan
+  network-scanner -n 10.0.0.0/16 --format jsonl | jq .url   # Findings as JSON Lines for other tools
+  network-scanner -n 10.0.0.0/16 --table results/scan.parquet  # Columnar table for pandas, DuckDB, Polars
         """
     )
     
-    parser.add_argument('--network', '-n', default='192.168.1.0/24',
-                       help='Network to scan in CIDR format (default: 192.168.1.0/24)')
+    parser.add_argument('--network', '-n', action='append', metavar='TARGETS',
+                       help='Targets to scan: CIDR networks, addresses or ranges like 10.0.0.5-50, '
+                            'comma-separated, may be repeated (default: 192.168.1.0/24)')
+    parser.add_argument('--targets-file', metavar='PATH',
+                       help='Read targets from a file, one or more per line (# starts a comment)')
+    parser.add_argument('--exclude', '-x', action='append', metavar='TARGETS',
+                       help='Networks, addresses or ranges to skip (comma-separated, may be repeated)')
     parser.add_argument('--timeout', '-t', type=float, default=2,
                        help='Connection timeout in seconds (default: 2)')
     parser.add_argument('--threads', '-j', type=int, default=50,
                        help='Number of threads (default: 50)')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='threads',
+                       help='Scan engine: thread pool or asyncio (default: threads)')
+    parser.add_argument('--concurrency', type=int, default=10000,
+                       help='Max simultaneous probes for the asyncio engine (default: 10000)')
+    parser.add_argument('--processes', type=int, default=1, metavar='N',
+                       help='Split the targets across N worker processes, each running its own engine '
+                            'with --threads/--concurrency (default: 1)')
+    parser.add_argument('--coordinator', metavar='[HOST]:PORT',
+                       help='Do not scan locally: listen on this address and lease work units to '
+                            '"network-scanner worker" nodes (HOST defaults to 127.0.0.1, '
+                            'use 0.0.0.0 to accept remote workers)')
+    parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                       help='With --coordinator, only accept workers that present this shared token '
+                            f'(default: ${TOKEN_ENV})')
+    parser.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT,
+                       help='Seconds without news from a worker before its work unit is re-leased '
+                            f'(default: {LEASE_TIMEOUT:.0f})')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='Tune the connect timeout from measured RTTs and back off concurrency '
+                            'when probes are lost (--timeout is the starting value; '
+                            'not available with --processes/--coordinator)')
+    parser.add_argument('--timeout-factor', type=float, default=3.0,
+                       help='With --adaptive, connect timeout = p99 RTT x factor (default: 3)')
+    parser.add_argument('--rate', type=float, metavar='PPS',
+                       help='Global budget of connection attempts (SYN packets) per second, '
+                            'shared by all threads/processes; probes are interleaved across hosts')
+    parser.add_argument('--max-per-host', type=int, metavar='N',
+                       help='Max simultaneous connections to one host')
+    parser.add_argument('--discover', '-d', action='store_true',
+                       help='Find live hosts (ARP/ICMP/TCP) before scanning web ports')
+    parser.add_argument('--body-budget', type=int, default=8192,
+                       help='Bytes of page body to read after </title>, 0 reads the whole body (default: 8192)')
+    parser.add_argument('--fingerprints', metavar='PATH',
+                       help='Fingerprint database (JSON or YAML) to use instead of the bundled one')
+    parser.add_argument('--classify-cache', metavar='PATH',
+                       help='Keep the page classification cache in this file between runs, '
+                            'so known device pages are not analysed again '
+                            '(not available with --processes/--coordinator)')
+    parser.add_argument('--favicon', action='store_true',
+                       help='Fetch /favicon.ico for favicon-hash signatures (one extra request per service)')
     parser.add_argument('--ports', '-p', 
                        help='Additional ports to check (comma-separated)')
     parser.add_argument('--save', '-s', action='store_true',
                        help='Save results to file')
+    parser.add_argument('--jsonl', metavar='PATH',
+                       help='Stream each finding to a JSON Lines file as it is found; '
+                            'results are not kept in memory and the reports are built from this file')
+    parser.add_argument('--checkpoint', metavar='PATH',
+                       help='Record finished hosts in a checkpoint file so the scan can be resumed '
+                            '(findings go to --jsonl, by default next to the checkpoint)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume the scan recorded in --checkpoint: skip finished hosts '
+                            'and append to its results')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Compare with the previous scan kept in --store: revalidate pages with '
+                            'ETag/Last-Modified, reuse unchanged classifications and print only '
+                            'new, changed and gone services (with --processes/--coordinator the '
+                            'diff still works, but workers fetch every page in full)')
+    parser.add_argument('--store', metavar='PATH',
+                       help=f'SQLite store of known services for --incremental (default: {DEFAULT_STORE})')
+    parser.add_argument('--stats-json', metavar='PATH',
+                       help='Write per-stage latency histograms (connect, TLS, first byte, body, '
+                            'encoding detection, classification) and error counters to a JSON file')
+    parser.add_argument('--metrics-port', metavar='[HOST:]PORT',
+                       help='Serve live metrics in Prometheus text format at http://HOST:PORT/metrics '
+                            'while scanning (default host: 127.0.0.1)')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                       help='Profile the scan across all threads: deterministic cProfile or low-overhead '
+                            'stack sampling; writes pstats (and collapsed stacks for flame graphs with '
+                            'sampling) to results/ and prints the top functions')
+    parser.add_argument('--table', metavar='PATH',
+                       help='Collect findings into a columnar table (uint32 IPs, dictionary-encoded '
+                            'strings), print counts by device type and subnet and save it to a '
+                            '.parquet or .feather file (needs pyarrow)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                       help='Console output: colored text with a live progress line, or one JSON object '
+                            'per finding on stdout with all other messages on stderr (default: text)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Print only the final summary, without findings, progress or colors')
     parser.add_argument('--verbose', '-v', action='store_true',
-                       help='Verbose output')
+                       help='Verbose output, including stage latencies and error counters')
     parser.add_argument('--version', action='version', 
                        version='%(prog)s 1.0.0')
     
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    if args.rate is not None and args.rate <= 0:
+        parser.error('--rate must be positive')
+    if args.max_per_host is not None and args.max_per_host < 1:
+        parser.error('--max-per-host must be at least 1')
+    if args.store and not args.incremental:
+        parser.error('--store requires --incremental')
+    # Контроллер живет в сканере этого процесса, рабочие процессы и узлы его не видят
+    if args.adaptive and (args.processes > 1 or args.coordinator):
+        parser.error('--adaptive cannot be combined with --processes/--coordinator')
+    # Страницы классифицируют рабочие процессы и узлы, файл кеша им не передается
+    if args.classify_cache and (args.processes > 1 or args.coordinator):
+        parser.error('--classify-cache cannot be combined with --processes/--coordinator')
+    metrics_address = None
+    if args.metrics_port:
+        host, _, port = args.metrics_port.rpartition(':')
+        if not port.isdigit() or int(port) > 65535:
+            parser.error('--metrics-port must be [HOST:]PORT')
+        metrics_address = (host or '127.0.0.1', int(port))
+    if args.table:
+        if Path(args.table).suffix not in TABLE_FORMATS:
+            parser.error('--table must be a .parquet or .feather file')
+        if not arrow_available():
+            parser.error('--table needs pyarrow: pip install network-scanner[table]')
+    
+    # Весь вывод запуска идет через буфер с отдельным потоком записи,
+    # в jsonl сообщения уходят в stderr, а stdout остается для находок
+    with ScanOutput(args.format, quiet=args.quiet) as output:
+        return start_scan(args, metrics_address, output)
+
+def start_scan(args, metrics_address, output):
+    """Настраивает сканер по аргументам и запускает сканирование"""
+    # Все цели сканируются за один запуск с общим пулом; пересекающиеся
+    # сети объединяются, поэтому каждый адрес проверяется один раз
+    targets = list(args.network or [])
+    if args.targets_file:
+        try:
+            targets.extend(read_targets_file(args.targets_file))
+        except OSError as e:
+            print(f"Cannot read targets file: {e}")
+            return 1
+    network = ','.join(targets) or DEFAULT_NETWORK
     
     # Создаем и запускаем сканер
-    scanner = NetworkScanner(
-        network=args.network,
-        timeout=args.timeout,
-        threads=args.threads
-    )
+    if args.engine == 'asyncio':
+        scanner = AsyncNetworkScanner(
+            network=network,
+            timeout=args.timeout,
+            threads=args.threads,
+            concurrency=args.concurrency
+        )
+    else:
+        scanner = NetworkScanner(
+            network=network,
+            timeout=args.timeout,
+            threads=args.threads
+        )
+    
+    scanner.exclude = args.exclude or []
+    if args.adaptive:
+        scanner.adaptive = AdaptiveController(
+            args.timeout,
+            concurrency=args.concurrency if args.engine == 'asyncio' else args.threads,
+            factor=args.timeout_factor
+        )
+    if args.rate or args.max_per_host:
+        scanner.rate_limiter = RateLimiter(args.rate, args.max_per_host)
+    scanner.discovery = args.discover
+    scanner.body_budget = args.body_budget
+    scanner.favicon = args.favicon
+    if args.fingerprints:
+        scanner.load_fingerprints(args.fingerprints)
+    if args.classify_cache:
+        scanner.classify_cache.load(args.classify_cache)
     
     # Добавляем дополнительные порты если указаны
     if args.ports:
@@ -56,27 +343,224 @@ Examples:
         scanner.common_ports.extend(additional_ports)
         scanner.common_ports = list(set(scanner.common_ports))
     
+    # Контрольная точка: завершенные хосты и файл с уже найденным
+    jsonl = args.jsonl
+    if args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint)
+        if args.resume:
+            try:
+                if not checkpoint.load():
+                    print(f"Checkpoint {args.checkpoint} not found, nothing to resume")
+                    return 1
+            except ValueError as e:
+                print(e)
+                return 1
+            jsonl = jsonl or checkpoint.jsonl
+        jsonl = jsonl or str(Path(args.checkpoint).with_suffix('.jsonl'))
+        try:
+            checkpoint.bind(network, scanner.common_ports, jsonl=jsonl)
+        except ValueError as e:
+            print(e)
+            return 1
+        scanner.checkpoint = checkpoint
+    
+    # Хранилище прошлых результатов: условные запросы и изменения с прошлого раза
+    store = None
+    if args.incremental:
+        try:
+            store = ResultStore(args.store or DEFAULT_STORE)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Cannot open store {args.store or DEFAULT_STORE}: {e}")
+            return 1
+        store.begin(network, resume=args.resume)
+        # Рабочим процессам и узлам хранилище не передается: условных запросов
+        # и повторного использования классификации у них нет, а изменения
+        # считаются здесь по находкам, пришедшим в приемник
+        scanner.store = store
+        scanner.sinks.append(store)
+    
+    # Несколько процессов или узлов: тот же сканер служит их настройками
+    runner = scanner
+    if args.coordinator:
+        host, port = parse_address(args.coordinator)
+        try:
+            runner = Coordinator(scanner, host, port, lease_timeout=args.lease_timeout, token=args.token)
+        except OSError as e:
+            print(f"Cannot listen on {args.coordinator}: {e}")
+            return 1
+        print(f"Coordinator listening on {host}:{runner.address[1]}, "
+              f"start workers with: network-scanner worker <this-host>:{runner.address[1]}")
+        if args.token is None and host not in ('127.0.0.1', 'localhost', '::1'):
+            print(f"Warning: no --token (or ${TOKEN_ENV}), any host that reaches this port can join as a worker")
+    elif args.processes > 1:
+        runner = ProcessScanner(scanner, args.processes)
+    
+    # Метрики Prometheus во время сканирования
+    metrics_server = None
+    if metrics_address is not None:
+        try:
+            metrics_server = MetricsServer(scanner.metrics, *metrics_address)
+        except OSError as e:
+            print(f"Cannot serve metrics on {args.metrics_port}: {e}")
+            return 1
+        print(f"Metrics at http://{metrics_address[0]}:{metrics_server.address[1]}/metrics")
+    
+    # Профилирование охватывает потоки сканера, но не рабочие процессы и узлы
+    profiler = None
+    if args.profile:
+        if runner is not scanner:
+            print("Note: --profile records only this process, pages are analysed by the workers")
+        elif args.profile == 'cprofile' and SHARED_PROFILER and args.engine == 'threads' and args.threads > 1:
+            print("Note: on Python 3.12+ cProfile mixes up the times of concurrent threads, "
+                  "use --threads 1 or --profile sampling for exact per-function times")
+        profiler = ScanProfiler(args.profile)
+        try:
+            profiler.start()
+        except ValueError as e:
+            print(f"Cannot start profiler: {e}")
+            return 1
+    
     # Запускаем сканирование
     start_time = time.time()
-    results = scanner.scan_network()
+    try:
+        return run_scan(args, scanner, runner, store, jsonl, start_time, output)
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        if profiler is not None:
+            profiler.stop()
+            print_profile(profiler)
+
+def run_scan(args, scanner, runner, store, jsonl, start_time, output):
+    """Выполняет сканирование, печатает итоги и сохраняет отчеты"""
+    # Колоночная таблица находок для разбивки в итогах и экспорта
+    table = None
+    if args.table:
+        table = ResultTable()
+        scanner.sinks.append(table)
+    
+    # Находка выводится цветным блоком, строкой JSON или (--quiet,
+    # --incremental, где печатаются только изменения) не выводится
+    if args.format == 'jsonl':
+        show = output.show
+    elif args.quiet or store is not None:
+        show = None
+    else:
+        show = scanner.print_result
+    
+    if jsonl:
+        found = 0
+        routers = []
+        if args.resume:
+            # Находки прошлых запусков тоже входят в итоги
+            for result in unique_results(read_jsonl(jsonl)):
+                found += 1
+                if result['is_router']:
+                    routers.append(result)
+        
+        # Находки сразу уходят в файл, в памяти остаются только роутеры для итогов
+        sink = JSONLinesSink(jsonl, append=args.resume)
+        scanner.sinks.append(sink)
+        try:
+            with output.scanning(scanner.metrics):
+                for result in runner.iter_scan():
+                    found += 1
+                    if show is not None:
+                        show(result)
+                    if result['is_router']:
+                        routers.append(result)
+        except KeyboardInterrupt:
+            return interrupted(args)
+        finally:
+            sink.close()
+    else:
+        try:
+            with output.scanning(scanner.metrics):
+                if args.format == 'text' and show is not None:
+                    results = runner.scan_network()
+                else:
+                    for result in runner.iter_scan():
+                        scanner.results.append(result)
+                        if show is not None:
+                            show(result)
+                    results = scanner.results
+        except KeyboardInterrupt:
+            return interrupted(args)
+        found = len(results)
+        routers = [r for r in results if r['is_router']]
     elapsed_time = time.time() - start_time
     
     # Выводим итоги
     print("\n" + "=" * 80)
     print("SCAN COMPLETED")
     print(f"Time elapsed: {elapsed_time:.2f} seconds")
-    print(f"Web interfaces found: {len(results)}")
+    print(f"Web interfaces found: {found}")
+    
+    # Время по этапам (обнаружение хостов, сканирование портов)
+    if scanner.stage_timings:
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in scanner.stage_timings.items())
+        print(f"Stage timings: {stages}")
+    
+    # Подобранные контроллером таймаут и параллельность
+    if args.adaptive:
+        summary = scanner.adaptive.summary()
+        print(f"Adaptive timeout: {summary['timeout']:.3f}s (start {summary['initial_timeout']}s, "
+              f"RTT p50 {summary['rtt_p50_ms']} ms, p99 {summary['rtt_p99_ms']} ms, "
+              f"{summary['rtt_samples']} samples)")
+        print(f"Adaptive concurrency: {summary['concurrency']} of {summary['max_concurrency']} "
+              f"(lowest {summary['min_concurrency']}, {summary['backoffs']} backoffs, "
+              f"loss rate {summary['loss_rate']:.1%})")
+    
+    # Попадания в кеш классификации одинаковых страниц
+    if scanner.classify_cache is not None:
+        stats = scanner.classify_cache.stats()
+        if stats['hits'] or stats['misses']:
+            print(f"Classification cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['size']} pages cached")
+        if args.classify_cache:
+            try:
+                scanner.classify_cache.save(args.classify_cache)
+            except OSError as e:
+                print(f"Cannot save classification cache: {e}")
+    
+    # Где ушло время: задержки этапов и ошибки подключений и запросов
+    if args.verbose:
+        print_metrics(scanner.metrics)
+    if args.stats_json:
+        try:
+            save_stats(args.stats_json, scanner, elapsed_time)
+            print(f"Scan statistics saved to {args.stats_json}")
+        except OSError as e:
+            print(f"Cannot save scan statistics: {e}")
+    if table is not None:
+        print_table(table)
+        try:
+            table.save(args.table)
+            print(f"Result table saved to {args.table}")
+        except OSError as e:
+            print(f"Cannot save result table: {e}")
+    
+    if store is not None:
+        try:
+            store.finish(scanner.get_hosts(), scanner.common_ports)
+        except sqlite3.Error as e:
+            print(f"Cannot update store {args.store or DEFAULT_STORE}: {e}")
+        print_changes(store, color=output.color)
+        store.close()
     
     # Показываем роутеры отдельно
-    routers = [r for r in results if r['is_router']]
-    if routers:
-        print(f"\n\033[91mPOSSIBLE ROUTERS/REPEATERS ({len(routers)}):\033[0m")
+    elif routers:
+        red, blue, reset = ('\033[91m', '\033[94m', '\033[0m') if output.color else ('', '', '')
+        print(f"\n{red}POSSIBLE ROUTERS/REPEATERS ({len(routers)}):{reset}")
         for router in routers:
-            print(f"  \033[94m{router['ip']}:{router['port']}\033[0m - {router['title']} ({router['url']})")
+            print(f"  {blue}{router['ip']}:{router['port']}{reset} - {router['title']} ({router['url']})")
     
     # Сохраняем результаты если нужно
-    if args.save or len(results) > 0:
-        scanner.save_results()
+    if args.save or found > 0:
+        if jsonl:
+            scanner.save_results(source=jsonl)
+        else:
+            scanner.save_results()
     
     return 0
 
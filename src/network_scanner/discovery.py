@@ -0,0 +1,291 @@
+"""
+Предварительный поиск живых хостов перед сканированием веб-портов
+
+Большая часть адресов в сети обычно пуста, и проверять на них весь
+список портов дорого. Обнаружение выполняется дешевыми способами:
+чтение ARP-таблицы ядра, ICMP echo (если хватает привилегий) и одна
+TCP-проба на несколько контрольных портов, где ответ RST тоже
+означает, что хост существует. ICMP-запросы и TCP-пробы расходуют тот же
+бюджет пакетов в секунду (ratelimit.RateLimiter), что и сканирование.
+"""
+
+import concurrent.futures
+import itertools
+import os
+import re
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+from .targets import RangeSet, TargetSet, address_to_key
+from .utils import HOST_ALIVE_ERRORS, SUBMIT_AHEAD, connect_many
+
+# Порты для TCP-пробы живости хоста
+SENTINEL_PORTS = [80, 443, 22, 445, 8080]
+
+PROC_ARP_PATH = '/proc/net/arp'
+
+# Флаг ATF_COM в /proc/net/arp - запись ARP разрешена
+ATF_COM = 0x2
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+ARP_OUTPUT_RE = re.compile(
+    r'(\d{1,3}(?:\.\d{1,3}){3})\D+?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})'
+)
+
+
+def parse_proc_arp(text):
+    """Разбирает содержимое /proc/net/arp (Linux)"""
+    hosts = set()
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        try:
+            flags = int(fields[2], 16)
+        except ValueError:
+            continue
+        if flags & ATF_COM and fields[3] != '00:00:00:00:00:00':
+            hosts.add(fields[0])
+    return hosts
+
+
+def parse_arp_output(text):
+    """Разбирает вывод команды arp -a (Windows, macOS, BSD)"""
+    hosts = set()
+    for ip, mac in ARP_OUTPUT_RE.findall(text):
+        mac = mac.lower().replace('-', ':')
+        if mac not in ('ff:ff:ff:ff:ff:ff', '0:0:0:0:0:0', '00:00:00:00:00:00'):
+            hosts.add(ip)
+    return hosts
+
+
+def icmp_checksum(data):
+    """Контрольная сумма ICMP (RFC 1071)"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo_request(identifier, sequence):
+    """Формирует пакет ICMP echo request"""
+    payload = b'network-scanner'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+class HostDiscovery:
+    """Поиск живых хостов в списке адресов"""
+
+    def __init__(self, timeout=1, threads=50, sentinel_ports=None,
+                 use_arp=True, use_icmp=True, use_tcp=True, rate_limiter=None):
+        """
+        Инициализация обнаружения хостов
+
+        Args:
+            timeout (float): Таймаут ожидания ответов в секундах
+            threads (int): Количество потоков для TCP-проб
+            sentinel_ports (list): Порты для TCP-пробы живости
+            use_arp (bool): Использовать ARP-таблицу ядра
+            use_icmp (bool): Использовать ICMP echo
+            use_tcp (bool): Использовать TCP-пробы
+            rate_limiter (RateLimiter): Общий бюджет пакетов в секунду и
+                предел одновременных подключений к хосту
+        """
+        self.timeout = timeout
+        self.threads = threads
+        self.sentinel_ports = list(sentinel_ports or SENTINEL_PORTS)
+        self.use_arp = use_arp
+        self.use_icmp = use_icmp
+        self.use_tcp = use_tcp
+        self.rate_limiter = rate_limiter
+        # Сколько хостов нашел каждый способ
+        self.found_by = {}
+
+    def read_arp_table(self):
+        """Читает ARP/neighbour-таблицу ядра"""
+        if os.path.exists(PROC_ARP_PATH):
+            try:
+                with open(PROC_ARP_PATH, 'r', encoding='ascii', errors='ignore') as f:
+                    return parse_proc_arp(f.read())
+            except OSError:
+                return set()
+
+        try:
+            output = subprocess.run(
+                ['arp', '-a'], capture_output=True, text=True,
+                timeout=5, errors='ignore'
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return set()
+        return parse_arp_output(output)
+
+    def open_icmp_socket(self):
+        """
+        Открывает ICMP-сокет, если позволяют привилегии
+
+        Returns:
+            tuple: (сокет, есть ли IP-заголовок в ответах) или (None, False)
+        """
+        # Непривилегированный ICMP (Linux с ping_group_range, macOS)
+        if sys.platform != 'win32':
+            try:
+                return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+            except OSError:
+                pass
+        try:
+            return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+        except OSError:
+            return None, False
+
+    def icmp_sweep(self, hosts):
+        """
+        Отправляет ICMP echo на все адреса из одного сокета
+
+        Args:
+            hosts (TargetSet | list): Адреса (обходятся один раз, без списка)
+
+        Returns:
+            set: Адреса, ответившие echo reply (пусто без привилегий)
+        """
+        sock, has_ip_header = self.open_icmp_socket()
+        if sock is None:
+            return set()
+
+        wanted = hosts if isinstance(hosts, TargetSet) else set(hosts)
+        alive = set()
+        identifier = os.getpid() & 0xffff
+        expected_id = struct.pack('!H', identifier)
+        try:
+            sock.setblocking(False)
+            limiter = self.rate_limiter
+            for sequence, ip in enumerate(hosts):
+                if limiter is not None:
+                    limiter.wait()
+                packet = build_echo_request(identifier, sequence & 0xffff)
+                # Буфер отправки может переполниться на больших сетях
+                for _ in range(3):
+                    try:
+                        sock.sendto(packet, (ip, 0))
+                        break
+                    except BlockingIOError:
+                        time.sleep(0.001)
+                    except OSError:
+                        break
+
+            deadline = time.monotonic() + self.timeout
+            while len(alive) < len(wanted):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                try:
+                    packet, (source, _) = sock.recvfrom(1024)
+                except (socket.timeout, OSError):
+                    break
+
+                offset = (packet[0] & 0x0f) * 4 if has_ip_header else 0
+                if len(packet) < offset + 8 or packet[offset] != ICMP_ECHO_REPLY or source not in wanted:
+                    continue
+                # RAW-сокет получает и ответы на чужие ping; у DGRAM-сокета
+                # идентификатор подставляет и проверяет ядро
+                if has_ip_header and packet[offset + 4:offset + 6] != expected_id:
+                    continue
+                alive.add(source)
+        finally:
+            sock.close()
+
+        return alive
+
+    def tcp_probe(self, ip):
+        """Проверяет живость хоста одной пробой на контрольные порты"""
+        limiter = self.rate_limiter
+        gate = max_parallel = None
+        if limiter is not None:
+            gate = limiter.wait if limiter.bucket is not None else None
+            max_parallel = limiter.per_host
+        for _, error, _ in connect_many(ip, self.sentinel_ports, self.timeout,
+                                        gate=gate, max_parallel=max_parallel):
+            if error in HOST_ALIVE_ERRORS:
+                return True
+        return False
+
+    def tcp_sweep(self, hosts):
+        """
+        TCP-пробы адресов в пуле потоков
+
+        Адреса берутся из hosts по мере освобождения потоков, поэтому в
+        очереди пула не больше threads * SUBMIT_AHEAD задач.
+
+        Returns:
+            set: Адреса, где хост ответил
+        """
+        hosts = iter(hosts)
+        alive = set()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = {}
+            while True:
+                for ip in itertools.islice(hosts, self.threads * SUBMIT_AHEAD - len(futures)):
+                    futures[executor.submit(self.tcp_probe, ip)] = ip
+                if not futures:
+                    break
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    ip = futures.pop(future)
+                    if future.result():
+                        alive.add(ip)
+        return alive
+
+    def discover(self, hosts):
+        """
+        Находит живые хосты среди адресов
+
+        Адреса не разворачиваются в список строк: ICMP и TCP получают
+        ленивый набор еще не найденных хостов, а найденные хранятся
+        диапазонами.
+
+        Args:
+            hosts (TargetSet | list): Адреса для проверки
+
+        Returns:
+            TargetSet: Живые хосты (обход в порядке адресов)
+        """
+        targets = hosts if isinstance(hosts, TargetSet) else TargetSet([str(ip) for ip in hosts])
+        alive = RangeSet()
+        self.found_by = {}
+
+        def record(method, found):
+            count = 0
+            for ip in found:
+                try:
+                    key = address_to_key(ip)
+                except ValueError:
+                    continue
+                if key in targets.ranges and key not in alive:
+                    alive.add(key)
+                    count += 1
+            self.found_by[method] = self.found_by.get(method, 0) + count
+
+        if self.use_arp:
+            record('arp', self.read_arp_table())
+
+        if self.use_icmp:
+            record('icmp', self.icmp_sweep(targets.without(alive)))
+
+        if self.use_tcp:
+            record('tcp', self.tcp_sweep(targets.without(alive)))
+
+        # Пробы заставили ядро разрешить ARP для соседей в локальном сегменте,
+        # поэтому таблица теперь содержит и хосты, молча отбросившие пакеты
+        if self.use_arp and (self.use_icmp or self.use_tcp):
+            record('arp', self.read_arp_table())
+
+        return TargetSet.from_ranges(alive)
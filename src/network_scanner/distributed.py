@@ -0,0 +1,449 @@
+"""
+Распределенное сканирование: координатор и рабочие узлы
+
+Координатор делит цели на порции (единицы работы) и выдает их в аренду
+рабочим узлам (`network-scanner worker HOST:PORT`), которые подключаются
+к нему по TCP. Обмен идет строками JSON, по одному сообщению на строку:
+
+    узел -> координатор
+        {"type": "hello", "worker": имя, "token": токен}
+                                                 первое сообщение
+        {"type": "lease"}                        запрос единицы работы
+        {"type": "result", "unit": id, "result": {...}}
+        {"type": "done", "unit": id, "metrics": {...}}
+                                                 единица просканирована
+        {"type": "heartbeat"}                    продление аренды
+    координатор -> узел
+        {"type": "settings", "settings": {...}, "heartbeat": секунды}
+                                                 ответ на hello
+        {"type": "error", "error": текст}        неверный токен, соединение закрывается
+        {"type": "unit", "unit": id, "network": цели}
+        {"type": "wait", "retry": секунды}       свободных единиц пока нет
+        {"type": "shutdown"}                     работы больше не будет
+
+Находки единицы копятся у координатора до сообщения done и только
+потом выдаются, поэтому единица, переданная другому узлу после обрыва
+связи или истечения аренды, не дает повторов.
+
+Если координатору задан общий токен, узел без того же токена в hello
+не получает ни настроек, ни целей.
+"""
+
+import collections
+import contextlib
+import hmac
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+
+from .async_scanner import AsyncNetworkScanner
+from .models import ScanResult, as_dict
+from .parallel import CHUNK_SIZE, chunk_network, iter_chunks, load_targets
+from .ratelimit import RateLimiter
+from .scanner import NetworkScanner
+
+# Порт координатора по умолчанию
+DEFAULT_PORT = 7878
+
+# Через сколько секунд без вестей от узла его аренда передается другому
+LEASE_TIMEOUT = 60.0
+
+# Переменная окружения с общим токеном координатора и узлов
+TOKEN_ENV = 'NETWORK_SCANNER_TOKEN'
+
+# Настройки сканирования, которые координатор передает узлам
+WORKER_SETTINGS = (
+    'timeout', 'threads', 'concurrency', 'common_ports', 'discovery',
+    'body_budget', 'max_body_bytes', 'favicon',
+)
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    """
+    Разбирает адрес координатора вида HOST:PORT, HOST или :PORT
+
+    Returns:
+        tuple: (хост, порт)
+    """
+    host, _, port = address.rpartition(':') if ':' in address else (address, '', '')
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+
+class Connection:
+    """Соединение, передающее сообщения строками JSON"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.rfile = sock.makefile('rb')
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        """Отправляет сообщение (можно из нескольких потоков)"""
+        data = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self.sock.sendall(data)
+
+    def receive(self):
+        """
+        Принимает сообщение
+
+        Returns:
+            dict: Сообщение или None, если соединение закрыто
+
+        Raises:
+            ValueError: Строка не JSON или не объект JSON
+        """
+        line = self.rfile.readline()
+        if not line:
+            return None
+        message = json.loads(line)
+        if not isinstance(message, dict):
+            raise ValueError(f"Сообщение должно быть объектом JSON: {line[:80]!r}")
+        return message
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+Lease = collections.namedtuple('Lease', 'chunk worker deadline')
+
+
+class Coordinator:
+    """
+    Раздает цели сканера рабочим узлам и собирает их находки
+
+    Цели, порты, приемники и контрольная точка берутся из переданного
+    сканера, сам он ничего не сканирует. Единица работы передается
+    другому узлу, если арендовавший узел отключился или не подавал
+    вестей дольше lease_timeout секунд. Если задан token, узел должен
+    прислать его в hello, иначе соединение закрывается.
+    """
+
+    def __init__(self, scanner, host='127.0.0.1', port=DEFAULT_PORT, unit_size=CHUNK_SIZE,
+                 lease_timeout=LEASE_TIMEOUT, token=None):
+        """
+        Args:
+            scanner (NetworkScanner): Настроенный сканер
+            host (str): Адрес, на котором ждать узлы
+            port (int): Порт (0 - любой свободный, см. address)
+            unit_size (int): Наибольшее число адресов в единице работы
+            lease_timeout (float): Срок аренды без вестей от узла, в секундах
+            token (str): Общий токен узлов (None - принимать любой узел)
+        """
+        self.scanner = scanner
+        self.token = token
+        self.unit_size = unit_size
+        self.lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        # Единицы появляются с началом сканирования (iter_scan)
+        self._units = None
+        self._next_id = 0
+        self._requeued = collections.deque()
+        self._leases = {}
+        self._events = queue.Queue()
+        self._connections = set()
+        self._server = self._create_server(host, port)
+        self._thread = None
+
+    @property
+    def address(self):
+        """Адрес (хост, порт), на котором координатор ждет узлы"""
+        return self._server.server_address[:2]
+
+    def _create_server(self, host, port):
+        coordinator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator.serve(Connection(self.request), '%s:%s' % self.client_address[:2])
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        return Server((host, port), Handler)
+
+    def start(self):
+        """Начинает принимать узлы в фоновом потоке"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Останавливает прием узлов и закрывает их соединения"""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            with contextlib.suppress(OSError):
+                connection.sock.shutdown(socket.SHUT_RDWR)
+
+    def worker_settings(self):
+        """Настройки сканирования для узлов"""
+        settings = {name: getattr(self.scanner, name) for name in WORKER_SETTINGS if hasattr(self.scanner, name)}
+        settings['engine'] = 'asyncio' if hasattr(self.scanner, 'concurrency') else 'threads'
+        # Предел скорости действует на каждом узле: узлы сканируют из разных мест сети
+        limiter = getattr(self.scanner, 'rate_limiter', None)
+        if limiter is not None:
+            settings['rate_limit'] = {'rate': limiter.rate, 'per_host': limiter.per_host}
+        return settings
+
+    def serve(self, connection, peer):
+        """Обслуживает одно соединение узла"""
+        with self._lock:
+            self._connections.add(connection)
+        worker = peer
+        # Находки по единицам, которые узел еще не завершил
+        found = collections.defaultdict(list)
+        authorized = False
+        try:
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'hello':
+                    if not self.authorize(message.get('token')):
+                        connection.send({'type': 'error', 'error': 'invalid token'})
+                        break
+                    authorized = True
+                    worker = f"{message.get('worker') or 'worker'}@{peer}"
+                    connection.send({'type': 'settings', 'settings': self.worker_settings(),
+                                     'heartbeat': self.lease_timeout / 3})
+                elif not authorized:
+                    # До hello с верным токеном узел ничего не получает
+                    break
+                elif kind == 'lease':
+                    connection.send(self.lease(worker))
+                elif kind == 'result':
+                    found[message['unit']].append(ScanResult.from_dict(message['result']))
+                    self.renew(worker)
+                elif kind == 'done':
+                    self.complete(worker, message['unit'], found.pop(message['unit'], []),
+                                  message.get('metrics'))
+                elif kind == 'heartbeat':
+                    self.renew(worker)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            self.release(worker)
+            with self._lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def authorize(self, token):
+        """Проверяет токен из hello"""
+        if self.token is None:
+            return True
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def lease(self, worker):
+        """Выдает узлу единицу работы"""
+        with self._lock:
+            if self._units is None:
+                return {'type': 'wait', 'retry': 1.0}
+            self._expire()
+            if self._requeued:
+                unit, chunk = self._requeued.popleft()
+            else:
+                chunk = next(self._units, None)
+                if chunk is None:
+                    if self._leases:
+                        # Единицы еще могут вернуться от отвалившихся узлов
+                        return {'type': 'wait', 'retry': 1.0}
+                    return {'type': 'shutdown'}
+                unit = self._next_id
+                self._next_id += 1
+            self._leases[unit] = Lease(chunk, worker, time.monotonic() + self.lease_timeout)
+        return {'type': 'unit', 'unit': unit, 'network': chunk_network(chunk)}
+
+    def renew(self, worker):
+        """Продлевает аренды узла"""
+        deadline = time.monotonic() + self.lease_timeout
+        with self._lock:
+            for unit, lease in self._leases.items():
+                if lease.worker == worker:
+                    self._leases[unit] = lease._replace(deadline=deadline)
+
+    def complete(self, worker, unit, results, metrics=None):
+        """Принимает завершенную единицу; ответ узла, потерявшего аренду, отбрасывается"""
+        with self._lock:
+            lease = self._leases.get(unit)
+            if lease is None or lease.worker != worker:
+                return
+            del self._leases[unit]
+        if metrics:
+            self.scanner.metrics.merge(metrics)
+        self._events.put((lease.chunk, results))
+
+    def release(self, worker):
+        """Возвращает в очередь единицы отключившегося узла"""
+        with self._lock:
+            for unit, lease in list(self._leases.items()):
+                if lease.worker == worker:
+                    del self._leases[unit]
+                    self._requeued.append((unit, lease.chunk))
+
+    def _expire(self):
+        """Возвращает в очередь единицы с истекшей арендой (вызывается под блокировкой)"""
+        now = time.monotonic()
+        for unit, lease in list(self._leases.items()):
+            if lease.deadline < now:
+                del self._leases[unit]
+                self._requeued.append((unit, lease.chunk))
+
+    def iter_scan(self):
+        """
+        Раздает цели узлам, отдавая находки по мере завершения единиц работы
+
+        Находки записываются в приемники сканера до выдачи, единица
+        отмечается в контрольной точке после получения всех ее находок.
+
+        Yields:
+            dict: Найденный веб-интерфейс
+        """
+        scanner = self.scanner
+        checkpoint = scanner.checkpoint
+        host, port = self.address
+        targets = load_targets(scanner, f"координатор {host}:{port}")
+        total = len(targets) if targets is not None else 0
+        if not total:
+            return
+
+        with self._lock:
+            self._units = iter_chunks(targets.ranges, self.unit_size)
+        self.start()
+
+        start_time = time.time()
+        completed = 0
+        next_report = step = max(1, total // 10)
+        finished = False
+        try:
+            while completed < total:
+                try:
+                    chunk, results = self._events.get(timeout=1.0)
+                except queue.Empty:
+                    # Аренды узлов, переставших отвечать, истекают и без новых запросов
+                    with self._lock:
+                        self._expire()
+                    continue
+
+                for result in results:
+                    scanner.emit(result)
+                    yield result
+                completed += sum(end - start + 1 for start, end in chunk)
+                if checkpoint is not None:
+                    checkpoint.mark_runs(chunk)
+                # Прогресс каждые 10%
+                if completed >= next_report:
+                    next_report = (completed // step + 1) * step
+                    progress = (completed / total) * 100
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Прогресс: {progress:.1f}% ({completed}/{total})")
+            finished = True
+        finally:
+            self.close()
+            scanner.stage_timings['port_scan'] = time.time() - start_time
+            if checkpoint is not None:
+                checkpoint.flush(finished=finished)
+
+    def scan_network(self):
+        """Раздает цели узлам, собирая находки в self.scanner.results"""
+        for result in self.iter_scan():
+            self.scanner.results.append(result)
+            self.scanner.print_result(result)
+        return self.scanner.results
+
+
+def create_worker_scanner(settings, fingerprints=None):
+    """
+    Сканер узла с настройками координатора
+
+    Применяются только настройки из WORKER_SETTINGS, прочие ключи
+    игнорируются.
+    """
+    scanner_class = AsyncNetworkScanner if settings.get('engine', 'threads') == 'asyncio' else NetworkScanner
+    rate_limit = settings.get('rate_limit')
+    scanner = scanner_class()
+    if rate_limit:
+        scanner.rate_limiter = RateLimiter(rate_limit.get('rate'), rate_limit.get('per_host'))
+    for name in WORKER_SETTINGS:
+        if name in settings:
+            setattr(scanner, name, settings[name])
+    if fingerprints:
+        scanner.load_fingerprints(fingerprints)
+    return scanner
+
+
+def run_worker(address, name=None, fingerprints=None, connect_timeout=10.0, token=None):
+    """
+    Рабочий узел: берет единицы работы у координатора, пока тот не скажет shutdown
+
+    Args:
+        address (tuple): (хост, порт) координатора
+        name (str): Имя узла в сообщениях координатора
+        fingerprints (str): Своя база отпечатков
+        connect_timeout (float): Таймаут подключения в секундах
+        token (str): Общий токен координатора
+
+    Returns:
+        int: Число просканированных единиц
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    sock = socket.create_connection(address, timeout=connect_timeout)
+    sock.settimeout(None)
+    connection = Connection(sock)
+    units = 0
+    stop = threading.Event()
+    try:
+        connection.send({'type': 'hello', 'worker': name, 'token': token})
+        message = connection.receive()
+        if message is not None and message.get('type') == 'error':
+            print(f"Координатор отклонил узел: {message.get('error')}")
+            return units
+        if message is None or message.get('type') != 'settings':
+            return units
+        scanner = create_worker_scanner(message['settings'], fingerprints)
+        interval = message.get('heartbeat', LEASE_TIMEOUT / 3)
+
+        def heartbeat():
+            # Продлеваем аренду, пока единица сканируется без находок
+            while not stop.wait(interval):
+                with contextlib.suppress(OSError):
+                    connection.send({'type': 'heartbeat'})
+
+        threading.Thread(target=heartbeat, daemon=True).start()
+
+        while True:
+            connection.send({'type': 'lease'})
+            message = connection.receive()
+            if message is None or message['type'] == 'shutdown':
+                break
+            if message['type'] == 'wait':
+                time.sleep(message.get('retry', 1.0))
+                continue
+
+            unit = message['unit']
+            scanner.network = message['network']
+            found = 0
+            # Подробный вывод сканера по каждой единице не нужен
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                for result in scanner.iter_scan():
+                    connection.send({'type': 'result', 'unit': unit, 'result': as_dict(result)})
+                    found += 1
+            connection.send({'type': 'done', 'unit': unit, 'metrics': scanner.metrics.take()})
+            units += 1
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Единица {unit}: {message['network']}, "
+                  f"найдено {found}")
+    except (OSError, ValueError) as e:
+        print(f"Соединение с координатором потеряно: {e}")
+    finally:
+        stop.set()
+        connection.close()
+    return units
@@ -0,0 +1,297 @@
+"""
+Определение кодировки страницы по байтам
+
+Вместо пробного декодирования всего тела в десяток кодировок кодировка
+определяется по ограниченному началу страницы: BOM, <meta charset> в
+первых килобайтах, проверка UTF-8 и один проход статистики по старшим
+байтам, который выбирает семейство (однобайтовые кириллица/латиница или
+двухбайтовые CJK). Пробное декодирование остается только для проверки
+кандидатов внутри семейства CJK.
+"""
+
+import codecs
+import re
+
+# Где искать BOM и <meta charset>
+SNIFF_BYTES = 4096
+
+# Сколько байт начала страницы проверяется декодированием
+SAMPLE_BYTES = 16 * 1024
+
+# Сколько байт начала страницы участвует в статистике
+STATS_BYTES = 4096
+
+# Кодировка по умолчанию, когда определить не удалось
+DEFAULT_ENCODING = 'utf-8'
+
+HIGH_BYTE_RE = re.compile(rb'[\x80-\xff]')
+META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+# Имена, которые браузеры трактуют как более широкую кодировку
+CHARSET_ALIASES = {
+    'utf8': 'utf-8',
+    'gb2312': 'gbk',
+    'x-gbk': 'gbk',
+    'x-sjis': 'shift-jis',
+}
+
+# Кандидаты семейства CJK в порядке по умолчанию
+CJK_ENCODINGS = ['gbk', 'gb18030', 'big5', 'shift-jis', 'euc-jp']
+
+
+def byte_range(first, last):
+    """Набор байтов first..last"""
+    return bytes(range(first, last + 1))
+
+
+# Классы байтов для статистики: H - старший байт, T - ASCII-байт, который
+# может быть вторым байтом символа Big5/GBK/Shift-JIS, L - прочие
+CLASS_TABLE = bytes(
+    ord('H') if byte >= 0x80 else ord('T') if 0x40 <= byte <= 0x7e else ord('L')
+    for byte in range(256)
+)
+
+SJIS_BYTES = byte_range(0x81, 0x9f)
+EUC_KANA_BYTES = b'\xa4\xa5'
+CP866_LETTERS = byte_range(0x80, 0xaf) + byte_range(0xe0, 0xef)
+BOX_DRAWING = byte_range(0xb0, 0xdf)
+CP1251_TAIL = byte_range(0xf0, 0xff)
+
+
+def count_bytes(data, byteset):
+    """Сколько байтов data входит в набор byteset (за один проход на C)"""
+    return len(data) - len(data.translate(None, byteset))
+
+
+def normalize_charset(name):
+    """
+    Приводит имя кодировки к стандартному виду
+
+    Returns:
+        str: Имя кодировки или None, если Python ее не знает
+    """
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    name = name.strip().lower()
+    name = CHARSET_ALIASES.get(name, name)
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        return None
+    return name
+
+
+def sniff_bom(data):
+    """Кодировка по BOM; UTF-16 - только если после BOM есть данные"""
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if data.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)) and len(data) > 4:
+        return 'utf-32'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)) and len(data) > 2:
+        return 'utf-16'
+    return None
+
+
+def sniff_meta_charset(data):
+    """Кодировка из <meta charset> или <meta http-equiv> в начале страницы"""
+    match = META_CHARSET_RE.search(data[:SNIFF_BYTES])
+    if match:
+        return normalize_charset(match.group(1))
+    return None
+
+
+def decodes_cleanly(sample, encoding, truncated):
+    """
+    Декодируется ли образец без ошибок
+
+    Если образец обрезан, незаконченный многобайтовый символ в конце
+    ошибкой не считается.
+    """
+    try:
+        codecs.getincrementaldecoder(encoding)('strict').decode(sample, final=not truncated)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class ByteStatistics:
+    """
+    Статистика старших байтов образца
+
+    Считается только встроенными операциями над bytes (translate и
+    count), без цикла Python по байтам.
+    """
+
+    def __init__(self, sample):
+        classes = sample.translate(CLASS_TABLE)
+        starts_high = classes[:1] == b'H'
+        self.sample = sample
+        self.high = classes.count(b'H')
+        # Серии старших байтов и серии длиннее одного байта
+        self.runs = classes.count(b'LH') + classes.count(b'TH') + starts_high
+        self.long_runs = classes.count(b'LHH') + classes.count(b'THH') + (classes[:2] == b'HH')
+        # Старший байт, за которым идет возможный ASCII-хвост двухбайтового символа
+        self.ascii_trails = classes.count(b'HT')
+
+    def share(self, byteset):
+        """Доля старших байтов образца, входящих в набор"""
+        return count_bytes(self.sample, byteset) / self.high
+
+    def cjk_candidates(self):
+        """Порядок проверки кодировок CJK по распределению байтов"""
+        candidates = list(CJK_ENCODINGS)
+
+        def promote(encoding):
+            candidates.remove(encoding)
+            candidates.insert(0, encoding)
+
+        # Вторые байты в ASCII-диапазоне характерны для Big5
+        if self.ascii_trails * 10 > self.high:
+            promote('big5')
+        # Хирагана и катакана EUC-JP начинаются с 0xA4/0xA5
+        if self.share(EUC_KANA_BYTES) > 0.15:
+            promote('euc-jp')
+        # Байты 0x81-0x9F почти не встречаются в GB2312 и Big5, зато обычны в Shift-JIS
+        if self.share(SJIS_BYTES) > 0.15:
+            promote('shift-jis')
+        return candidates
+
+    def single_byte_encoding(self):
+        """Однобайтовая кириллица по распределению старших байтов"""
+        # В ISO-8859-5 буквы р-я лежат ниже 0xF0, в windows-1251 - выше
+        if self.share(CP1251_TAIL) < 0.02 and self.share(BOX_DRAWING) > 0.3:
+            return 'iso-8859-5'
+        return 'windows-1251'
+
+
+def detect_charset(data):
+    """
+    Определяет кодировку тела страницы
+
+    Args:
+        data (bytes): Тело ответа (достаточно начала)
+
+    Returns:
+        str: Имя кодировки
+    """
+    if not data:
+        return DEFAULT_ENCODING
+
+    encoding = sniff_bom(data) or sniff_meta_charset(data)
+    if encoding:
+        return encoding
+
+    sample = data[:SAMPLE_BYTES]
+    if sample.isascii():
+        return DEFAULT_ENCODING
+
+    truncated = len(data) > SAMPLE_BYTES
+    if decodes_cleanly(sample, 'utf-8', truncated):
+        return 'utf-8'
+
+    # Статистика собирается с первого старшего байта: обычно до него идет
+    # ASCII-разметка <head>
+    first = HIGH_BYTE_RE.search(sample).start()
+    stats = ByteStatistics(sample[first:first + STATS_BYTES])
+
+    # Отдельные символы среди латиницы - западноевропейский текст
+    if (stats.runs - stats.long_runs) * 2 > stats.runs:
+        return 'iso-8859-1'
+
+    # Кириллица DOS: буквы в 0x80-0xAF и 0xE0-0xEF, псевдографика почти не встречается.
+    # Проверяется до CJK: такие байты декодируются и как Shift-JIS
+    if stats.share(CP866_LETTERS) > 0.9 and stats.share(BOX_DRAWING) < 0.02:
+        return 'cp866'
+
+    # Двухбайтовые кодировки проверяются строгим декодированием образца; у
+    # однобайтового текста оно обычно обрывается на первом слове нечетной длины
+    for encoding in stats.cjk_candidates():
+        if decodes_cleanly(sample, encoding, truncated):
+            return encoding
+
+    return stats.single_byte_encoding()
+
+
+def cp1252_char_bytes():
+    """Символ -> байт для текста, декодированного как windows-1252/latin-1"""
+    table = {byte: byte for byte in range(0x80, 0x100)}
+    for byte in range(0x80, 0xa0):
+        try:
+            table[ord(bytes([byte]).decode('cp1252'))] = byte
+        except UnicodeDecodeError:
+            # Неопределенные в cp1252 байты браузеры показывают как C1-символы
+            pass
+    return table
+
+
+# str.translate-таблица обратно в байты (через latin-1) для испорченных фрагментов
+MOJIBAKE_TO_LATIN1 = {char: chr(byte) for char, byte in cp1252_char_bytes().items()}
+
+
+def char_class(codes):
+    """Класс регулярного выражения из набора кодов символов"""
+    return '[' + ''.join(re.escape(chr(code)) for code in sorted(codes)) + ']'
+
+
+_continuation = char_class(
+    char for char, byte in cp1252_char_bytes().items() if 0x80 <= byte <= 0xbf
+)
+
+# Известные испорченные строки, где часть байтов потеряна безвозвратно
+# (непечатаемые C1-символы выброшены) и перекодирование невозможно
+LOSSY_MOJIBAKE = {
+    'å°ç±³è·¯ç±å¨': '小米路由器',
+}
+
+# Одно выражение на все случаи: известные строки или серии символов,
+# образующих корректные последовательности UTF-8, прочитанные как cp1252
+MOJIBAKE_RE = re.compile(
+    '(?P<known>' + '|'.join(re.escape(key) for key in LOSSY_MOJIBAKE) + ')'
+    '|(?P<run>(?:'
+    f'[Â-ß]{_continuation}'
+    f'|[à-ï]{_continuation}{{2}}'
+    f'|[ð-ô]{_continuation}{{3}}'
+    ')+)'
+)
+
+# Остатки кракозябр после исправления: ведущий символ UTF-8 перед продолжением
+MOJIBAKE_HINT_RE = re.compile(f'[Â-ô]{_continuation}')
+
+
+def repair_mojibake(text):
+    """
+    Исправляет UTF-8, прочитанный как windows-1252/latin-1, за один проход
+
+    Перекодируются только фрагменты, похожие на такие последовательности;
+    остальной текст не трогается.
+
+    Args:
+        text (str): Текст, возможно с кракозябрами
+
+    Returns:
+        tuple: (исправленный текст, уверенность 0..1 что кракозябр в нем нет)
+    """
+    if not text or text.isascii():
+        return text, 1.0
+
+    repaired = 0
+
+    def replace(match):
+        nonlocal repaired
+        known = match.group('known')
+        if known:
+            repaired += 1
+            return LOSSY_MOJIBAKE[known]
+        span = match.group('run')
+        try:
+            fixed = span.translate(MOJIBAKE_TO_LATIN1).encode('latin-1').decode('utf-8')
+        except UnicodeError:
+            return span
+        repaired += 1
+        return fixed
+
+    text = MOJIBAKE_RE.sub(replace, text)
+    if MOJIBAKE_HINT_RE.search(text) is None:
+        return text, 1.0
+    remaining = len(MOJIBAKE_HINT_RE.findall(text))
+    return text, repaired / (repaired + remaining)
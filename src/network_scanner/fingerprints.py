@@ -0,0 +1,541 @@
+"""
+Предкомпилированные правила определения типа устройства
+
+Правила хранятся в базе отпечатков (data/fingerprints.json или свой
+файл JSON/YAML): ключевые слова типов устройств, производители, признаки
+роутеров и сигнатуры по заголовку страницы, заголовку Server, телу и
+хешу favicon. Все слова собираются в один автомат Ахо-Корасик
+(pyahocorasick), поэтому текст страницы просматривается за один проход.
+Если pyahocorasick не собирается под платформу, работает запасной
+движок - регулярное выражение в виде префиксного дерева; он заметно
+медленнее автомата. Разобранная своя база и таблицы запасного движка
+кешируются на диске в JSON.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import ahocorasick
+except ImportError:  # Зависимость пакета; без нее работает запасной движок regex
+    ahocorasick = None
+
+# Сколько символов страницы анализируется вместе с заголовком
+ANALYSIS_WINDOW = 1000
+
+# Встроенная база отпечатков
+DEFAULT_DATABASE = Path(__file__).parent / 'data' / 'fingerprints.json'
+
+# Версия формата кеша; меняется вместе со структурой таблиц regex_tables
+CACHE_FORMAT = 3
+
+# Поля сигнатур и порядок их проверки
+SIGNATURE_FIELDS = ('title', 'server', 'body', 'favicon')
+
+FORM_RE = re.compile(r'<form', re.IGNORECASE)
+LOGIN_FIELD_RE = re.compile(r'password|username|login', re.IGNORECASE)
+SERVER_VERSION_RE = re.compile(r'/\S*')
+SERVER_PART_RE = re.compile(r'[;,]')
+
+
+def load_database(path=None):
+    """
+    Загружает базу отпечатков из файла JSON или YAML
+
+    Args:
+        path (str): Путь к файлу (по умолчанию встроенная база)
+
+    Returns:
+        dict: Правила базы
+    """
+    path = Path(path or DEFAULT_DATABASE)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Для баз отпечатков в YAML нужен пакет PyYAML")
+        database = yaml.safe_load(text)
+    else:
+        database = json.loads(text)
+
+    if not isinstance(database, dict) or 'device_types' not in database:
+        raise ValueError(f"{path}: не похоже на базу отпечатков (нет раздела device_types)")
+    for signature in database.get('signatures', []):
+        if 'name' not in signature:
+            raise ValueError(f"{path}: у сигнатуры нет имени: {signature}")
+    return database
+
+
+def default_cache_dir():
+    """Каталог кеша скомпилированных баз (XDG_CACHE_HOME, LOCALAPPDATA или ~/.cache)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'network-scanner'
+
+
+def is_private(path):
+    """
+    Принадлежит ли файл или каталог текущему пользователю и закрыт ли он
+    для записи остальным
+
+    Кеш из чужого каталога не читается: под sudo XDG_CACHE_HOME может
+    указывать в каталог обычного пользователя.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    stat = os.stat(path)
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+def favicon_hash(content):
+    """Хеш favicon для сигнатур базы (MD5 в hex)"""
+    return hashlib.md5(content).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def server_keys(server):
+    """
+    Ключи для поиска по заголовку Server в индексе сигнатур
+
+    Заголовок целиком, его части через ';' без версий и названия продуктов:
+    'HP HTTP Server; HP LaserJet' -> 'hp http server', 'hp laserjet', 'hp', 'http', ...
+    Значения Server в сети сильно повторяются, поэтому результат кешируется.
+    """
+    server = server.lower().strip()
+    keys = {server}
+    for part in SERVER_PART_RE.split(server):
+        keys.add(part.strip())
+        keys.add(SERVER_VERSION_RE.sub('', part).strip())
+        keys.update(token.split('/', 1)[0] for token in part.split())
+    keys.discard('')
+    return frozenset(keys)
+
+
+def build_trie_pattern(words):
+    """
+    Строит регулярное выражение-префиксное дерево для набора слов
+
+    Общие префиксы выносятся за скобки (admin|admin panel -> admin(?: panel)?),
+    поэтому в каждой позиции текста проверяется не каждое слово, а только
+    ветка по первому символу; в каждой позиции находится самое длинное слово.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+def regex_tables(keywords):
+    """
+    Таблицы запасного движка regex (в виде, пригодном для JSON)
+
+    Returns:
+        dict: pattern - выражение-дерево, implied - слова, входящие в слово
+            подстрокой, overlaps - слова, которые могут начаться внутри
+            совпадения и выйти за его конец
+    """
+    implied = {
+        keyword: sorted(other for other in keywords if other in keyword)
+        for keyword in keywords
+    }
+    overlaps = {
+        keyword: sorted(
+            other for other in keywords
+            if other not in implied[keyword]
+            and any(other.startswith(keyword[i:]) for i in range(1, len(keyword)))
+        )
+        for keyword in keywords
+    }
+    return {'pattern': build_trie_pattern(keywords), 'implied': implied, 'overlaps': overlaps}
+
+
+class FingerprintMatcher:
+    """
+    Классификатор устройств по одному проходу по тексту
+
+    Основной движок - автомат Ахо-Корасик, он сразу находит все вхождения,
+    включая перекрывающиеся, и в разы быстрее исходных проверок. Без
+    pyahocorasick используется запасное регулярное выражение-дерево (на
+    CPython оно не быстрее проверок `kw in text`): в каждой позиции оно
+    находит самое длинное слово, ключевые слова внутри него (print в
+    printer) добавляются по заранее посчитанной таблице, а слова, которые
+    могут начинаться внутри совпадения и выходить за него, проверяются
+    отдельно. В обоих случаях
+    набор найденных слов совпадает с набором проверок `kw in text`.
+
+    Сигнатуры базы индексируются: слова заголовка и тела - через тот же
+    автомат (слово -> сигнатуры), значения Server и хеши favicon - через
+    словари, поэтому проверка не зависит от числа сигнатур.
+    """
+
+    def __init__(self, database=None, backend=None, tables=None):
+        """
+        Args:
+            database (dict): Правила базы отпечатков (по умолчанию встроенная база)
+            backend (str): 'aho-corasick' или 'regex'; по умолчанию лучший доступный
+            tables (dict): Готовые regex_tables этой базы (из дискового кеша)
+        """
+        database = database or load_database()
+        # Отпечаток правил: результаты классификации с другой базой не переиспользуются
+        self.digest = hashlib.sha256(
+            json.dumps(database, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:16]
+        self.device_types = database['device_types']
+        self.manufacturers = database.get('manufacturers', {})
+        router = database.get('router', {})
+        self.router_only_brands = [brand.lower() for brand in router.get('only_brands', [])]
+        self.router_markers = [marker.lower() for marker in router.get('markers', [])]
+        self.router_signs = [(first.lower(), second.lower()) for first, second in router.get('signs', [])]
+        self.brand_words = {
+            brand: [word.lower() for word in words]
+            for brand, words in router.get('brand_words', {}).items()
+        }
+        self.router_identifiers = list(router.get('identifiers', []))
+        self.signatures = database.get('signatures', [])
+
+        keywords = set(self.router_markers)
+        for rules in self.device_types.values():
+            keywords.update(rules['keywords'])
+            for pair in rules.get('signs', []):
+                keywords.update(pair)
+        for brand_keywords in self.manufacturers.values():
+            keywords.update(brand_keywords)
+        for words in self.brand_words.values():
+            keywords.update(words)
+        for pair in self.router_signs:
+            keywords.update(pair)
+
+        # Индексы сигнатур: слово -> (сигнатура, поле); Server и favicon -> сигнатуры
+        self.signature_words = {}
+        self.server_index = {}
+        self.favicon_index = {}
+        for number, signature in enumerate(self.signatures):
+            for field in ('title', 'body'):
+                for word in signature.get(field, []):
+                    word = word.lower()
+                    keywords.add(word)
+                    self.signature_words.setdefault(word, []).append((number, field))
+            for value in signature.get('server', []):
+                self.server_index.setdefault(value.lower(), []).append(number)
+            for value in signature.get('favicon', []):
+                self.favicon_index.setdefault(value.lower(), []).append(number)
+
+        keywords = {keyword.lower() for keyword in keywords}
+        self.keywords = frozenset(keywords)
+
+        self.backend = backend or ('aho-corasick' if ahocorasick is not None else 'regex')
+        self.automaton = None
+        self.tables = None
+        if self.backend == 'aho-corasick':
+            if ahocorasick is None:
+                raise ImportError("Для backend='aho-corasick' нужен пакет pyahocorasick")
+            self.automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self.automaton.add_word(keyword, keyword)
+            self.automaton.make_automaton()
+        else:
+            self.tables = tables or regex_tables(keywords)
+            self.pattern = re.compile(self.tables['pattern'])
+            self.implied = {keyword: frozenset(words) for keyword, words in self.tables['implied'].items()}
+            self.overlaps = {keyword: tuple(words) for keyword, words in self.tables['overlaps'].items()}
+
+        # Индексы: слово -> типы устройств и производители, где оно встречается
+        self.keyword_types = {}
+        self.sign_index = {}
+        for device_type, rules in self.device_types.items():
+            for keyword in rules['keywords']:
+                self.keyword_types.setdefault(keyword.lower(), []).append(device_type)
+            for first, second in rules.get('signs', []):
+                self.sign_index.setdefault(first.lower(), []).append((device_type, second.lower()))
+
+        self.keyword_brands = {}
+        self.brand_order = {brand: number for number, brand in enumerate(self.manufacturers)}
+        for brand, brand_keywords in self.manufacturers.items():
+            for keyword in brand_keywords:
+                self.keyword_brands.setdefault(keyword.lower(), []).append(brand)
+
+    @classmethod
+    def load(cls, path=None, backend=None, cache_dir=None):
+        """
+        Загружает классификатор из базы, используя кеш на диске
+
+        В кеше (JSON, не исполняемый формат) лежат разобранная база и
+        таблицы движка regex. Ключ кеша - хеш содержимого базы, движок и
+        версия формата, поэтому изменение файла автоматически приводит к
+        перекомпиляции. Каталог кеша создается с правами 0700, кеш чужого
+        или открытого на запись каталога не читается и не пишется.
+
+        Args:
+            path (str): Путь к базе (по умолчанию встроенная)
+            backend (str): Движок поиска
+            cache_dir (str): Каталог кеша; False - не использовать кеш
+
+        Returns:
+            FingerprintMatcher: Готовый классификатор
+        """
+        path = Path(path or DEFAULT_DATABASE)
+        backend = backend or ('aho-corasick' if ahocorasick is not None else 'regex')
+        if cache_dir is False:
+            return cls(load_database(path), backend=backend)
+
+        key = hashlib.sha256(path.read_bytes())
+        key.update(f"{CACHE_FORMAT}:{backend}".encode())
+        cache_path = Path(cache_dir or default_cache_dir()) / f"fingerprints-{key.hexdigest()[:24]}.json"
+
+        try:
+            if is_private(cache_path.parent) and is_private(cache_path):
+                cached = json.loads(cache_path.read_text(encoding='utf-8'))
+                if cached.get('format') == CACHE_FORMAT:
+                    return cls(cached['database'], backend=backend, tables=cached['tables'])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Нет кеша или он поврежден - компилируем заново
+            pass
+
+        database = load_database(path)
+        matcher = cls(database, backend=backend)
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if not is_private(cache_path.parent):
+                return matcher
+            # Пишем во временный файл (mkstemp создает его с правами 0600) и
+            # переименовываем, чтобы параллельные процессы не прочитали кеш наполовину
+            fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'format': CACHE_FORMAT, 'database': database, 'tables': matcher.tables},
+                              f, ensure_ascii=False)
+                os.replace(temp_path, cache_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except Exception:
+            # Кеш - только ускорение, без него все работает
+            pass
+        return matcher
+
+    def scan(self, text):
+        """
+        Находит все ключевые слова в тексте за один проход
+
+        Args:
+            text (str): Текст в нижнем регистре
+
+        Returns:
+            set: Найденные ключевые слова
+        """
+        if self.automaton is not None:
+            return {keyword for _, keyword in self.automaton.iter(text)}
+
+        hits = set()
+        for match in set(self.pattern.findall(text)):
+            hits |= self.implied[match]
+            for other in self.overlaps[match]:
+                if other not in hits and other in text:
+                    hits.add(other)
+        return hits
+
+    def score_device_types(self, hits, server=""):
+        """
+        Определяет тип устройства по найденным словам
+
+        Returns:
+            tuple: (тип устройства или 'unknown', список сработавших правил)
+        """
+        scores = {}
+        fired = {}
+
+        for keyword in hits:
+            for device_type in self.keyword_types.get(keyword, ()):
+                scores[device_type] = scores.get(device_type, 0) + 1
+                fired.setdefault(device_type, []).append(f"{device_type}:keyword:{keyword}")
+            for device_type, second in self.sign_index.get(keyword, ()):
+                if second in hits:
+                    scores[device_type] = scores.get(device_type, 0) + 2
+                    fired.setdefault(device_type, []).append(f"{device_type}:sign:{keyword}+{second}")
+
+        if server:
+            server_lower = server.lower()
+            for device_type, rules in self.device_types.items():
+                for hint in rules.get('server_hints', ()):
+                    if hint in server_lower:
+                        scores[device_type] = scores.get(device_type, 0) + 1
+                        fired.setdefault(device_type, []).append(f"{device_type}:server:{hint}")
+
+        for device_type, rules in self.device_types.items():
+            if scores.get(device_type, 0) >= rules.get('threshold', 3):
+                return device_type, sorted(fired[device_type])
+
+        return 'unknown', []
+
+    def match_router(self, hits, title, content):
+        """
+        Проверяет признаки интерфейса роутера (логика is_router_interface)
+
+        Returns:
+            list: Сработавшие правила; пустой список - не роутер
+        """
+        if not title and len(content) < 100:
+            return []
+
+        brands = {brand for keyword in hits for brand in self.keyword_brands.get(keyword, ())}
+        if brands:
+            for brand, words in self.brand_words.items():
+                if brand in brands:
+                    for word in words:
+                        if word in hits:
+                            return [f"brand:{brand}", f"router:keyword:{word}"]
+            markers = [marker for marker in self.router_markers if marker in hits]
+            if markers:
+                return sorted(f"brand:{brand}" for brand in brands) + [f"router:marker:{m}" for m in markers]
+            special = [brand for brand in self.router_only_brands if brand in brands]
+            if special:
+                return [f"brand:{brand}" for brand in special]
+
+        for first, second in self.router_signs:
+            if first in hits and second in hits:
+                return [f"router:sign:{first}+{second}"]
+
+        # Дополнительная проверка для HTML форм входа
+        if FORM_RE.search(content) and LOGIN_FIELD_RE.search(content):
+            return ['router:login-form']
+
+        return []
+
+    def match_signature(self, hits, title, server="", favicon=None):
+        """
+        Находит лучшую сигнатуру базы по индексам
+
+        Args:
+            hits (set): Слова, найденные в заголовке и начале страницы
+            title (str): Заголовок страницы
+            server (str): Заголовок Server
+            favicon (str): Хеш favicon, если он загружался
+
+        Returns:
+            tuple: (сигнатура или None, список сработавших правил)
+        """
+        fired = {}
+        title_hits = None
+        for word in hits:
+            for number, field in self.signature_words.get(word, ()):
+                if field == 'title' and title_hits is None:
+                    # Заголовок короткий, отдельный проход по нему нужен только здесь
+                    title_hits = self.scan(title.lower())
+                if field == 'body' or word in title_hits:
+                    fired.setdefault(number, []).append(f"{field}:{word}")
+        if server and self.server_index:
+            for key in server_keys(server):
+                for number in self.server_index.get(key, ()):
+                    fired.setdefault(number, []).append(f"server:{key}")
+        if favicon:
+            for number in self.favicon_index.get(favicon.lower(), ()):
+                fired.setdefault(number, []).append(f"favicon:{favicon.lower()}")
+
+        if not fired:
+            return None, []
+
+        # Побеждает сигнатура с наибольшим числом совпадений, при равенстве - первая в базе
+        number = min(fired, key=lambda n: (-len(fired[n]), n))
+        signature = self.signatures[number]
+        return signature, [f"signature:{signature['name']}:{rule}" for rule in sorted(fired[number])]
+
+    def analysis_text(self, title, content):
+        """Текст для анализа: заголовок и начало страницы в нижнем регистре"""
+        return (title + ' ' + content[:ANALYSIS_WINDOW]).lower()
+
+    def device_type(self, title, content, server=""):
+        """Тип устройства по сигнатурам, ключевым словам, парам признаков и серверу"""
+        hits = self.scan(self.analysis_text(title, content))
+        signature, _ = self.match_signature(hits, title, server)
+        if signature is not None and signature.get('device_type'):
+            return signature['device_type']
+        return self.score_device_types(hits, server)[0]
+
+    def is_router(self, title, content):
+        """Похож ли контент на интерфейс роутера"""
+        hits = self.scan(self.analysis_text(title, content))
+        return bool(self.match_router(hits, title, content))
+
+    def classify(self, title, content, server="", favicon=None):
+        """
+        Полная классификация страницы за один проход по тексту
+
+        Сигнатура базы точнее ключевых слов, поэтому ее тип устройства
+        имеет приоритет; если сигнатура не задает тип, он определяется
+        по ключевым словам и признакам роутера.
+
+        Args:
+            title (str): Заголовок страницы
+            content (str): Текст страницы
+            server (str): Заголовок Server
+            favicon (str): Хеш favicon (см. favicon_hash), если загружался
+
+        Returns:
+            dict: device_type, vendor, is_router и matched_rules - сработавшие правила
+        """
+        hits = self.scan(self.analysis_text(title, content))
+        signature, signature_rules = self.match_signature(hits, title, server, favicon)
+
+        if signature is not None and signature.get('device_type'):
+            device_type, rules = signature['device_type'], []
+        else:
+            device_type, rules = self.score_device_types(hits, server)
+            # Если тип не определился, проверяем признаки интерфейса роутера
+            if device_type == 'unknown':
+                rules = self.match_router(hits, title, content)
+                if rules:
+                    device_type = 'router'
+
+        if signature is not None and signature.get('vendor'):
+            vendor = signature['vendor']
+        else:
+            vendor = self.vendor(hits) if device_type == 'router' else 'unknown'
+
+        return {
+            'device_type': device_type,
+            'vendor': vendor,
+            'is_router': device_type == 'router',
+            'matched_rules': signature_rules + rules,
+        }
+
+    def vendor(self, hits):
+        """Первый производитель из базы, чьи идентификаторы есть в тексте"""
+        brands = {brand for keyword in hits for brand in self.keyword_brands.get(keyword, ())}
+        brands.discard('generic')
+        if not brands:
+            return 'unknown'
+        return min(brands, key=self.brand_order.__getitem__)
+
+
+@lru_cache(maxsize=None)
+def default_matcher(path=None, cache_dir=None):
+    """
+    Классификатор из базы (по умолчанию встроенной), компилируется один раз
+
+    Встроенная база на диске не кешируется: автомат из нее собирается за
+    миллисекунды, а библиотека не должна писать в домашний каталог при
+    создании сканера. Своя база кешируется в cache_dir (False - без кеша).
+    """
+    if path is None:
+        cache_dir = False
+    return FingerprintMatcher.load(path, cache_dir=cache_dir)
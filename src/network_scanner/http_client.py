@@ -0,0 +1,351 @@
+"""
+Минимальный асинхронный HTTP-клиент для движка asyncio
+"""
+
+import asyncio
+import ssl
+import time
+import zlib
+from urllib.parse import urljoin, urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+# Коды ответов, после которых следуем по заголовку Location
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Максимальный размер заголовков ответа
+MAX_HEADER_BYTES = 64 * 1024
+
+# Размер блока при чтении тела ответа
+CHUNK_SIZE = 4096
+
+TITLE_END = b'</title'
+
+
+class HTTPError(Exception):
+    """Ошибка протокола HTTP (битый ответ, слишком много редиректов)"""
+
+
+class PageResponse:
+    """
+    Ответ веб-сервиса, совместимый с requests.Response
+
+    Содержит только то, что нужно для классификации: код ответа,
+    заголовки, тело и кодировку. Свойство text декодирует тело так же,
+    как requests (с заменой неверных байтов).
+    """
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = None
+
+    @property
+    def text(self):
+        """Тело ответа в виде строки"""
+        try:
+            return self.content.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+class TimedSSLContext(ssl.SSLContext):
+    """
+    SSL-контекст, замеряющий рукопожатия TLS блокирующих сокетов
+
+    urllib3 оборачивает сокет через wrap_socket, и рукопожатие проходит
+    внутри этого вызова; его длительность передается в observe('tls', с).
+    """
+
+    observe = None
+
+    def wrap_socket(self, *args, **kwargs):
+        started = time.perf_counter()
+        sock = super().wrap_socket(*args, **kwargs)
+        if self.observe is not None:
+            self.observe('tls', time.perf_counter() - started)
+        return sock
+
+
+def create_ssl_context(observe=None):
+    """
+    Создает SSL-контекст без проверки сертификатов (как verify=False)
+
+    Args:
+        observe (callable): observe(stage, seconds) для замера рукопожатий
+            (см. TimedSSLContext)
+    """
+    if observe is None:
+        context = ssl.create_default_context()
+    else:
+        context = TimedSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.observe = observe
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def build_request(url, headers=None):
+    """Формирует байты GET-запроса для указанного URL"""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}"]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    lines.append("Accept-Encoding: gzip, deflate")
+    lines.append("Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+
+def parse_head(data):
+    """Разбирает строку статуса и заголовки ответа"""
+    head = data.decode('latin-1')
+    lines = head.split('\r\n')
+    status_line = lines[0].split(' ', 2)
+    if len(status_line) < 2 or not status_line[0].startswith('HTTP/'):
+        raise HTTPError(f"Некорректная строка статуса: {lines[0]!r}")
+    try:
+        status_code = int(status_line[1])
+    except ValueError:
+        raise HTTPError(f"Некорректный код ответа: {status_line[1]!r}")
+
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        if not line or ':' not in line:
+            continue
+        name, value = line.split(':', 1)
+        name, value = name.strip(), value.strip()
+        # Повторяющиеся заголовки склеиваем через запятую, как requests
+        if name in headers:
+            headers[name] = f"{headers[name]}, {value}"
+        else:
+            headers[name] = value
+    return status_code, headers
+
+
+def is_html_content_type(content_type):
+    """Проверяет, стоит ли читать тело ответа с таким Content-Type"""
+    if not content_type:
+        return True
+    content_type = content_type.lower()
+    return 'html' in content_type or 'xml' in content_type or content_type.startswith('text/')
+
+
+class BoundedBody:
+    """
+    Накопитель тела ответа с ограничением размера
+
+    Чтение прекращается, когда пришел </title> и набрано budget байт,
+    или когда набрано limit байт, даже если заголовка страницы нет.
+    При budget=0 тело читается целиком.
+    """
+
+    def __init__(self, budget=0, limit=0):
+        self.budget = budget
+        self.limit = max(limit, budget) if budget else 0
+        self.chunks = []
+        self.size = 0
+        self.title_closed = False
+        self._tail = b''
+
+    def feed(self, data):
+        """
+        Добавляет очередной блок тела
+
+        Returns:
+            bool: False, когда читать дальше не нужно
+        """
+        if data:
+            self.chunks.append(data)
+            self.size += len(data)
+            if not self.title_closed:
+                # Хвост предыдущего блока ловит тег, разрезанный между блоками
+                window = self._tail + data.lower()
+                self.title_closed = TITLE_END in window
+                self._tail = window[-len(TITLE_END):]
+        return not self.done
+
+    @property
+    def done(self):
+        """Набрано ли достаточно данных"""
+        if not self.budget:
+            return False
+        if self.size >= self.limit:
+            return True
+        return self.title_closed and self.size >= self.budget
+
+    @property
+    def content(self):
+        """Прочитанное тело, обрезанное по лимиту"""
+        content = b''.join(self.chunks)
+        if self.limit:
+            content = content[:self.limit]
+        return content
+
+
+def content_decoder(headers):
+    """Возвращает потоковый распаковщик для Content-Encoding или None"""
+    coding = headers.get('Content-Encoding', '').lower()
+    if coding in ('gzip', 'deflate'):
+        # 32 + MAX_WBITS распознает и gzip, и zlib-обертку
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    return None
+
+
+async def iter_raw_body(reader, status_code, headers):
+    """Отдает тело ответа блоками (Content-Length, chunked или до закрытия)"""
+    if status_code in (204, 304) or 100 <= status_code < 200:
+        return
+
+    if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                return
+            try:
+                remaining = int(size_line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise HTTPError("Некорректный размер chunk")
+            if remaining == 0:
+                return
+            while remaining > 0:
+                piece = await reader.read(min(remaining, CHUNK_SIZE))
+                if not piece:
+                    return
+                remaining -= len(piece)
+                yield piece
+            await reader.readline()
+
+    length = headers.get('Content-Length')
+    try:
+        remaining = int(length) if length is not None else None
+    except ValueError:
+        remaining = None
+
+    while remaining is None or remaining > 0:
+        piece = await reader.read(CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE))
+        if not piece:
+            return
+        if remaining is not None:
+            remaining -= len(piece)
+        yield piece
+
+
+async def read_body(reader, status_code, headers, body):
+    """
+    Читает тело ответа в накопитель, пока он просит данные
+
+    Returns:
+        bytes: Прочитанное (и распакованное) тело
+    """
+    decoder = content_decoder(headers)
+    async for piece in iter_raw_body(reader, status_code, headers):
+        if decoder is not None:
+            try:
+                piece = decoder.decompress(piece)
+            except zlib.error:
+                break
+        if not body.feed(piece):
+            break
+    return body.content
+
+
+async def fetch_once(url, headers=None, ssl_context=None, streams=None,
+                     body_budget=0, max_body_bytes=0, html_only=True, metrics=None):
+    """
+    Выполняет один GET-запрос без следования редиректам
+
+    Если передана пара streams (reader, writer) уже открытого соединения,
+    запрос отправляется по ней; соединение в любом случае закрывается.
+    Тело читается не больше, чем позволяет BoundedBody(body_budget,
+    max_body_bytes), а для редиректов и (при html_only) не-HTML ответов
+    не читается вовсе. С metrics (metrics.ScanMetrics) замеряются этапы
+    first_byte и body, а для HTTPS - tls (подключение вместе с рукопожатием).
+    """
+    started = time.perf_counter()
+    if streams is None:
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        if secure and ssl_context is None:
+            ssl_context = create_ssl_context()
+
+        streams = await asyncio.open_connection(
+            parts.hostname, port,
+            ssl=ssl_context if secure else None,
+            limit=MAX_HEADER_BYTES,
+        )
+        if secure and metrics is not None:
+            metrics.observe('tls', time.perf_counter() - started)
+
+    reader, writer = streams
+    try:
+        started = time.perf_counter()
+        writer.write(build_request(url, headers))
+        await writer.drain()
+
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            raise HTTPError(f"Не удалось прочитать заголовки ответа: {e}")
+
+        if metrics is not None:
+            metrics.observe('first_byte', time.perf_counter() - started)
+
+        status_code, response_headers = parse_head(head[:-4])
+        content = b''
+        is_redirect = status_code in REDIRECT_CODES and 'Location' in response_headers
+        is_html = is_html_content_type(response_headers.get('Content-Type', ''))
+        if not is_redirect and (is_html or not html_only):
+            body = BoundedBody(body_budget, max_body_bytes)
+            started = time.perf_counter()
+            content = await read_body(reader, status_code, response_headers, body)
+            if metrics is not None:
+                metrics.observe('body', time.perf_counter() - started)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+    return PageResponse(url, status_code, response_headers, content)
+
+
+async def async_http_get(url, timeout, headers=None, max_redirects=5, ssl_context=None,
+                         streams=None, body_budget=0, max_body_bytes=0, html_only=True, metrics=None):
+    """
+    Асинхронный GET-запрос со следованием редиректам
+
+    Args:
+        url (str): Адрес запроса
+        timeout (float): Таймаут на каждый запрос в цепочке редиректов
+        headers (dict): Дополнительные заголовки запроса
+        max_redirects (int): Максимальное число редиректов
+        ssl_context (ssl.SSLContext): Контекст для HTTPS (по умолчанию без проверки)
+        streams (tuple): Открытое соединение (reader, writer) для первого запроса
+        body_budget (int): Сколько байт тела читать после </title> (0 - все тело)
+        max_body_bytes (int): Предел тела, если </title> так и не встретился
+        html_only (bool): Читать тело только у HTML-ответов
+        metrics (ScanMetrics): Метрики для замера этапов запроса
+
+    Returns:
+        PageResponse: Итоговый ответ после редиректов
+    """
+    for _ in range(max_redirects + 1):
+        response = await asyncio.wait_for(
+            fetch_once(url, headers, ssl_context, streams, body_budget, max_body_bytes, html_only, metrics),
+            timeout
+        )
+        streams = None
+        location = response.headers.get('Location')
+        if response.status_code not in REDIRECT_CODES or not location:
+            return response
+        url = urljoin(url, location)
+
+    raise HTTPError(f"Слишком много редиректов: {url}")
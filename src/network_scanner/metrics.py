@@ -0,0 +1,285 @@
+"""
+Метрики сканирования: гистограммы времени этапов и счетчики событий
+
+Этапы проверки сервиса:
+    connect          ответ на подключение к порту (SYN-ACK или RST)
+    tls              рукопожатие TLS (в asyncio - вместе с подключением)
+    first_byte       от отправки запроса до получения заголовков ответа
+    body             чтение тела страницы
+    detect_encoding  определение кодировки
+    classify         заголовок страницы и классификация устройства
+
+Гистограммы с фиксированными границами корзин, как в Prometheus:
+наблюдение - это поиск корзины и два сложения, память не растет с
+числом наблюдений. Метрики доступны как scanner.metrics, сохраняются
+в JSON (--stats-json) и могут отдаваться в текстовом формате
+Prometheus (--metrics-port).
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .adaptive import ANSWER_ERRORS, FAILED, SILENT, UNREACHABLE, classify_connect
+
+STAGES = ('connect', 'tls', 'first_byte', 'body', 'detect_encoding', 'classify')
+
+# Счетчики событий
+COUNTERS = (
+    'hosts',              # просканировано адресов
+    'ports_probed',       # проверено портов
+    'ports_open',         # порт принял подключение
+    'connect_refused',    # RST: порт закрыт
+    'connect_timeouts',   # ответа на подключение не было
+    'connect_unreachable',  # ICMP/ARP: хост недоступен
+    'connect_failed',     # локальная ошибка сокета
+    'connection_resets',  # сброс установленного соединения
+    'tls_errors',         # ошибка TLS
+    'http_errors',        # прочие ошибки HTTP-запроса (таймаут, битый ответ)
+    'services',           # найдено веб-сервисов
+)
+
+# Верхние границы корзин в секундах (последняя корзина - до бесконечности)
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+PROMETHEUS_PREFIX = 'network_scanner'
+
+
+def _ms(seconds):
+    """Секунды в миллисекунды для отчета"""
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами"""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Добавляет одно наблюдение"""
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, fraction):
+        """Оценка перцентиля линейной интерполяцией внутри корзины"""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return None
+        target = fraction * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            if bucket and seen + bucket >= target:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else largest
+                return min(largest, lower + (upper - lower) * (target - seen) / bucket)
+            seen += bucket
+        return largest
+
+    def state(self):
+        """Состояние для передачи между процессами (JSON)"""
+        with self._lock:
+            return {'counts': list(self.counts), 'sum': self.sum, 'count': self.count, 'max': self.max}
+
+    def merge(self, state):
+        """Добавляет состояние другой гистограммы с теми же корзинами"""
+        with self._lock:
+            for index, value in enumerate(state['counts']):
+                self.counts[index] += value
+            self.sum += state['sum']
+            self.count += state['count']
+            self.max = max(self.max, state['max'])
+
+
+class ScanMetrics:
+    """Гистограммы этапов и счетчики событий сканирования; потокобезопасны"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Рабочие процессы начинают со своих пустых метрик
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def observe(self, stage, seconds):
+        """Записывает длительность этапа"""
+        self.histograms[stage].observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """Замеряет длительность блока как этап stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[stage].observe(time.perf_counter() - started)
+
+    def increment(self, counter, value=1):
+        """Увеличивает счетчик"""
+        with self._lock:
+            self.counters[counter] += value
+
+    def record_connect(self, error, rtt=None):
+        """
+        Учитывает исход подключения к порту
+
+        Args:
+            error (int): Код ошибки connect, None - ответа не было
+            rtt (float): Время ответа, если измерено
+        """
+        outcome = classify_connect(error)
+        if outcome == SILENT:
+            counter = 'connect_timeouts'
+        elif outcome == UNREACHABLE:
+            counter = 'connect_unreachable'
+        elif outcome == FAILED:
+            counter = 'connect_failed'
+        else:
+            counter = 'ports_open' if error == 0 else 'connect_refused'
+        with self._lock:
+            self.counters['ports_probed'] += 1
+            self.counters[counter] += 1
+        if rtt is not None and error in ANSWER_ERRORS:
+            self.histograms['connect'].observe(rtt)
+
+    def take(self):
+        """
+        Забирает накопленное и обнуляет метрики (передача из рабочего процесса)
+
+        Вызывается между порциями работы, когда наблюдений не идет.
+
+        Returns:
+            dict: Состояние для merge
+        """
+        with self._lock:
+            state = {
+                'histograms': {stage: histogram.state() for stage, histogram in self.histograms.items()},
+                'counters': dict(self.counters),
+            }
+            self.histograms = {stage: Histogram() for stage in STAGES}
+            self.counters = dict.fromkeys(COUNTERS, 0)
+        return state
+
+    def merge(self, state):
+        """Добавляет метрики, забранные take в другом процессе или на другом узле"""
+        for stage, histogram in state.get('histograms', {}).items():
+            if stage in self.histograms:
+                self.histograms[stage].merge(histogram)
+        with self._lock:
+            for counter, value in state.get('counters', {}).items():
+                if counter in self.counters:
+                    self.counters[counter] += value
+
+    def snapshot(self):
+        """
+        Сводка для JSON
+
+        Returns:
+            dict: stages (count, сумма, среднее, p50/p90/p99 и max в мс,
+                корзины) и counters
+        """
+        stages = {}
+        for stage, histogram in self.histograms.items():
+            state = histogram.state()
+            count = state['count']
+            stages[stage] = {
+                'count': count,
+                'total_s': round(state['sum'], 4),
+                'mean_ms': _ms(state['sum'] / count) if count else None,
+                'p50_ms': _ms(histogram.quantile(0.5)),
+                'p90_ms': _ms(histogram.quantile(0.9)),
+                'p99_ms': _ms(histogram.quantile(0.99)),
+                'max_ms': _ms(state['max']) if count else None,
+                'buckets': {
+                    **{str(bound): value for bound, value in zip(histogram.bounds, state['counts'])},
+                    '+Inf': state['counts'][-1],
+                },
+            }
+        with self._lock:
+            counters = dict(self.counters)
+        return {'uptime_s': round(time.time() - self.started, 3), 'stages': stages, 'counters': counters}
+
+    def prometheus(self):
+        """Метрики в текстовом формате Prometheus 0.0.4"""
+        name = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent in scan stages",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            state = histogram.state()
+            cumulative = 0
+            for bound, value in zip(histogram.bounds, state['counts']):
+                cumulative += value
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {state["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {state["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {state["count"]}')
+
+        name = f"{PROMETHEUS_PREFIX}_events_total"
+        lines.append(f"# HELP {name} Scan events")
+        lines.append(f"# TYPE {name} counter")
+        with self._lock:
+            counters = dict(self.counters)
+        for counter, value in counters.items():
+            lines.append(f'{name}{{event="{counter}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """HTTP-сервер, отдающий метрики Prometheus на /metrics, в фоновом потоке"""
+
+    def __init__(self, metrics, host='127.0.0.1', port=9464):
+        """
+        Args:
+            metrics (ScanMetrics): Отдаваемые метрики
+            host (str): Адрес для прослушивания
+            port (int): Порт (0 - любой свободный)
+        """
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Останавливает сервер"""
+        self._server.shutdown()
+        self._server.server_close()
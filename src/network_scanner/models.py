@@ -0,0 +1,246 @@
+"""
+Компактная запись результата сканирования
+
+Находка хранится не словарем из 16 ключей, а объектом ScanResult со
+слотами: адрес упакован в целое число (targets.address_to_key), типы
+устройств - члены DeviceType, повторяющиеся строки (Server, Content-Type,
+кодировка, заголовок, вендор, правила) интернированы, хеш тела хранится
+байтами, а URL вида схема://ip:порт собирается при обращении.
+
+ScanResult - неизменяемое отображение (collections.abc.Mapping): код,
+который читает result['ip'] или result.get('vendor'), работает без
+изменений, а dict(result) дает прежний словарь с тем же порядком ключей,
+поэтому JSON отчетов, JSON Lines и хранилища не меняется.
+"""
+
+import socket
+import sys
+from collections.abc import Mapping
+from enum import Enum
+
+from .targets import IPV6_OFFSET, address_to_key, key_to_address
+
+# Ключи результата в порядке вывода в JSON
+FIELDS = (
+    'ip', 'port', 'url', 'status_code', 'title', 'server', 'content_type', 'is_router',
+    'device_type', 'vendor', 'matched_rules', 'content_length', 'encoding',
+    'etag', 'last_modified', 'body_hash',
+)
+FIELD_SET = frozenset(FIELDS)
+
+# Схемы URL, которые собираются из адреса и порта
+SCHEMES = {'http': 'http', 'https': 'https'}
+
+# Слоты со строками, которые повторяются от результата к результату
+INTERNED = frozenset(('scheme', 'title', 'server', 'content_type', 'vendor', 'encoding'))
+
+
+class DeviceType(str, Enum):
+    """Типы устройств встроенной базы отпечатков"""
+
+    ROUTER = 'router'
+    NAS = 'nas'
+    CAMERA = 'camera'
+    PRINTER = 'printer'
+    UNKNOWN = 'unknown'
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Член DeviceType или интернированная строка для типов из
+        пользовательской базы отпечатков
+
+        Args:
+            value (str): Тип устройства
+        """
+        try:
+            return cls(value)
+        except ValueError:
+            return intern(value)
+
+
+def intern(value):
+    """Интернирует строку (повторяющиеся значения хранятся один раз)"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def pack_ip(ip):
+    """
+    Адрес -> целое число (ключ targets.address_to_key)
+
+    IPv4 разбирается через socket, это в разы быстрее ipaddress. Если
+    строка не IP-адрес или записана не в каноническом виде (и обратно
+    получилась бы другая строка), она остается строкой.
+    """
+    ip = str(ip)
+    try:
+        packed = socket.inet_pton(socket.AF_INET, ip)
+    except OSError:
+        try:
+            key = address_to_key(ip)
+        except ValueError:
+            return ip
+        return key if key_to_address(key) == ip else ip
+    return int.from_bytes(packed, 'big') if socket.inet_ntoa(packed) == ip else ip
+
+
+def unpack_ip(key):
+    """Целое число или строка из pack_ip -> строка адреса"""
+    if type(key) is str:
+        return key
+    if key < IPV6_OFFSET:
+        return socket.inet_ntoa(key.to_bytes(4, 'big'))
+    return key_to_address(key)
+
+
+def pack_hash(value):
+    """Шестнадцатеричный хеш -> байты (вдвое короче); иное значение не меняется"""
+    if type(value) is not str:
+        return value
+    try:
+        packed = bytes.fromhex(value)
+    except ValueError:
+        return value
+    # Упаковка обратима, только если строка - это hex() этих байтов
+    return packed if packed.hex() == value else value
+
+
+def as_dict(result):
+    """Словарь результата для JSON: из ScanResult или уже словарь как есть"""
+    to_dict = getattr(result, 'to_dict', None)
+    return to_dict() if to_dict is not None else result
+
+
+class ScanResult(Mapping):
+    """
+    Результат сканирования одного веб-сервиса
+
+    Поля читаются и атрибутами (result.title), и как ключи словаря
+    (result['title']). Значения совпадают с прежним словарем результата:
+    ip и url - строки, device_type - строка, matched_rules - список,
+    body_hash - шестнадцатеричная строка.
+    """
+
+    __slots__ = (
+        '_ip', 'port', 'scheme', '_url', 'status_code', 'title', 'server', 'content_type',
+        'is_router', '_device_type', 'vendor', '_matched_rules', 'content_length', 'encoding',
+        'etag', 'last_modified', '_body_hash',
+    )
+
+    def __init__(self, ip, port, url, status_code, title='No title', server='Unknown',
+                 content_type='', is_router=False, device_type='unknown', vendor='unknown',
+                 matched_rules=(), content_length=0, encoding=None, etag=None,
+                 last_modified=None, body_hash=None):
+        self._ip = pack_ip(ip)
+        self.port = port
+        # URL вида схема://ip:порт не хранится, а собирается при обращении
+        scheme, _, rest = url.partition('://')
+        if scheme in SCHEMES and rest == f"{ip}:{port}":
+            self.scheme, self._url = SCHEMES[scheme], None
+        else:
+            self.scheme, self._url = 'http', url
+        self.status_code = status_code
+        self.title = intern(title)
+        self.server = intern(server)
+        self.content_type = intern(content_type)
+        self.is_router = bool(is_router)
+        self._device_type = DeviceType.parse(device_type)
+        self.vendor = intern(vendor)
+        self._matched_rules = tuple(intern(rule) for rule in matched_rules or ())
+        self.content_length = content_length
+        self.encoding = intern(encoding)
+        self.etag = etag
+        self.last_modified = last_modified
+        self._body_hash = pack_hash(body_hash)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Результат из словаря (прочитанного из JSON или хранилища)
+
+        Отсутствующие ключи получают значения по умолчанию, лишние
+        игнорируются.
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(**{key: data[key] for key in FIELDS if key in data})
+
+    @property
+    def ip(self):
+        return unpack_ip(self._ip)
+
+    @property
+    def ip_key(self):
+        """Адрес в виде pack_ip: целое число или строка, если это не IP"""
+        return self._ip
+
+    @property
+    def url(self):
+        if self._url is not None:
+            return self._url
+        return f"{self.scheme}://{self.ip}:{self.port}"
+
+    @property
+    def device_type(self):
+        return str(self._device_type)
+
+    @property
+    def matched_rules(self):
+        return list(self._matched_rules)
+
+    @property
+    def body_hash(self):
+        if type(self._body_hash) is bytes:
+            return self._body_hash.hex()
+        return self._body_hash
+
+    def __getitem__(self, key):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in FIELD_SET
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def to_dict(self):
+        """Словарь результата в прежнем формате (для JSON)"""
+        ip = unpack_ip(self._ip)
+        return {
+            'ip': ip,
+            'port': self.port,
+            'url': self._url if self._url is not None else f"{self.scheme}://{ip}:{self.port}",
+            'status_code': self.status_code,
+            'title': self.title,
+            'server': self.server,
+            'content_type': self.content_type,
+            'is_router': self.is_router,
+            'device_type': str(self._device_type),
+            'vendor': self.vendor,
+            'matched_rules': list(self._matched_rules),
+            'content_length': self.content_length,
+            'encoding': self.encoding,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'body_hash': self.body_hash,
+        }
+
+    def __repr__(self):
+        return f"ScanResult({self.url!r}, status_code={self.status_code}, device_type={self.device_type!r})"
+
+    def __getstate__(self):
+        # Компактное состояние для pickle (передача между процессами)
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        # Строки после pickle - новые объекты, интернируем их снова
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, intern(value) if name in INTERNED else value)
@@ -0,0 +1,265 @@
+"""
+Вывод сканирования в консоль
+
+Находки и сообщения сканера не печатаются рабочими потоками напрямую:
+ConsoleWriter копит строки и отдельный поток пишет их одним вызовом
+write раз в FLUSH_INTERVAL, поэтому цикл сбора результатов не ждет
+терминал. В терминале внизу держится строка прогресса (хосты в
+секунду, открытые порты, найденные сервисы), обновляемая не чаще того
+же интервала.
+
+Форматы (--format, --quiet):
+    text   цветные блоки находок и строка прогресса
+    jsonl  в stdout только находки, по объекту JSON на строку; все
+           остальное - в stderr без цветов
+    quiet  только итоги без цветов
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from .models import as_dict
+
+OUTPUT_FORMATS = ('text', 'jsonl')
+
+# Как часто выводится накопленное и обновляется строка прогресса, в секундах
+FLUSH_INTERVAL = 0.1
+
+# Возврат в начало строки и ее очистка
+CLEAR_LINE = '\r\033[K'
+
+BLUE = '\033[94m'
+RESET = '\033[0m'
+
+
+def format_result(result, color=True):
+    """
+    Блок текста о найденном веб-интерфейсе
+
+    Args:
+        result (dict): Результат сканирования
+        color (bool): Выделять цветом (ANSI)
+
+    Returns:
+        str: Строки блока без завершающего перевода строки
+    """
+    if result['status_code'] == 200:
+        status_color = "\033[92m"  # Зеленый
+        status_icon = ""
+    elif result['status_code'] in [401, 403]:
+        status_color = "\033[93m"  # Желтый
+        status_icon = "🔒 "
+    elif result['status_code'] >= 400:
+        status_color = "\033[91m"  # Красный
+        status_icon = ""
+    else:
+        status_color = BLUE
+        status_icon = ""
+    blue, reset = BLUE, RESET
+    if not color:
+        status_color = blue = reset = ''
+
+    router_marker = "🚀 РОУТЕР! " if result['is_router'] else ""
+
+    lines = [
+        f"{status_color}{status_icon}{router_marker}Найден веб-интерфейс:{reset}",
+        f"  IP:        {blue}{result['ip']}{reset}",
+        f"  Порт:      {result['port']}",
+        f"  URL:       {blue}{result['url']}{reset}",
+        f"  Статус:    {result['status_code']}",
+    ]
+    if result['title'] and result['title'] != 'No title':
+        lines.append(f"  Заголовок: {result['title']}")
+    if result['server'] and result['server'] != 'Unknown':
+        lines.append(f"  Сервер:    {result['server']}")
+    if result.get('vendor', 'unknown') != 'unknown':
+        lines.append(f"  Вендор:    {result['vendor']}")
+    lines.append(f"  Размер:    {result['content_length']} байт")
+    # Показываем тип контента если есть
+    if result.get('content_type'):
+        lines.append(f"  Тип:       {result['content_type']}")
+    lines.append("-" * 60)
+    return '\n'.join(lines)
+
+
+def status_line(counters, elapsed):
+    """
+    Строка прогресса по счетчикам metrics.ScanMetrics
+
+    Args:
+        counters (dict): Счетчики сканирования
+        elapsed (float): Секунд с начала сканирования
+    """
+    hosts = counters['hosts']
+    rate = hosts / elapsed if elapsed > 0 else 0.0
+    return (f"{hosts} hosts scanned, {rate:.1f} hosts/s, "
+            f"{counters['ports_open']} open ports, {counters['services']} services found")
+
+
+class ConsoleWriter:
+    """
+    Файлоподобный буфер вывода с отдельным потоком записи
+
+    write только добавляет текст в буфер; поток раз в interval пишет
+    накопленные целые строки в stream одним вызовом. Если задан status
+    и stream - терминал, под выводом держится строка прогресса. Пока
+    медленный терминал принимает запись, write не блокируется.
+    """
+
+    def __init__(self, stream, interval=FLUSH_INTERVAL):
+        """
+        Args:
+            stream: Поток, куда пишется вывод (обычно sys.stdout)
+            interval (float): Период записи в секундах
+        """
+        self.stream = stream
+        self.interval = interval
+        # Функция без аргументов, возвращающая строку прогресса
+        self.status = None
+        try:
+            self.interactive = stream.isatty()
+        except (AttributeError, ValueError):
+            self.interactive = False
+        self._pending = []
+        self._shown = None
+        # _lock защищает буфер, _write_lock сохраняет порядок записей в stream
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='console-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+        return len(text)
+
+    def flush(self):
+        # Запись делает поток вывода: print(..., flush=True) не должен ее ускорять
+        pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.drain()
+
+    def drain(self, final=False):
+        """
+        Пишет накопленные строки и обновляет строку прогресса
+
+        Args:
+            final (bool): Записать и незавершенную строку, убрать прогресс
+        """
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                text = ''.join(pending)
+                if not final:
+                    # Незавершенная строка ждет конца, чтобы прогресс ее не разорвал
+                    cut = text.rfind('\n') + 1
+                    if cut < len(text):
+                        self._pending.append(text[cut:])
+                    text = text[:cut]
+
+                status = None
+                if self.interactive and self.status is not None and not final:
+                    status = self.status()
+                if not text and status == self._shown:
+                    return
+
+                parts = []
+                if self._shown is not None:
+                    parts.append(CLEAR_LINE)
+                parts.append(text)
+                if status is not None:
+                    parts.append(status)
+                self._shown = status
+
+            # Буфер уже свободен: рабочие потоки пишут в него, пока stream занят
+            try:
+                self.stream.write(''.join(parts))
+                self.stream.flush()
+            except (OSError, ValueError):
+                # Терминал закрыт - выводить некуда
+                pass
+
+    def close(self):
+        """Останавливает поток и дописывает остаток"""
+        self._stop.set()
+        self._thread.join()
+        self.drain(final=True)
+
+
+class ScanOutput:
+    """
+    Консольный вывод одного запуска CLI
+
+        with ScanOutput('text') as output:
+            with output.scanning(scanner.metrics):
+                ...  # сканирование: print идет через ConsoleWriter
+            ...  # итоги
+
+    Внутри блока sys.stdout подменен: в text - буфером ConsoleWriter,
+    в jsonl - stderr (находки пишет show в настоящий stdout).
+    """
+
+    def __init__(self, format='text', quiet=False, interval=FLUSH_INTERVAL):
+        """
+        Args:
+            format (str): 'text' или 'jsonl'
+            quiet (bool): Не выводить находки и сообщения сканера
+            interval (float): Период записи вывода в секундах
+        """
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(f"Неизвестный формат вывода: {format}")
+        self.format = format
+        self.quiet = quiet
+        self.interval = interval
+        self.writer = None
+        self._redirect = None
+
+    @property
+    def color(self):
+        """Можно ли выделять вывод цветом"""
+        return self.format == 'text' and not self.quiet
+
+    def __enter__(self):
+        self.writer = ConsoleWriter(sys.stdout, self.interval)
+        target = self.writer if self.format == 'text' else sys.stderr
+        self._redirect = contextlib.redirect_stdout(target)
+        self._redirect.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._redirect.__exit__(*exc_info)
+        self.writer.close()
+
+    def show(self, result):
+        """Выводит находку в выбранном формате"""
+        if self.format == 'jsonl':
+            self.writer.write(json.dumps(as_dict(result), ensure_ascii=False, default=str) + '\n')
+        elif not self.quiet:
+            self.writer.write(format_result(result) + '\n')
+
+    @contextlib.contextmanager
+    def scanning(self, metrics):
+        """
+        Время сканирования: строка прогресса или (quiet) тишина
+
+        Args:
+            metrics (ScanMetrics): Счетчики сканера для строки прогресса
+        """
+        if self.quiet:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                yield
+            return
+        started = time.monotonic()
+        if self.format == 'text':
+            self.writer.status = lambda: status_line(metrics.counters, time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self.writer.status = None
@@ -0,0 +1,262 @@
+"""
+Сканирование в нескольких процессах
+
+Классификация страниц (кодировка, заголовок, отпечатки) - чистый Python
+и упирается в GIL, поэтому на тяжелых страницах потоки одного процесса
+не успевают за сетью. ProcessScanner раздает адреса рабочим процессам
+порциями: каждый процесс запускает свой движок сканирования (потоки или
+asyncio) над порцией и возвращает результаты через очередь, а
+родительский процесс пишет их в приемники, ведет общий прогресс и
+контрольную точку.
+
+Порции берутся из очереди по мере освобождения процессов, поэтому
+участки сети с большим числом живых хостов не задерживают остальные.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import queue
+import signal
+import time
+import traceback
+from datetime import datetime
+
+from .targets import key_to_address
+
+# Наибольшее число адресов в одной порции
+CHUNK_SIZE = 256
+
+# Сколько порций на процесс держать в очереди заданий
+CHUNKS_AHEAD = 2
+
+# Настройки сканера, передаваемые рабочим процессам
+WORKER_SETTINGS = (
+    'timeout', 'threads', 'concurrency', 'common_ports', 'discovery', 'sentinel_ports',
+    'body_budget', 'max_body_bytes', 'favicon', 'matcher', 'router_identifiers',
+)
+
+
+def iter_chunks(ranges, size):
+    """
+    Делит множество ключей адресов на порции
+
+    Args:
+        ranges (RangeSet): Адреса для сканирования
+        size (int): Наибольшее число адресов в порции
+
+    Yields:
+        list: Диапазоны ключей [начало, конец] одной порции
+    """
+    chunk, count = [], 0
+    for start, end in ranges.runs():
+        while start <= end:
+            stop = min(end, start + size - count - 1)
+            chunk.append([start, stop])
+            count += stop - start + 1
+            start = stop + 1
+            if count == size:
+                yield chunk
+                chunk, count = [], 0
+    if chunk:
+        yield chunk
+
+
+def chunk_network(chunk):
+    """Цели сканирования для порции в формате NetworkScanner.network"""
+    return ','.join(f"{key_to_address(start)}-{key_to_address(end)}" for start, end in chunk)
+
+
+def worker_main(scanner_class, settings, tasks, events):
+    """
+    Рабочий процесс: сканирует порции из tasks, пока не получит None
+
+    В events отправляются ('result', результат, 0) для каждой находки,
+    ('metrics', метрики порции, 0) и ('done', порция, число адресов)
+    после порции и ('error', текст, 0) при сбое. Ctrl-C обрабатывает родительский процесс.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        scanner = scanner_class()
+        for name, value in settings.items():
+            setattr(scanner, name, value)
+
+        # Вывод сканера по каждой порции не нужен - прогресс печатает родитель
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while True:
+                chunk = tasks.get()
+                if chunk is None:
+                    break
+                scanner.network = chunk_network(chunk)
+                for result in scanner.iter_scan():
+                    events.put(('result', result, 0))
+                events.put(('metrics', scanner.metrics.take(), 0))
+                events.put(('done', chunk, sum(end - start + 1 for start, end in chunk)))
+    except Exception:
+        events.put(('error', traceback.format_exc(), 0))
+
+
+def load_targets(scanner, mode):
+    """
+    Печатает заголовок сканирования и возвращает адреса, которые осталось проверить
+
+    Завершенные по контрольной точке сканера адреса исключаются.
+
+    Args:
+        scanner (NetworkScanner): Настроенный сканер
+        mode (str): Как выполняется сканирование, для заголовка
+
+    Returns:
+        TargetSet: Адреса или None, если цели не разобраны
+    """
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Начало сканирования сети {scanner.network} ({mode})")
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Проверяемые порты: {scanner.common_ports}")
+    print("-" * 80)
+
+    try:
+        targets = scanner.get_hosts()
+    except ValueError as e:
+        print(f"Ошибка в формате сети: {e}")
+        return None
+
+    checkpoint = scanner.checkpoint
+    if checkpoint is not None:
+        checkpoint.bind(scanner.network, scanner.common_ports)
+        total = len(targets)
+        targets = targets.without(checkpoint.completed)
+        if len(targets) < total:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Пропускаем {total - len(targets)} "
+                  f"адресов, завершенных в прошлый раз")
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Сканируем {len(targets)} адресов...")
+    return targets
+
+
+class ProcessScanner:
+    """
+    Запускает сканирование, настроенное в NetworkScanner, в нескольких процессах
+
+    Цели, порты, приемники и контрольная точка берутся из переданного
+    сканера; каждый процесс запускает его движок со своими threads
+    потоками (или concurrency пробами для asyncio).
+    """
+
+    def __init__(self, scanner, processes):
+        """
+        Args:
+            scanner (NetworkScanner): Настроенный сканер
+            processes (int): Число рабочих процессов
+        """
+        self.scanner = scanner
+        self.processes = max(1, processes)
+
+    def worker_settings(self):
+        """Настройки сканера для рабочих процессов"""
+        settings = {name: getattr(self.scanner, name) for name in WORKER_SETTINGS if hasattr(self.scanner, name)}
+        # Бюджет подключений в секунду общий: каждый процесс получает свою долю
+        limiter = getattr(self.scanner, 'rate_limiter', None)
+        if limiter is not None:
+            settings['rate_limiter'] = limiter.split(self.processes)
+        return settings
+
+    def iter_scan(self):
+        """
+        Сканирует все цели, отдавая результаты по мере нахождения
+
+        Результаты записываются в приемники сканера до выдачи; порция
+        отмечается в контрольной точке, когда получены все ее результаты.
+        При прерывании (Ctrl-C, закрытие генератора) рабочие процессы
+        останавливаются, а незавершенные порции при возобновлении
+        сканируются заново.
+
+        Yields:
+            dict: Найденный веб-интерфейс
+        """
+        scanner = self.scanner
+        checkpoint = scanner.checkpoint
+        targets = load_targets(scanner, f"{self.processes} процессов")
+        total = len(targets) if targets is not None else 0
+        if not total:
+            return
+
+        # Порции поменьше, чтобы даже небольшая сеть досталась всем процессам
+        size = max(1, min(CHUNK_SIZE, -(-total // (self.processes * 4))))
+        chunks = iter_chunks(targets.ranges, size)
+
+        # spawn: рабочие процессы не наследуют потоки и сокеты родителя
+        context = multiprocessing.get_context('spawn')
+        tasks = context.Queue()
+        events = context.Queue()
+        settings = self.worker_settings()
+        workers = [
+            context.Process(target=worker_main, args=(type(scanner), settings, tasks, events), daemon=True)
+            for _ in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        start_time = time.time()
+        pending = 0
+        completed = 0
+        next_report = step = max(1, total // 10)
+        exhausted = False
+        finished = False
+        try:
+            while True:
+                # Держим в очереди несколько порций на процесс, остальные еще не созданы
+                while not exhausted and pending < self.processes * CHUNKS_AHEAD:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        for _ in workers:
+                            tasks.put(None)
+                    else:
+                        tasks.put(chunk)
+                        pending += 1
+                if exhausted and not pending:
+                    break
+
+                try:
+                    kind, payload, count = events.get(timeout=0.5)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        raise RuntimeError("Рабочие процессы завершились, не закончив сканирование")
+                    continue
+
+                if kind == 'result':
+                    scanner.emit(payload)
+                    yield payload
+                elif kind == 'metrics':
+                    scanner.metrics.merge(payload)
+                elif kind == 'done':
+                    pending -= 1
+                    completed += count
+                    if checkpoint is not None:
+                        checkpoint.mark_runs(payload)
+                    # Прогресс каждые 10%
+                    if completed >= next_report:
+                        next_report = (completed // step + 1) * step
+                        progress = (completed / total) * 100
+                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Прогресс: {progress:.1f}% ({completed}/{total})")
+                else:
+                    raise RuntimeError(f"Ошибка в рабочем процессе:\n{payload}")
+            finished = True
+        finally:
+            for worker in workers:
+                if finished:
+                    worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+            # Невыбранные задания не должны задерживать выход из процесса
+            tasks.cancel_join_thread()
+            scanner.stage_timings['port_scan'] = time.time() - start_time
+            if checkpoint is not None:
+                checkpoint.flush(finished=finished)
+
+    def scan_network(self):
+        """Сканирует все цели, собирая результаты в self.scanner.results"""
+        for result in self.iter_scan():
+            self.scanner.results.append(result)
+            self.scanner.print_result(result)
+        return self.scanner.results
@@ -0,0 +1,294 @@
+"""
+Профилирование сканирования (--profile)
+
+Два режима:
+    cprofile  детерминированный профиль cProfile всех потоков сканера,
+              объединенный в один файл pstats
+    sampling  выборки стеков всех потоков каждые несколько миллисекунд:
+              pstats и свернутые стеки (collapsed) для flamegraph.pl,
+              speedscope или inferno
+
+Профили сохраняются в results/profile_<время>.pstats (и .collapsed),
+их можно открыть в snakeviz или `python -m pstats`.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Период выборок стеков в секундах
+SAMPLE_INTERVAL = 0.005
+
+# Сколько функций показывать в итогах
+TOP_FUNCTIONS = 15
+
+# Модули, в которых ждут простаивающие потоки: пул без заданий, главный
+# поток в ожидании результатов, цикл событий без готовых сокетов
+IDLE_MODULES = (
+    'threading.py', 'queue.py', 'selectors.py', os.path.join('concurrent', 'futures', 'thread.py'),
+)
+
+# Встроенные функции ожидания, которые не показываются в итогах
+WAIT_FUNCTIONS = ('acquire', 'sleep', 'select', 'poll', 'wait')
+
+# cProfile на sys.monitoring (3.12+) один на интерпретатор и ведет
+# общий стек вызовов всех потоков
+SHARED_PROFILER = sys.version_info >= (3, 12)
+
+
+def function_label(key):
+    """Подпись функции pstats: 'имя (файл:строка)' или встроенная '{...}'"""
+    filename, line, name = key
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def is_waiting(key):
+    """Встроенная функция ожидания (блокировка, sleep, select)"""
+    return key[0] == '~' and any(word in key[2] for word in WAIT_FUNCTIONS)
+
+
+class ThreadProfiler:
+    """
+    cProfile всех потоков, объединенный в один профиль
+
+    До Python 3.12 у каждого потока свой профилировщик: он включается
+    при первом вызове в потоке (threading.setprofile), а при остановке
+    профили складываются. С 3.12 профилировщик один на процесс и видит
+    все потоки сразу, но время функций параллельных потоков смешивается:
+    точные времена дает --threads 1 или режим sampling.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    def _start_thread(self, frame, event, arg):
+        """Включает профилировщик в новом потоке (заменяет эту функцию)"""
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if not SHARED_PROFILER:
+            threading.setprofile(self._start_thread)
+        self._start_thread(None, 'call', None)
+
+    def stop(self):
+        if not SHARED_PROFILER:
+            threading.setprofile(None)
+        for profile in self.profiles:
+            profile.disable()
+
+    def stats(self):
+        """
+        Returns:
+            pstats.Stats: Профиль всех потоков
+        """
+        return pstats.Stats(*self.profiles)
+
+    def collapsed(self):
+        """cProfile не хранит стеки, только пары вызывающий-вызываемый"""
+        return None
+
+
+class SamplingProfiler:
+    """
+    Выборочный профилировщик стеков всех потоков
+
+    Фоновый поток каждые interval секунд снимает стеки потоков
+    (sys._current_frames) и считает одинаковые стеки. Потоки, ждущие в
+    threading, queue или selectors, пропускаются. Накладные расходы не
+    зависят от числа вызовов функций, поэтому пропорции времени не
+    искажаются, а стеки разных рабочих потоков складываются.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        # Стек (от корня к листу) -> [число выборок, их суммарное время в секундах]
+        self.samples = collections.defaultdict(lambda: [0, 0.0])
+        self.stats = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            # Вес выборки - прошедшее время: поток мог проснуться позже
+            weight, last = now - last, now
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                sample = self.samples[tuple(reversed(stack))]
+                sample[0] += 1
+                sample[1] += weight
+
+    def create_stats(self):
+        """
+        Строит профиль в формате pstats (вызывается pstats.Stats)
+
+        ncalls - число выборок с функцией в стеке, tottime - время
+        выборок, где функция на вершине стека, cumtime - где она в стеке.
+        """
+        entries = {}
+
+        def entry(key):
+            if key not in entries:
+                entries[key] = [0, 0.0, 0.0, collections.defaultdict(lambda: [0, 0.0, 0.0])]
+            return entries[key]
+
+        for stack, (hits, weight) in list(self.samples.items()):
+            seen = set()
+            for depth, key in enumerate(stack):
+                current = entry(key)
+                leaf = depth == len(stack) - 1
+                if leaf:
+                    current[1] += weight
+                # Рекурсия учитывается в cumtime один раз
+                if key not in seen:
+                    seen.add(key)
+                    current[0] += hits
+                    current[2] += weight
+                if depth:
+                    caller = current[3][stack[depth - 1]]
+                    caller[0] += hits
+                    caller[1] += weight if leaf else 0.0
+                    caller[2] += weight
+
+        self.stats = {
+            key: (count, count, tottime, cumtime,
+                  {caller: (n, n, tt, ct) for caller, (n, tt, ct) in callers.items()})
+            for key, (count, tottime, cumtime, callers) in entries.items()
+        }
+
+    def collapsed(self):
+        """
+        Свернутые стеки: строка 'функция;функция;... микросекунды'
+
+        Returns:
+            list: Строки для flamegraph.pl, speedscope или inferno
+        """
+        lines = []
+        for stack, (_, weight) in sorted(self.samples.items()):
+            frames = ';'.join(function_label(key).replace(';', ':') for key in stack)
+            lines.append(f"{frames} {max(1, round(weight * 1_000_000))}")
+        return lines
+
+
+class ScanProfiler:
+    """
+    Профилирование сканирования в выбранном режиме
+
+        profiler = ScanProfiler('sampling')
+        profiler.start()
+        ...  # сканирование
+        profiler.stop()
+        paths = profiler.save('results')
+    """
+
+    def __init__(self, mode):
+        """
+        Args:
+            mode (str): 'cprofile' или 'sampling'
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode}")
+        self.mode = mode
+        self.profiler = ThreadProfiler() if mode == 'cprofile' else SamplingProfiler()
+        self.elapsed = 0.0
+        self._started = None
+
+    def start(self):
+        self.profiler.start()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """Останавливает профилирование (повторный вызов ничего не делает)"""
+        if self._started is None:
+            return
+        self.profiler.stop()
+        self.elapsed = time.perf_counter() - self._started
+        self._started = None
+
+    def stats(self):
+        """Профиль в виде pstats.Stats или None, если ничего не записано"""
+        try:
+            return pstats.Stats(self.profiler) if self.mode == 'sampling' else self.profiler.stats()
+        except TypeError:
+            # pstats не создает пустой профиль
+            return None
+
+    def top(self, limit=TOP_FUNCTIONS):
+        """
+        Функции с наибольшим собственным временем, без встроенных ожиданий
+
+        Returns:
+            list: (подпись, число вызовов, tottime, cumtime)
+        """
+        stats = self.stats()
+        if stats is None:
+            return []
+        rows = [
+            (function_label(key), calls, tottime, cumtime)
+            for key, (_, calls, tottime, cumtime, _) in stats.stats.items()
+            if not is_waiting(key)
+        ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+    def save(self, directory='results', name=None):
+        """
+        Сохраняет профиль
+
+        Args:
+            directory (str): Папка для файлов
+            name (str): Имя файлов без расширения (по умолчанию profile_<время>)
+
+        Returns:
+            list: Пути сохраненных файлов (.pstats и, для sampling, .collapsed)
+        """
+        stats = self.stats()
+        if stats is None:
+            return []
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = name or f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        pstats_path = directory / f"{name}.pstats"
+        stats.dump_stats(pstats_path)
+        paths = [pstats_path]
+
+        collapsed = self.profiler.collapsed()
+        if collapsed is not None:
+            collapsed_path = directory / f"{name}.collapsed"
+            with open(collapsed_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(collapsed) + '\n')
+            paths.append(collapsed_path)
+        return paths
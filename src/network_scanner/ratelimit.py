@@ -0,0 +1,142 @@
+"""
+Ограничение скорости сканирования
+
+Глобальный бюджет попыток подключения в секунду (каждая - один SYN)
+раздается ведром токенов, а число одновременных подключений к одному
+хосту ограничено. Порты каждого хоста проверяются с разного места
+списка, а asyncio-движок чередует хосты внутри блока, поэтому хрупкие
+встроенные веб-серверы не получают все пробы разом, а сеть остается
+загруженной за счет соседних хостов.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+
+from .targets import address_to_key
+
+
+class TokenBucket:
+    """
+    Ведро токенов с бронированием
+
+    Токен можно взять в долг: вызывающий получает время, которое нужно
+    подождать, и ждет без блокировки остальных. Поэтому очередность
+    ожидающих сохраняется, а скорость не превышает rate.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Токенов в секунду
+            burst (float): Емкость ведра (по умолчанию десятая часть секунды, но не меньше 1)
+            clock (callable): Источник времени
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate / 10)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Бронирует токены
+
+        Returns:
+            float: Сколько секунд подождать перед использованием
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def wait(self, tokens=1):
+        """Ждет токены в текущем потоке"""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, tokens=1):
+        """Ждет токены в цикле событий"""
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """Глобальный предел подключений в секунду и предел одновременных подключений к хосту"""
+
+    def __init__(self, rate=None, per_host=None, burst=None):
+        """
+        Args:
+            rate (float): Попыток подключения в секунду на все хосты (None - без предела)
+            per_host (int): Одновременных подключений к одному хосту (None - без предела)
+            burst (float): Емкость ведра токенов
+        """
+        self.rate = rate
+        self.per_host = per_host
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+    def split(self, parts):
+        """Ограничитель для одной из parts частей сканирования, делящих общий бюджет"""
+        rate = self.rate / parts if self.rate else None
+        burst = self.bucket.burst / parts if self.bucket is not None else None
+        return RateLimiter(rate, self.per_host, burst)
+
+    def wait(self):
+        """Ждет разрешения на следующее подключение (движок на потоках)"""
+        if self.bucket is not None:
+            self.bucket.wait()
+
+    async def wait_async(self):
+        """Ждет разрешения на следующее подключение (asyncio)"""
+        if self.bucket is not None:
+            await self.bucket.wait_async()
+
+
+def rotated_ports(ports, ip):
+    """
+    Порты хоста, начиная с зависящего от адреса места списка
+
+    Соседние хосты проверяются с разных портов, поэтому сканирование не
+    выглядит как волна подключений к одному порту всей сети.
+    """
+    ports = list(ports)
+    if not ports:
+        return ports
+    offset = address_to_key(ip) % len(ports)
+    return ports[offset:] + ports[:offset]
+
+
+def interleave(hosts, ports, block):
+    """
+    Пробы (хост, порт) с чередованием хостов
+
+    Хосты берутся блоками по block: сначала первый порт каждого хоста
+    блока, затем второй и т.д., так что между пробами одного хоста
+    проходят пробы остальных хостов блока.
+
+    Yields:
+        tuple: (ip, порт)
+    """
+    hosts = iter(hosts)
+    while True:
+        chunk = [(ip, rotated_ports(ports, ip)) for ip in itertools.islice(hosts, block)]
+        if not chunk:
+            return
+        for index in range(len(ports)):
+            for ip, host_ports in chunk:
+                yield ip, host_ports[index]
@@ -4,103 +4,254 @@ Network Scanner - сканер веб-интерфейсов в локально
 """
 
 import socket
+import threading
 import concurrent.futures
-import ipaddress
+import itertools
 import requests
 import argparse
 import time
 from datetime import datetime
-import json
 from pathlib import Path
+from urllib.parse import urljoin
 import urllib3
+from requests.adapters import HTTPAdapter
+
+from .adaptive import classify_connect, is_connection_reset
+from .cache import ClassificationCache, page_key
+from .discovery import HostDiscovery
+from .encoding import detect_charset, repair_mojibake
+from .fingerprints import default_matcher, favicon_hash
+from .http_client import CHUNK_SIZE, BoundedBody, PageResponse, create_ssl_context, is_html_content_type
+from .metrics import ScanMetrics
+from .models import ScanResult
+from .output import format_result
+from .ratelimit import rotated_ports
+from .sinks import read_jsonl, unique_results, write_json_report
+from .store import body_hash, conditional_headers, reuse_result
+from .targets import TargetSet
+from .utils import SUBMIT_AHEAD, connect_many
 
 # Отключаем предупреждения о SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Путь к favicon для сигнатур по его хешу
+FAVICON_PATH = '/favicon.ico'
+
+# Заголовки HTTP-запросов, общие для всех движков сканирования
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 Network Scanner',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+class ScannerHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter с общим SSL-контекстом и передачей готовых соединений
+    
+    Один SSL-контекст без проверки сертификатов используется всеми
+    пулами, а уже установленный при проверке порта сокет можно отдать
+    в пул, чтобы GET-запрос ушел по нему без повторного рукопожатия.
+    """
+    
+    def __init__(self, ssl_context=None, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+    
+    def adopt_connection(self, url, sock):
+        """
+        Кладет установленное TCP-соединение в пул для указанного URL
+        
+        Поддерживаются только http:// URL: для HTTPS рукопожатие TLS
+        выполняет сам urllib3.
+        
+        Returns:
+            bool: True, если соединение принято пулом
+        """
+        if not url.startswith('http://'):
+            return False
+        try:
+            # Пул берем так же, как его выберет сам адаптер при запросе
+            if hasattr(self, 'get_connection_with_tls_context'):
+                request = requests.Request('GET', url).prepare()
+                pool = self.get_connection_with_tls_context(request, verify=False)
+            else:
+                pool = self.get_connection(url)
+            conn = pool._get_conn()
+            conn.sock = sock
+            pool._put_conn(conn)
+            return True
+        except Exception:
+            # Внутренний API urllib3 мог измениться - просто подключимся заново
+            return False
+
 class NetworkScanner:
     def __init__(self, network="192.168.1.0/24", timeout=2, threads=50):
         """
         Инициализация сканера
         
         Args:
-            network (str): Сетевая маска в формате CIDR
+            network (str | list): Сеть в формате CIDR, адрес или диапазон;
+                несколько целей - списком или через запятую
             timeout (int): Таймаут подключения в секундах
             threads (int): Количество потоков для сканирования
         """
+        # Несколько целей хранятся одной строкой через запятую: так их
+        # одинаково печатают отчеты и записывает контрольная точка
+        if not isinstance(network, str):
+            network = ','.join(str(spec) for spec in network)
         self.network = network
+        # Исключаемые из сканирования сети, адреса и диапазоны
+        self.exclude = []
         self.timeout = timeout
         self.threads = threads
         self.results = []
         self.common_ports = [80, 443, 8080, 8443, 8888, 8000, 8081]
         
+        # Предварительный поиск живых хостов (ARP/ICMP/TCP) перед сканированием портов
+        self.discovery = False
+        self.sentinel_ports = None
+        # Время выполнения этапов сканирования в секундах
+        self.stage_timings = {}
+        # Приемники, получающие каждый результат сразу после нахождения
+        self.sinks = []
+        # Журнал завершенных хостов для возобновления (checkpoint.Checkpoint)
+        self.checkpoint = None
+        # Подстройка таймаута подключения и параллельности (adaptive.AdaptiveController)
+        self.adaptive = None
+        # Бюджет подключений в секунду и предел подключений к хосту (ratelimit.RateLimiter)
+        self.rate_limiter = None
+        # Прошлые результаты для условных запросов и пропуска классификации (store.ResultStore)
+        self.store = None
+        # Время этапов проверки и счетчики ошибок (metrics.ScanMetrics)
+        self.metrics = ScanMetrics()
+        
+        # Сколько байт тела читать после </title> (0 - загружать тело целиком)
+        # и предел для страниц без заголовка
+        self.body_budget = 8 * 1024
+        self.max_body_bytes = 64 * 1024
+        
+        # HTTP-сессии с keep-alive, по одной на рабочий поток
+        self._local = threading.local()
+        self._ssl_context = None
+        
+        # Правила определения устройств из базы отпечатков, скомпилированные
+        # в один проход по тексту; load_fingerprints подключает свою базу
+        self.matcher = default_matcher()
+        # Загружать /favicon.ico для сигнатур по хешу favicon (лишний запрос на сервис)
+        self.favicon = False
+        
+        # Результаты классификации одинаковых страниц (cache.ClassificationCache), None - без кеша
+        self.classify_cache = ClassificationCache()
+        
         # Известные веб-интерфейсы маршрутизаторов
-        self.router_identifiers = [
-            "router", "asus", "tplink", "dlink", "linksys", "netgear",
-            "zyxel", "mikrotik", "ubiquiti", "pfsense", "opnsense",
-            "admin", "login", "web", "management", "configuration"
-        ]
+        self.router_identifiers = self.matcher.router_identifiers
     
     def check_port(self, ip, port):
         """Проверяет, открыт ли порт на указанном IP"""
         try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
+            sock.settimeout(self.connect_timeout())
             result = sock.connect_ex((str(ip), port))
             sock.close()
             return result == 0
         except Exception:
             return False
-    def analyze_device_type(self, title, content, server=""):
-        """Анализирует тип устройства по содержимому"""
-        full_text = (title + ' ' + content[:1000]).lower()
+
+    def connect_timeout(self):
+        """Таймаут подключения: подобранный контроллером или self.timeout"""
+        return self.adaptive.timeout if self.adaptive is not None else self.timeout
     
-        device_types = {
-            'router': {
-                'keywords': ['router', 'gateway', 'wireless', 'wifi', 'wan', 'lan',
-                            '小米', 'huawei', 'tplink', 'asus', 'dlink', 'netgear'],
-                'signs': [('login', 'password'), ('admin', 'settings')],
-                'server_hints': ['nginx', 'lighttpd', 'busybox', 'httpd']
-            },
-            'nas': {
-                'keywords': ['nas', 'synology', 'qnap', 'wd', 'seagate', 'storage'],
-                'signs': [('share', 'folder'), ('disk', 'volume')]
-            },
-            'camera': {
-                'keywords': ['camera', 'ipcam', 'dvr', 'nvr', 'surveillance'],
-                'signs': [('video', 'stream'), ('ptz', 'zoom')]
-            },
-            'printer': {
-                'keywords': ['printer', 'hp', 'canon', 'epson', 'brother', 'print'],
-                'signs': [('print', 'scan'), ('toner', 'cartridge')]
-            }
-        }
+    def probe_ports(self, ip, ports, keep_open=False):
+        """
+        Проверяет все порты хоста одновременно
+        
+        Открывает неблокирующие соединения сразу на все порты и отдает
+        открытые порты по мере ответа, поэтому ожидание для хоста
+        ограничено одним таймаутом, а не таймаутом на каждый порт.
+        С ограничителем скорости (self.rate_limiter) подключения ждут
+        токенов общего бюджета, к хосту открыто не больше per_host
+        соединений, а порты перебираются с зависящего от адреса места.
+        
+        Args:
+            ip (str): IP-адрес хоста
+            ports (list): Порты для проверки
+            keep_open (bool): Отдавать установленные соединения для HTTP-запроса
+        
+        Yields:
+            int: Номер открытого порта, или (порт, сокет) при keep_open=True
+        """
+        adaptive = self.adaptive
+        metrics = self.metrics
+        
+        def observe(port, error, rtt):
+            metrics.record_connect(error, rtt)
+            if adaptive is not None:
+                adaptive.record_port(ip, classify_connect(error), rtt)
+        
+        limiter = self.rate_limiter
+        gate = max_parallel = None
+        if limiter is not None:
+            ports = rotated_ports(ports, ip)
+            gate = limiter.wait if limiter.bucket is not None else None
+            max_parallel = limiter.per_host
+        
+        # Таймаут HTTP по установленному соединению остается self.timeout:
+        # страница может готовиться дольше, чем идет ответ на подключение
+        try:
+            for port, error, sock in connect_many(ip, ports, self.connect_timeout(), keep_open=keep_open,
+                                                  io_timeout=self.timeout, observe=observe,
+                                                  gate=gate, max_parallel=max_parallel):
+                # HTTP-проверку запускаем сразу, не дожидаясь остальных портов
+                if error == 0:
+                    yield (port, sock) if keep_open else port
+        finally:
+            if adaptive is not None:
+                adaptive.finish_host(ip)
     
-        for device_type, rules in device_types.items():
-            # Проверяем ключевые слова
-            keyword_score = sum(1 for kw in rules['keywords'] if kw in full_text)
-            
-            # Проверяем пары признаков
-            sign_score = 0
-            for sign_pair in rules.get('signs', []):
-                if all(sign in full_text for sign in sign_pair):
-                    sign_score += 2
+    def get_session(self):
+        """Возвращает HTTP-сессию текущего потока (создает при первом вызове)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            if self._ssl_context is None:
+                self._ssl_context = create_ssl_context(observe=self.metrics.observe)
             
-            # Проверяем серверные подсказки
-            server_score = 0
-            if server and 'server_hints' in rules:
-                server_score = sum(1 for hint in rules['server_hints'] if hint in server.lower())
-            
-            total_score = keyword_score + sign_score + server_score
-            
-            if device_type == 'router' and total_score >= 2:
-                return 'router'
-            elif device_type != 'router' and total_score >= 3:
-                return device_type
-        
-        return 'unknown'
+            # Поток сканирует один хост за раз: по пулу на каждую пару схема/порт
+            adapter = ScannerHTTPAdapter(
+                ssl_context=self._ssl_context,
+                pool_connections=2 * len(self.common_ports),
+                pool_maxsize=2,
+                max_retries=0
+            )
+            session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+    
+    def release_connections(self):
+        """Закрывает keep-alive соединения сессии текущего потока"""
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            session.get_adapter('http://').poolmanager.clear()
+
+    def load_fingerprints(self, path):
+        """Подключает свою базу отпечатков (JSON или YAML) вместо встроенной"""
+        self.matcher = default_matcher(str(path))
+        self.router_identifiers = self.matcher.router_identifiers
 
-    def check_web_service(self, ip, port):
-        """Проверяет веб-сервис на порту"""
+    def analyze_device_type(self, title, content, server=""):
+        """Анализирует тип устройства по содержимому"""
+        return self.matcher.device_type(title, content, server)
+
+    def candidate_urls(self, ip, port):
+        """Возвращает список URL для проверки веб-сервиса на порту"""
         # Определяем схему по порту
         if port in [443, 8443]:
             urls_to_try = [f"https://{ip}:{port}"]
@@ -110,63 +261,203 @@ class NetworkScanner:
         # Для HTTPS портов пробуем и HTTP тоже
         if port in [443, 8443]:
             urls_to_try.append(f"http://{ip}:{port}")
+
+        return urls_to_try
+
+    def check_web_service(self, ip, port, sock=None):
+        """
+        Проверяет веб-сервис на порту
         
-        for url in urls_to_try:
-            try:
-                response = requests.get(
-                    url, 
-                    timeout=self.timeout,
-                    allow_redirects=True,
-                    verify=False,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 Network Scanner',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    }
-                )
-                
-                # Определяем кодировку
-                encoding = self.detect_encoding(response)
-                response.encoding = encoding
-                
-                # Извлекаем заголовок
-                title = self.extract_title(response.text)
-                
-                server = response.headers.get('Server', 'Unknown')
-                content_type = response.headers.get('Content-Type', '')
-                
-                # Анализируем тип устройства
-                device_type = self.analyze_device_type(title, response.text, server)
-                is_router = device_type == 'router'
-                
-                # Если не определилось, используем старую логику как fallback
-                if device_type == 'unknown':
-                    is_router = self.is_router_interface(title, response.text, content_type)
-                    device_type = 'router' if is_router else 'unknown'
-                
-                return {
-                    'ip': str(ip),
-                    'port': port,
-                    'url': url,
-                    'status_code': response.status_code,
-                    'title': title,
-                    'server': server,
-                    'content_type': content_type,
-                    'is_router': is_router,
-                    'device_type': device_type,  # Добавляем поле с типом устройства
-                    'content_length': len(response.text),
-                    'encoding': encoding,
-                }
+        Args:
+            ip (str): IP-адрес хоста
+            port (int): Порт
+            sock (socket.socket): Уже установленное соединение с портом; если
+                передано, HTTP-запрос уходит по нему без нового подключения
+        """
+        session = self.get_session()
+        previous = self.store.lookup(ip, port) if self.store is not None else None
+        try:
+            for url in self.candidate_urls(ip, port):
+                if sock is not None and session.get_adapter(url).adopt_connection(url, sock):
+                    sock = None
                 
-            except requests.exceptions.SSLError:
-                # Если SSL ошибка, переходим к следующему URL
-                continue
-            except requests.exceptions.RequestException:
-                continue
-            except Exception:
-                continue
+                try:
+                    response = self.fetch_page(session, url, headers=conditional_headers(previous, url))
+                    # Страница не изменилась с прошлого сканирования - классификация та же
+                    result = reuse_result(previous, url, response)
+                    if result is not None:
+                        return result
+                    favicon = self.fetch_favicon(session, response.url) if self.wants_favicon() else None
+                    return self.build_result(ip, port, url, response, favicon=favicon)
+                    
+                except requests.exceptions.SSLError:
+                    # Если SSL ошибка, переходим к следующему URL
+                    self.metrics.increment('tls_errors')
+                    continue
+                except requests.exceptions.RequestException as e:
+                    if is_connection_reset(e):
+                        self.metrics.increment('connection_resets')
+                        if self.adaptive is not None:
+                            self.adaptive.record_reset()
+                    else:
+                        self.metrics.increment('http_errors')
+                    continue
+                except Exception:
+                    continue
+        finally:
+            if sock is not None:
+                sock.close()
         
         return None
 
+    def fetch_page(self, session, url, headers=None):
+        """
+        Загружает страницу, читая тело потоком с ограничением размера
+        
+        Тело читается блоками до </title> плюс body_budget байт (или до
+        max_body_bytes), тело не-HTML ответов не читается совсем, поэтому
+        память на один запрос не зависит от размера страницы. Время до
+        заголовков ответа и чтения тела записывается в self.metrics как
+        first_byte и body; для HTTPS first_byte включает рукопожатие TLS.
+        
+        Args:
+            session (requests.Session): Сессия потока
+            url (str): URL страницы
+            headers (dict): Дополнительные заголовки (условный запрос)
+        
+        Returns:
+            PageResponse: Ответ с прочитанной частью тела
+        """
+        with self.metrics.timer('first_byte'):
+            response = session.get(
+                url, 
+                headers=headers,
+                timeout=self.timeout,
+                allow_redirects=True,
+                verify=False,
+                stream=True
+            )
+        try:
+            body = BoundedBody(self.body_budget, self.max_body_bytes)
+            if is_html_content_type(response.headers.get('Content-Type', '')):
+                started = time.perf_counter()
+                try:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if not body.feed(chunk):
+                            break
+                except requests.exceptions.RequestException:
+                    # Оборвалось посреди тела - классифицируем то, что успели прочитать
+                    pass
+                self.metrics.observe('body', time.perf_counter() - started)
+            return PageResponse(url, response.status_code, response.headers, body.content)
+        finally:
+            response.close()
+
+    def wants_favicon(self):
+        """Нужно ли загружать favicon: включено и в базе есть сигнатуры по его хешу"""
+        return self.favicon and bool(self.matcher.favicon_index)
+
+    def fetch_favicon(self, session, page_url):
+        """
+        Загружает /favicon.ico сервиса и считает его хеш
+
+        Returns:
+            str: Хеш favicon или None, если его нет
+        """
+        try:
+            response = session.get(
+                urljoin(page_url, FAVICON_PATH),
+                timeout=self.timeout,
+                verify=False,
+                stream=True
+            )
+        except requests.exceptions.RequestException:
+            return None
+        try:
+            if response.status_code != 200:
+                return None
+            content = b''
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                content += chunk
+                if len(content) > self.max_body_bytes:
+                    # Хеш обрезанного файла все равно ни с чем не совпадет
+                    return None
+            return favicon_hash(content) if content else None
+        except requests.exceptions.RequestException:
+            return None
+        finally:
+            response.close()
+
+    def build_result(self, ip, port, url, response, favicon=None):
+        """
+        Классифицирует ответ веб-сервиса и формирует результат (models.ScanResult)
+
+        Общая часть для всех движков сканирования: принимает любой объект
+        с атрибутами status_code, headers, content, text и encoding.
+        favicon - хеш favicon сервиса, если он загружался.
+        """
+        server = response.headers.get('Server', 'Unknown')
+        content_type = response.headers.get('Content-Type', '')
+        
+        # Одинаковые страницы (одна модель устройства) разбираются один раз
+        cache = self.classify_cache
+        entry = key = None
+        if cache is not None:
+            key = page_key(self.matcher.digest, server, content_type, response.content, favicon)
+            entry = cache.get(key)
+        if entry is None:
+            entry = self.classify_page(response, server, favicon)
+            if cache is not None:
+                cache.put(key, entry)
+        
+        # Тело могло быть прочитано не полностью, поэтому размер берем из заголовка
+        try:
+            content_length = int(response.headers.get('Content-Length'))
+        except (TypeError, ValueError):
+            content_length = len(response.content)
+        
+        return ScanResult(
+            ip=str(ip),
+            port=port,
+            url=url,
+            status_code=response.status_code,
+            title=entry['title'],
+            server=server,
+            content_type=content_type,
+            is_router=entry['is_router'],
+            device_type=entry['device_type'],
+            vendor=entry['vendor'],
+            matched_rules=entry['matched_rules'],
+            content_length=content_length,
+            encoding=entry['encoding'],
+            # Валидаторы для инкрементальных сканирований
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_hash=body_hash(response.content),
+        )
+
+    def classify_page(self, response, server, favicon=None):
+        """
+        Разбирает страницу: кодировка, заголовок и классификация устройства
+        
+        Returns:
+            dict: title, encoding, device_type, vendor, is_router и matched_rules
+        """
+        # Определяем кодировку
+        with self.metrics.timer('detect_encoding'):
+            encoding = self.detect_encoding(response)
+        response.encoding = encoding
+        
+        with self.metrics.timer('classify'):
+            text = response.text
+            
+            # Извлекаем заголовок
+            title = self.extract_title(text)
+            
+            # Анализируем тип устройства (с проверкой признаков роутера как fallback)
+            classification = self.matcher.classify(title, text, server, favicon)
+        return dict(classification, title=title, encoding=encoding)
+
     def detect_encoding(self, response):
         """Автоматически определяет кодировку ответа"""
         # Сначала проверяем заголовки
@@ -181,37 +472,12 @@ class NetworkScanner:
                 charset = charset.lower().replace('utf8', 'utf-8')
                 return charset
         
-        # Пробуем определить по содержимому
+        # Определяем по содержимому: BOM, <meta charset> и статистика байтов
+        # начала страницы вместо пробного декодирования всего тела
         content = response.content if hasattr(response, 'content') else response.text
-        
-        # Список кодировок для проверки (UTF-8 имеет наивысший приоритет)
-        encodings_to_try = [
-            'utf-8',  # Первый приоритет - UTF-8
-            'gbk', 'gb2312', 'gb18030', 'big5',
-            'windows-1251', 'iso-8859-1', 'iso-8859-5',
-            'shift-jis', 'euc-jp', 'cp866'
-        ]
-        
-        for encoding in encodings_to_try:
-            try:
-                # Пробуем декодировать
-                if isinstance(content, bytes):
-                    decoded = content.decode(encoding, errors='strict')
-                else:
-                    # Если уже строка, проверяем можно ли закодировать и декодировать обратно
-                    content.encode('utf-8').decode(encoding)
-                    decoded = content
-                
-                # Проверяем на наличие явно неправильных символов
-                if self.has_garbled_text(decoded):
-                    continue
-                    
-                return encoding
-            except (UnicodeDecodeError, UnicodeEncodeError):
-                continue
-        
-        # Если ничего не подошло, возвращаем UTF-8 по умолчанию
-        return 'utf-8'
+        if not isinstance(content, bytes):
+            return 'utf-8'
+        return detect_charset(content)
 
     def has_garbled_text(self, text):
         """Проверяет, содержит ли текст явно испорченные символы"""
@@ -253,210 +519,216 @@ class NetworkScanner:
         return "No title"
 
     def fix_common_encoding_issues(self, text):
-        """Исправляет распространенные проблемы с кодировкой"""
-        if not text:
-            return text
-        
-        # Специальный случай: Xiaomi роутер (наша главная задача!)
-        if "å°ç±³è·¯ç±å¨" in text:
-            text = text.replace("å°ç±³è·¯ç±å¨", "小米路由器")
-        
-        # Словарь замен для UTF-8 неправильно декодированного как Latin-1
-        # Это когда UTF-8 байты интерпретируются как Latin-1
-        utf8_latin1_fixes = {
-            # Двухбайтовые UTF-8 символы (C3 xx в UTF-8)
-            'Ã¡': 'á', 'Ã©': 'é', 'Ã': 'í', 'Ã³': 'ó', 'Ãº': 'ú',
-            'Ã±': 'ñ', 'Ã¼': 'ü', 'Ã§': 'ç', 'Ã¤': 'ä', 'Ã¶': 'ö',
-            'Ã¬': 'ì', 'Ãª': 'ê', 'Ã«': 'ë', 'Ã¨': 'è', 'Ã¢': 'â',
-            'Ã£': 'ã', 'Ã¥': 'å', 'Ã¦': 'æ', 'Ã°': 'ð', 'Ã²': 'ò',
-            'Ã´': 'ô', 'Ãµ': 'õ', 'Ã¸': 'ø', 'Ã¹': 'ù', 'Ã»': 'û',
-            'Ã½': 'ý', 'Ã¾': 'þ',
-            
-            # Трехбайтовые UTF-8 символы (E2 82 AC в UTF-8 = €)
-            'â‚¬': '€', 'â€š': '‚', 'â€ž': '„', 'â€¦': '…',
-            'â€¡': '‡', 'â€°': '‰', 'â€¹': '‹', 'â€˜': '‘',
-            'â€™': '’', 'â€œ': '“', 'â€�': '”', 'â€¢': '•',
-            'â€“': '–', 'â€”': '—', 'â„¢': '™', 'â€º': '›',
-            'â€¼': '¼', 'â€½': '½', 'â€¾': '¾',
-        }
-        
-        # Применяем замены
-        for wrong, correct in utf8_latin1_fixes.items():
-            if wrong in text:
-                text = text.replace(wrong, correct)
-        
-        # Специальная обработка: если видим паттерн UTF-8 → Latin-1
-        # Пробуем перекодировать: text -> bytes(latin-1) -> decode(utf-8)
-        try:
-            # Проверяем есть ли признаки неправильной кодировки
-            if any(char in text for char in ['Ã', 'â', '€']):
-                # Пробуем исправить автоматически
-                try:
-                    # Если текст содержит Latin-1 представление UTF-8
-                    fixed = text.encode('latin-1', errors='ignore').decode('utf-8', errors='ignore')
-                    # Проверяем что результат лучше
-                    if fixed and len(fixed) > 0 and not self.has_garbled_text(fixed):
-                        return fixed
-                except (UnicodeEncodeError, UnicodeDecodeError):
-                    pass
-        except Exception:
-            pass
+        """
+        Исправляет распространенные проблемы с кодировкой
         
-        return text
+        UTF-8, прочитанный как Latin-1/windows-1252, исправляется за один
+        проход (см. encoding.repair_mojibake).
+        """
+        return repair_mojibake(text)[0]
     
     def is_router_interface(self, title, content, content_type=""):
         """Проверяет, похож ли контент на интерфейс роутера"""
-        if not title and len(content) < 100:
-            return False
-        
-        # Собираем весь текст для анализа
-        full_text = title + ' ' + content[:1000]
-        text_lower = full_text.lower()
-        
-        # Список производителей и их идентификаторов
-        manufacturers = {
-            'xiaomi': ['小米', 'xiaomi', 'mi router', 'redmi', 'å°ç±³'],
-            'huawei': ['华为', 'huawei'],
-            'tp-link': ['tplink', 'tp-link', '普联'],
-            'asus': ['asus', '华硕'],
-            'd-link': ['dlink', 'd-link', '友讯'],
-            'netgear': ['netgear'],
-            'pfsense': ['pfsense'],
-            'ubiquiti': ['ubiquiti', 'unifi'],
-            'mikrotik': ['mikrotik', 'routeros'],
-            'generic': [
-                '路由器', 'router', 'gateway', 
-                '无线路由器', 'wireless router',
-                '管理界面', 'admin panel',
-                '登录', 'login', 'sign in',
-                '设置', 'settings', 'configuration'
-            ]
-        }
-        
-        # Проверяем производителей
-        for brand, keywords in manufacturers.items():
-            for keyword in keywords:
-                # Для китайских иероглифов ищем без учета регистра
-                if keyword in full_text or keyword.lower() in text_lower:
-                    # Особенно если это Xiaomi с "路由器"
-                    if brand == 'xiaomi' and '路由器' in full_text:
-                        return True
-                    # Для других брендов проверяем дополнительные признаки
-                    elif any(marker in text_lower for marker in ['admin', 'login', 'wireless', 'wan']):
-                        return True
-                    elif brand in ['pfsense', 'ubiquiti', 'mikrotik']:
-                        return True
-        
-        # Общие признаки веб-интерфейсов роутеров
-        common_signs = [
-            ('login', 'password'),
-            ('wireless', 'settings'),
-            ('wan', 'lan'),
-            ('admin', 'configuration'),
-        ]
-        
-        for sign_pair in common_signs:
-            if all(sign in text_lower for sign in sign_pair):
-                return True
-        
-        # Дополнительная проверка для HTML форм входа
-        if '<form' in content.lower() and any(field in content.lower() for field in ['password', 'username', 'login']):
-            return True
-        
-        return False
+        return self.matcher.is_router(title, content)
     
     def scan_ip(self, ip):
         """Сканирует один IP-адрес"""
         ip_results = []
         
-        # Сначала проверяем стандартные порты
-        for port in self.common_ports:
-            if self.check_port(ip, port):
-                web_info = self.check_web_service(ip, port)
+        # Все порты проверяем одновременно, веб-сервис - как только порт ответил.
+        # Соединение проверки порта используется и для HTTP-запроса
+        try:
+            for port, sock in self.probe_ports(ip, self.common_ports, keep_open=True):
+                web_info = self.check_web_service(ip, port, sock=sock)
                 if web_info:
                     ip_results.append(web_info)
+        finally:
+            # Соединения с этим хостом другим хостам не пригодятся
+            self.release_connections()
         
         return ip_results
     
-    def scan_network(self):
-        """Сканирует всю сеть"""
+    def get_hosts(self):
+        """
+        Возвращает адреса для сканирования
+        
+        Returns:
+            TargetSet: Ленивый набор адресов (len() и обход без списка строк)
+        """
+        return TargetSet(self.network, exclude=self.exclude)
+    
+    def discover_hosts(self, ip_list):
+        """
+        Оставляет в списке только живые хосты, если включено обнаружение
+        
+        Время этапа записывается в stage_timings['discovery'].
+        """
+        if not self.discovery:
+            return ip_list
+        
+        start_time = time.time()
+        discovery = HostDiscovery(
+            timeout=self.timeout,
+            threads=self.threads,
+            sentinel_ports=self.sentinel_ports,
+            rate_limiter=self.rate_limiter
+        )
+        live_hosts = discovery.discover(ip_list)
+        self.stage_timings['discovery'] = time.time() - start_time
+        
+        methods = ', '.join(f"{method}: {count}" for method, count in discovery.found_by.items())
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Живых хостов: {len(live_hosts)} из {len(ip_list)} "
+              f"({methods}) за {self.stage_timings['discovery']:.2f} с")
+        return live_hosts
+    
+    def prepare_hosts(self, ip_list):
+        """
+        Оставляет хосты, которые нужно сканировать
+        
+        Убирает хосты, завершенные по контрольной точке (self.checkpoint),
+        и, если включено обнаружение, неживые хосты; последние сразу
+        отмечаются в контрольной точке как завершенные. Без обнаружения
+        набор адресов остается ленивым.
+        
+        Args:
+            ip_list (TargetSet): Адреса из get_hosts
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.bind(self.network, self.common_ports)
+            total = len(ip_list)
+            ip_list = ip_list.without(self.checkpoint.completed)
+            if len(ip_list) < total:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Пропускаем {total - len(ip_list)} "
+                      f"адресов, завершенных в прошлый раз")
+        
+        if not self.discovery:
+            return ip_list
+        
+        live_hosts = self.discover_hosts(ip_list)
+        if self.checkpoint is not None and len(live_hosts) < len(ip_list):
+            # Неживые отмечаются диапазонами, без перебора адресов
+            self.checkpoint.mark_runs(ip_list.ranges.difference(live_hosts.ranges).runs())
+        return live_hosts
+    
+    def emit(self, result):
+        """Передает найденный результат всем приемникам (self.sinks)"""
+        for sink in self.sinks:
+            sink.write(result)
+    
+    def iter_scan(self):
+        """
+        Сканирует всю сеть, отдавая результаты по мере нахождения
+        
+        Результаты не накапливаются в self.results, поэтому память не
+        зависит от числа находок; каждый результат до выдачи записывается
+        в приемники self.sinks.
+        
+        Yields:
+            dict: Найденный веб-интерфейс
+        """
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Начало сканирования сети {self.network}")
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Проверяемые порты: {self.common_ports}")
         print("-" * 80)
         
         # Генерируем список IP-адресов
         try:
-            network = ipaddress.ip_network(self.network, strict=False)
-            ip_list = [str(ip) for ip in network.hosts()]
+            ip_list = self.get_hosts()
         except ValueError as e:
             print(f"Ошибка в формате сети: {e}")
-            return []
+            return
         
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Сканируем {len(ip_list)} адресов...")
+        ip_list = self.prepare_hosts(ip_list)
+        total = len(ip_list)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Сканируем {total} адресов...")
+        start_time = time.time()
+        finished = False
         
-        # Используем ThreadPoolExecutor для многопоточного сканирования
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
-            # Запускаем сканирование для каждого IP
-            future_to_ip = {executor.submit(self.scan_ip, ip): ip for ip in ip_list}
-            
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_ip), 1):
-                future_to_ip[future]
-                try:
-                    results = future.result()
-                    if results:
-                        for result in results:
-                            self.results.append(result)
-                            self.print_result(result)
-                except Exception:
-                    pass
+        try:
+            # Используем ThreadPoolExecutor для многопоточного сканирования
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+                # Адреса берутся из ленивого набора по мере освобождения потоков,
+                # поэтому одновременно существует не больше threads * SUBMIT_AHEAD задач;
+                # с контроллером - не больше подобранного им числа хостов
+                hosts = iter(ip_list)
+                future_to_ip = {}
                 
-                # Прогресс каждые 10%
-                if i % max(1, len(ip_list) // 10) == 0:
-                    progress = (i / len(ip_list)) * 100
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Прогресс: {progress:.1f}% ({i}/{len(ip_list)})")
-        
+                def submit():
+                    if self.adaptive is not None:
+                        limit = min(self.threads, self.adaptive.concurrency)
+                    else:
+                        limit = self.threads * SUBMIT_AHEAD
+                    for ip in itertools.islice(hosts, max(0, limit - len(future_to_ip))):
+                        future_to_ip[executor.submit(self.scan_ip, ip)] = ip
+                
+                submit()
+                completed = 0
+                while future_to_ip:
+                    done, _ = concurrent.futures.wait(
+                        future_to_ip, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        ip = future_to_ip.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception:
+                            results = []
+                        self.metrics.increment('hosts')
+                        self.metrics.increment('services', len(results))
+                        for result in results:
+                            self.emit(result)
+                        # Хост завершен только после того, как его результаты записаны
+                        if self.checkpoint is not None:
+                            self.checkpoint.mark_done(ip)
+                        yield from results
+                        
+                        # Прогресс каждые 10%
+                        completed += 1
+                        if completed % max(1, total // 10) == 0:
+                            progress = (completed / total) * 100
+                            print(f"[{datetime.now().strftime('%H:%M:%S')}] Прогресс: {progress:.1f}% ({completed}/{total})")
+                    submit()
+            finished = True
+        finally:
+            self.stage_timings['port_scan'] = time.time() - start_time
+            if self.checkpoint is not None:
+                self.checkpoint.flush(finished=finished)
+    
+    def scan_network(self):
+        """Сканирует всю сеть, собирая результаты в self.results"""
+        for result in self.iter_scan():
+            self.results.append(result)
+            self.print_result(result)
         return self.results
     
     def print_result(self, result):
-        """Выводит результат в консоль"""
-        if result['status_code'] == 200:
-            status_color = "\033[92m"  # Зеленый
-            status_icon = ""
-        elif result['status_code'] in [401, 403]:
-            status_color = "\033[93m"  # Желтый
-            status_icon = "🔒 "
-        elif result['status_code'] >= 400:
-            status_color = "\033[91m"  # Красный
-            status_icon = ""
-        else:
-            status_color = "\033[94m"  # Синий
-            status_icon = ""
-        
-        router_marker = "🚀 РОУТЕР! " if result['is_router'] else ""
-        
-        print(f"{status_color}{status_icon}{router_marker}Найден веб-интерфейс:\033[0m")
-        print(f"  IP:        \033[94m{result['ip']}\033[0m")
-        print(f"  Порт:      {result['port']}")
-        print(f"  URL:       \033[94m{result['url']}\033[0m")
-        print(f"  Статус:    {result['status_code']}")
-        
-        if result['title'] and result['title'] != 'No title':
-            print(f"  Заголовок: {result['title']}")
-        
-        if result['server'] and result['server'] != 'Unknown':
-            print(f"  Сервер:    {result['server']}")
-        
-        print(f"  Размер:    {result['content_length']} байт")
-        
-        # Показываем тип контента если есть
-        if result.get('content_type'):
-            print(f"  Тип:       {result['content_type']}")
-        
-        print("-" * 60)
+        """Выводит результат в консоль одним вызовом print"""
+        print(format_result(result))
     
-    def save_results(self, filename=None):
-        """Сохраняет результаты в файл"""
-        if not self.results:
+    def save_results(self, filename=None, source=None):
+        """
+        Сохраняет результаты в файл
+        
+        Args:
+            filename (str): Имя файлов отчета без расширения
+            source (str): Файл JSON Lines с результатами (см. JSONLinesSink);
+                по умолчанию сохраняется self.results. Файл читается
+                потоком, результаты целиком в память не загружаются.
+        """
+        if source is not None:
+            results = lambda: unique_results(read_jsonl(source))  # noqa: E731
+        else:
+            results = lambda: unique_results(self.results)  # noqa: E731
+        
+        # Один проход: считаем находки и запоминаем роутеры для отчета
+        total_found = 0
+        routers = []
+        for result in results():
+            total_found += 1
+            if result['is_router']:
+                routers.append(result)
+        routers_found = len(routers)
+        
+        if not total_found:
             print("Нет результатов для сохранения")
             return
         
@@ -472,59 +744,58 @@ class NetworkScanner:
         txt_path = results_dir / f"{filename}.txt"
         
         # Сохраняем в JSON
-        output = {
+        header = {
             'scan_time': datetime.now().isoformat(),
             'network': self.network,
-            'total_found': len(self.results),
-            'routers_found': len([r for r in self.results if r['is_router']]),
-            'results': self.results
+            'total_found': total_found,
+            'routers_found': routers_found,
         }
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        if self.adaptive is not None:
+            header['adaptive'] = self.adaptive.summary()
+        if self.classify_cache is not None:
+            header['classify_cache'] = self.classify_cache.stats()
+        if self.rate_limiter is not None:
+            header['rate_limit'] = {'rate': self.rate_limiter.rate, 'per_host': self.rate_limiter.per_host}
+        write_json_report(json_path, header, results())
         
         # Сохраняем текстовый отчет
         with open(txt_path, 'w', encoding='utf-8') as f:
             f.write(f"Результаты сканирования сети: {self.network}\n")
             f.write(f"Время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Найдено интерфейсов: {len(self.results)}\n")
-            f.write(f"Роутеров/повторителей: {len([r for r in self.results if r['is_router']])}\n")
+            f.write(f"Найдено интерфейсов: {total_found}\n")
+            f.write(f"Роутеров/повторителей: {routers_found}\n")
             f.write("=" * 80 + "\n\n")
             
             # Сначала роутеры
-            routers = [r for r in self.results if r['is_router']]
-            if routers:
+            if routers_found:
                 f.write("🚀 РОУТЕРЫ/ПОВТОРИТЕЛИ:\n")
                 f.write("=" * 50 + "\n")
                 for result in routers:
-                    f.write(f"IP: {result['ip']}:{result['port']}\n")
-                    f.write(f"URL: {result['url']}\n")
-                    f.write(f"Статус: {result['status_code']}\n")
-                    if result['title'] != 'No title':
-                        f.write(f"Заголовок: {result['title']}\n")
-                    if result['server'] != 'Unknown':
-                        f.write(f"Сервер: {result['server']}\n")
-                    f.write("-" * 40 + "\n")
+                    self.write_report_entry(f, result)
                 f.write("\n")
             
             # Затем остальные устройства
-            other_devices = [r for r in self.results if not r['is_router']]
-            if other_devices:
+            if total_found > routers_found:
                 f.write("📡 ДРУГИЕ УСТРОЙСТВА:\n")
                 f.write("=" * 50 + "\n")
-                for result in other_devices:
-                    f.write(f"IP: {result['ip']}:{result['port']}\n")
-                    f.write(f"URL: {result['url']}\n")
-                    f.write(f"Статус: {result['status_code']}\n")
-                    if result['title'] != 'No title':
-                        f.write(f"Заголовок: {result['title']}\n")
-                    if result['server'] != 'Unknown':
-                        f.write(f"Сервер: {result['server']}\n")
-                    f.write("-" * 40 + "\n")
+                for result in results():
+                    if not result['is_router']:
+                        self.write_report_entry(f, result)
         
         print("\nРезультаты сохранены в папке results/:")
         print(f"  JSON: {json_path.name}")
         print(f"  TXT:  {txt_path.name}")
+    
+    def write_report_entry(self, f, result):
+        """Записывает один результат в текстовый отчет"""
+        f.write(f"IP: {result['ip']}:{result['port']}\n")
+        f.write(f"URL: {result['url']}\n")
+        f.write(f"Статус: {result['status_code']}\n")
+        if result['title'] != 'No title':
+            f.write(f"Заголовок: {result['title']}\n")
+        if result['server'] != 'Unknown':
+            f.write(f"Сервер: {result['server']}\n")
+        f.write("-" * 40 + "\n")
 
 def main():
     """Основная функция для запуска из командной строки"""
@@ -0,0 +1,153 @@
+"""
+Приемники результатов сканирования
+
+Результаты отдаются приемникам по мере нахождения, а не одним списком
+в конце сканирования: JSONLinesSink дописывает каждую находку строкой
+JSON и сразу сбрасывает буфер, поэтому при аварийном завершении
+найденное не теряется, а память не растет с размером сети. Итоговые
+отчеты JSON/TXT строятся потом проходом по этому потоку.
+"""
+
+import json
+import textwrap
+from pathlib import Path
+
+from .models import as_dict
+
+
+class ResultSink:
+    """Базовый приемник результатов"""
+
+    def write(self, result):
+        """Принимает один результат"""
+        raise NotImplementedError
+
+    def close(self):
+        """Завершает запись"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ListSink(ResultSink):
+    """Собирает результаты в список"""
+
+    def __init__(self):
+        self.results = []
+
+    def write(self, result):
+        self.results.append(result)
+
+
+class JSONLinesSink(ResultSink):
+    """
+    Пишет результаты в файл JSON Lines, по одной строке на находку
+
+    Файл открывается при первой записи, поэтому без находок он не
+    создается.
+    """
+
+    def __init__(self, path, append=False):
+        """
+        Args:
+            path (str): Путь к файлу .jsonl
+            append (bool): Дописывать в существующий файл, а не перезаписывать
+        """
+        self.path = Path(path)
+        self.append = append
+        self.count = 0
+        self._file = None
+
+    def write(self, result):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a' if self.append else 'w', encoding='utf-8')
+            if self.append and not self.ends_with_newline():
+                # Прошлый запуск оборвался посреди строки - начинаем с новой
+                self._file.write('\n')
+        self._file.write(json.dumps(as_dict(result), ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def ends_with_newline(self):
+        """Заканчивается ли существующий файл переводом строки (пустой - тоже)"""
+        with open(self.path, 'rb') as f:
+            f.seek(0, 2)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, 2)
+            return f.read(1) == b'\n'
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_jsonl(path):
+    """
+    Читает результаты из файла JSON Lines
+
+    Недописанная последняя строка (обрыв при аварийном завершении)
+    пропускается.
+
+    Yields:
+        dict: Результат сканирования
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def unique_results(results):
+    """
+    Убирает повторные находки одного сервиса (ip, port), оставляя первую
+
+    Повторы появляются, например, при возобновлении: хост, результаты
+    которого уже записаны, но не отмечены в контрольной точке, сканируется
+    снова. Память расходуется только на ключи находок.
+
+    Yields:
+        dict: Результат сканирования
+    """
+    seen = set()
+    for result in results:
+        key = (result['ip'], result['port'])
+        if key not in seen:
+            seen.add(key)
+            yield result
+
+
+def write_json_report(path, header, results):
+    """
+    Пишет отчет JSON потоком, не собирая результаты в памяти
+
+    Вывод совпадает с json.dump({**header, 'results': [...]}, indent=2).
+
+    Args:
+        path (Path): Файл отчета
+        header (dict): Поля отчета перед списком результатов
+        results (iterable): Результаты
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        head = json.dumps(header, ensure_ascii=False, indent=2)
+        # Убираем закрывающую скобку заголовка и продолжаем объект
+        f.write(head[:-2] + ',\n  "results": [')
+        empty = True
+        for result in results:
+            f.write('\n' if empty else ',\n')
+            f.write(textwrap.indent(json.dumps(as_dict(result), ensure_ascii=False, indent=2), '    '))
+            empty = False
+        f.write(']\n}' if empty else '\n  ]\n}')
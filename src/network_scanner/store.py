@@ -0,0 +1,275 @@
+"""
+Хранилище найденных сервисов для инкрементальных сканирований
+
+Последнее известное состояние каждого сервиса (ip:port) хранится в
+SQLite: результат классификации и валидаторы страницы (ETag,
+Last-Modified, хеш прочитанного тела). При повторном сканировании
+запрос уходит с If-None-Match/If-Modified-Since, а ответ 304 или то же
+тело с тем же Server означают, что страница не изменилась и прошлый
+результат используется без повторной классификации.
+
+Каждое сканирование отмечает увиденные сервисы своим номером, поэтому
+после него известно, какие сервисы появились, изменились или пропали.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .models import ScanResult, as_dict
+from .sinks import ResultSink
+from .targets import address_to_key
+
+# Путь хранилища по умолчанию
+DEFAULT_STORE = 'results/services.db'
+
+# Поля результата, изменение которых делает сервис измененным
+DIFF_FIELDS = ('url', 'status_code', 'title', 'server', 'device_type', 'vendor', 'is_router', 'body_hash')
+
+# Состояния сервиса в сканировании
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+GONE = 'gone'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    network TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT
+);
+CREATE TABLE IF NOT EXISTS services (
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    title TEXT,
+    server TEXT,
+    device_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT,
+    result TEXT NOT NULL,
+    previous TEXT,
+    change TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    scan_id INTEGER NOT NULL,
+    PRIMARY KEY (ip, port)
+);
+"""
+
+
+def body_hash(content):
+    """Хеш прочитанной части тела страницы"""
+    return hashlib.sha1(content or b'').hexdigest()
+
+
+def conditional_headers(previous, url):
+    """
+    Заголовки условного запроса по прошлому результату сервиса
+
+    Args:
+        previous (dict): Прошлый результат или None
+        url (str): Запрашиваемый URL (валидаторы относятся к прошлому URL)
+
+    Returns:
+        dict: If-None-Match / If-Modified-Since или пустой словарь
+    """
+    headers = {}
+    if previous is None or previous.get('url') != url:
+        return headers
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    return headers
+
+
+def reuse_result(previous, url, response):
+    """
+    Прошлый результат, если страница не изменилась
+
+    Страница не изменилась, если сервер ответил 304 или вернул тот же код,
+    тот же Server и тело с тем же хешем.
+
+    Returns:
+        ScanResult: Прошлый результат с обновленными валидаторами или None
+    """
+    if previous is None or previous.get('url') != url:
+        return None
+    if response.status_code != 304:
+        if (response.status_code != previous.get('status_code')
+                or response.headers.get('Server', 'Unknown') != previous.get('server')
+                or body_hash(response.content) != previous.get('body_hash')):
+            return None
+    result = dict(previous)
+    for field, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+        if response.headers.get(header):
+            result[field] = response.headers[header]
+    return ScanResult.from_dict(result)
+
+
+def changed_fields(previous, result):
+    """Поля DIFF_FIELDS, которые отличаются у двух результатов"""
+    return [field for field in DIFF_FIELDS if previous.get(field) != result.get(field)]
+
+
+class ResultStore(ResultSink):
+    """
+    Хранилище сервисов в SQLite
+
+    Принимает результаты как приемник (scanner.sinks). Потокобезопасно:
+    движок на потоках читает прошлые результаты из рабочих потоков.
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        """
+        Args:
+            path (str): Файл базы SQLite
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.scan_id = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def begin(self, network, resume=False):
+        """
+        Начинает сканирование
+
+        Args:
+            network (str): Цели сканирования
+            resume (bool): Продолжить незавершенное сканирование тех же целей,
+                чтобы уже увиденные в нем сервисы не считались пропавшими
+        """
+        with self._lock:
+            if resume:
+                row = self._db.execute(
+                    'SELECT id FROM scans WHERE network = ? AND finished IS NULL ORDER BY id DESC LIMIT 1',
+                    (network,)
+                ).fetchone()
+                if row is not None:
+                    self.scan_id = row[0]
+                    return
+            cursor = self._db.execute(
+                'INSERT INTO scans (network, started) VALUES (?, ?)', (network, datetime.now().isoformat())
+            )
+            self._db.commit()
+            self.scan_id = cursor.lastrowid
+
+    def lookup(self, ip, port):
+        """
+        Последний известный результат сервиса
+
+        Returns:
+            dict: Результат или None, если сервис не встречался
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT result FROM services WHERE ip = ? AND port = ?', (str(ip), port)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, result):
+        """Запоминает результат и отмечает, новый ли сервис и изменился ли он"""
+        ip, port = str(result['ip']), result['port']
+        now = datetime.now().isoformat()
+        data = json.dumps(as_dict(result), ensure_ascii=False)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, result, previous, change, first_seen, scan_id FROM services '
+                'WHERE ip = ? AND port = ?', (ip, port)
+            ).fetchone()
+            if row is None:
+                change, previous, first_seen = NEW, None, now
+            else:
+                status, stored, previous, change, first_seen, scan_id = row
+                if scan_id != self.scan_id:
+                    if status == GONE:
+                        change, previous = NEW, None
+                    else:
+                        previous = stored if changed_fields(json.loads(stored), result) else None
+                        change = CHANGED if previous else UNCHANGED
+                # Повтор в том же сканировании (возобновление) сохраняет первую оценку
+            self._db.execute(
+                'INSERT OR REPLACE INTO services (ip, port, status, title, server, device_type, etag, '
+                'last_modified, body_hash, result, previous, change, first_seen, last_seen, scan_id) '
+                "VALUES (?, ?, 'up', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ip, port, result.get('title'), result.get('server'), result.get('device_type'),
+                 result.get('etag'), result.get('last_modified'), result.get('body_hash'),
+                 data, previous, change, first_seen, now, self.scan_id)
+            )
+            self._db.commit()
+
+    def finish(self, targets, ports):
+        """
+        Завершает сканирование: сервисы просканированных хостов и портов,
+        не увиденные в нем, отмечаются пропавшими
+
+        Args:
+            targets: Просканированные адреса (поддерживает `in`)
+            ports (list): Просканированные порты
+        """
+        ports = set(ports)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ip, port FROM services WHERE status = 'up' AND scan_id != ?", (self.scan_id,)
+            ).fetchall()
+            gone = [(ip, port) for ip, port in rows if port in ports and ip in targets]
+            self._db.executemany(
+                "UPDATE services SET status = 'gone', change = 'gone', previous = NULL, scan_id = ? "
+                'WHERE ip = ? AND port = ?',
+                [(self.scan_id, ip, port) for ip, port in gone]
+            )
+            self._db.execute('UPDATE scans SET finished = ? WHERE id = ?', (datetime.now().isoformat(), self.scan_id))
+            self._db.commit()
+
+    def changes(self):
+        """
+        Изменения текущего сканирования по сравнению с прошлыми
+
+        Returns:
+            list: Словари с полями change (new/changed/gone), ip, port,
+                result, previous (прошлый результат для changed) и fields
+                (изменившиеся поля), упорядоченные по адресу и порту
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT change, result, previous FROM services WHERE scan_id = ? AND change != 'unchanged'",
+                (self.scan_id,)
+            ).fetchall()
+        changes = []
+        for change, result, previous in rows:
+            result = json.loads(result)
+            previous = json.loads(previous) if previous else None
+            changes.append({
+                'change': change,
+                'ip': result['ip'],
+                'port': result['port'],
+                'result': result,
+                'previous': previous,
+                'fields': changed_fields(previous, result) if previous else [],
+            })
+        changes.sort(key=lambda item: (address_to_key(item['ip']), item['port']))
+        return changes
+
+    def counts(self):
+        """Число сервисов текущего сканирования по состояниям"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT change, COUNT(*) FROM services WHERE scan_id = ? GROUP BY change', (self.scan_id,)
+            ).fetchall()
+        counts = {NEW: 0, CHANGED: 0, GONE: 0, UNCHANGED: 0}
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
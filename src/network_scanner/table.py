@@ -0,0 +1,481 @@
+"""
+Колоночная таблица результатов
+
+ResultTable - приемник результатов (sinks.ResultSink), который хранит
+находки по колонкам: IPv4-адрес как uint32, порт, код ответа, размер и
+признак роутера - типизированными массивами (array), а строки (заголовок,
+Server, тип контента, тип устройства, вендор, кодировка) - словарным
+кодированием: номер значения в массиве и словарь значений. Так выборки
+по типу устройства, Server, коду ответа и подсети - сравнения целых
+чисел по колонке, а не проход по списку словарей.
+
+Если установлен NumPy, выборки и подсчеты векторизованы; без него те же
+запросы выполняются циклами Python. Экспорт в Parquet и Feather для
+анализа без разбора JSON требует pyarrow:
+
+    pip install network-scanner[table]
+
+    table = ResultTable.from_results(scanner.results)
+    table.count_by('vendor', device_type='router')
+    table.by_subnet(24)
+    table.top('title', exclude=['No title'])
+    table.where(subnet='10.0.0.0/16', status_code=200).save('routers.parquet')
+"""
+
+import collections
+import ipaddress
+from array import array
+from pathlib import Path
+
+from .models import ScanResult, pack_ip, unpack_ip
+from .sinks import ResultSink
+from .targets import IPV6_OFFSET
+
+try:
+    import numpy
+except ImportError:  # Необязательная зависимость: pip install network-scanner[table]
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:  # Необязательная зависимость: pip install network-scanner[table]
+    pyarrow = None
+
+# Код array для 32-битного беззнакового целого
+UINT32 = 'I' if array('I').itemsize == 4 else 'L'
+
+# Числовые колонки: имя -> (код array, тип NumPy, тип Arrow)
+NUMERIC_COLUMNS = {
+    'ip': (UINT32, 'uint32', 'uint32'),
+    'port': ('H', 'uint16', 'uint16'),
+    'status_code': ('H', 'uint16', 'uint16'),
+    'content_length': ('q', 'int64', 'int64'),
+    'is_router': ('B', 'bool', 'bool_'),
+}
+
+# Колонки строк со словарным кодированием
+STRING_COLUMNS = ('title', 'server', 'content_type', 'device_type', 'vendor', 'encoding')
+
+COLUMNS = tuple(NUMERIC_COLUMNS) + STRING_COLUMNS
+
+# Форматы файлов save по расширению
+TABLE_FORMATS = ('.parquet', '.feather')
+
+# Префикс подсети по умолчанию для адресов IPv6 в by_subnet
+IPV6_PREFIX = 64
+
+
+def arrow_available():
+    """Установлен ли pyarrow (нужен для to_arrow и save)"""
+    return pyarrow is not None
+
+
+def arrow_column(values, arrow_type, nulls=None):
+    """
+    Колонка Arrow из массива NumPy или последовательности
+
+    Args:
+        values: Значения колонки
+        arrow_type: Тип Arrow
+        nulls: Маска пустых (null) значений или None
+    """
+    if numpy is not None:
+        return pyarrow.array(values, type=arrow_type, mask=nulls)
+    values = list(values)
+    if nulls is not None:
+        values = [None if null else value for value, null in zip(values, nulls)]
+    return pyarrow.array(values, type=arrow_type)
+
+
+class DictionaryColumn:
+    """Колонка строк: номера значений и словарь различных значений"""
+
+    def __init__(self, values=None, codes=None):
+        self.values = list(values or [])
+        self.index = {value: code for code, value in enumerate(self.values)}
+        self.codes = codes if codes is not None else array(UINT32)
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def take(self, codes):
+        """Колонка из выбранных номеров с тем же словарем"""
+        return DictionaryColumn(self.values, codes)
+
+
+class ResultTable(ResultSink):
+    """
+    Колоночная таблица находок с выборками и подсчетами
+
+    Условия выборки (where, mask, count, count_by, top, by_subnet) -
+    именованные аргументы: колонка=значение или колонка=[значения], а
+    также subnet='10.0.0.0/24'. Все условия должны выполняться вместе.
+    Адреса не IPv4 хранятся строками отдельно, в колонке ip у них 0.
+    """
+
+    def __init__(self):
+        self.numeric = {name: array(typecode) for name, (typecode, _, _) in NUMERIC_COLUMNS.items()}
+        self.strings = {name: DictionaryColumn() for name in STRING_COLUMNS}
+        # Номер строки -> адрес, не помещающийся в uint32 (IPv6, имя хоста)
+        self.other_addresses = {}
+        self._cache = {}
+
+    @classmethod
+    def from_results(cls, results):
+        """Таблица из результатов сканирования (словарей или models.ScanResult)"""
+        table = cls()
+        table.extend(results)
+        return table
+
+    def __len__(self):
+        return len(self.numeric['port'])
+
+    def write(self, result):
+        """Добавляет находку (как приемник результатов сканера)"""
+        key = result.ip_key if isinstance(result, ScanResult) else pack_ip(result['ip'])
+        if type(key) is int and key < IPV6_OFFSET:
+            self.numeric['ip'].append(key)
+        else:
+            self.other_addresses[len(self)] = str(result['ip'])
+            self.numeric['ip'].append(0)
+        self.numeric['port'].append(result['port'])
+        self.numeric['status_code'].append(result['status_code'])
+        self.numeric['content_length'].append(result.get('content_length') or 0)
+        self.numeric['is_router'].append(bool(result['is_router']))
+        for name in STRING_COLUMNS:
+            self.strings[name].append(result.get(name))
+        self._cache.clear()
+
+    def extend(self, results):
+        for result in results:
+            self.write(result)
+
+    def row(self, index):
+        """Находка index в виде словаря с колонками таблицы"""
+        row = {}
+        for name in NUMERIC_COLUMNS:
+            row[name] = self.numeric[name][index]
+        row['ip'] = self.other_addresses.get(index) or unpack_ip(row['ip'])
+        row['is_router'] = bool(row['is_router'])
+        for name, column in self.strings.items():
+            row[name] = column.values[column.codes[index]]
+        return row
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def vector(self, name):
+        """
+        Числовая колонка или номера значений строковой колонки
+
+        Returns:
+            numpy.ndarray или array.array без NumPy
+        """
+        stored = self.strings[name].codes if name in self.strings else self.numeric[name]
+        if numpy is None:
+            return stored
+        if name not in self._cache:
+            dtype = 'uint32' if name in self.strings else NUMERIC_COLUMNS[name][1]
+            # Копия: массив, отдающий буфер, нельзя дописывать
+            values = numpy.frombuffer(stored.tobytes(), dtype=stored.typecode)
+            self._cache[name] = values.astype(dtype, copy=False)
+        return self._cache[name]
+
+    def column(self, name):
+        """Значения колонки списком (строки раскодированы, ip - строками)"""
+        if name == 'ip':
+            return [self.other_addresses.get(index) or unpack_ip(key)
+                    for index, key in enumerate(self.numeric['ip'])]
+        if name in self.strings:
+            column = self.strings[name]
+            return [column.values[code] for code in column.codes]
+        if name == 'is_router':
+            return [bool(value) for value in self.numeric[name]]
+        return list(self.numeric[name])
+
+    def mask(self, **conditions):
+        """
+        Какие находки удовлетворяют условиям
+
+        Returns:
+            numpy.ndarray (bool) или список bool без NumPy
+        """
+        size = len(self)
+        mask = numpy.ones(size, dtype=bool) if numpy is not None else [True] * size
+        for name, wanted in conditions.items():
+            if name == 'subnet':
+                selected = self._subnet_mask(ipaddress.ip_network(wanted, strict=False))
+            else:
+                selected = self._value_mask(name, wanted)
+            if numpy is not None:
+                mask &= selected
+            else:
+                mask = [a and b for a, b in zip(mask, selected)]
+        return mask
+
+    def _value_mask(self, name, wanted):
+        """Маска колонка == значение (или одно из значений)"""
+        if name not in COLUMNS:
+            raise KeyError(f"Нет колонки {name}")
+        if isinstance(wanted, (str, int, bool)) or wanted is None:
+            wanted = [wanted]
+        if name in self.strings:
+            index = self.strings[name].index
+            codes = [index[value] for value in wanted if value in index]
+        elif name == 'ip':
+            return self._ip_mask({str(value) for value in wanted})
+        else:
+            codes = [int(value) for value in wanted]
+
+        values = self.vector(name)
+        if numpy is not None:
+            return numpy.isin(values, codes)
+        codes = set(codes)
+        return [value in codes for value in values]
+
+    def _ip_mask(self, addresses):
+        """Маска ip in addresses"""
+        keys = {pack_ip(address) for address in addresses}
+        values = self.vector('ip')
+        if numpy is not None:
+            mask = numpy.isin(values, [key for key in keys if type(key) is int and key < IPV6_OFFSET])
+        else:
+            mask = [value in keys for value in values]
+        for index, address in self.other_addresses.items():
+            mask[index] = address in addresses
+        return mask
+
+    def _subnet_mask(self, network):
+        """Маска адрес в подсети network"""
+        size = len(self)
+        if network.version == 4:
+            netmask, start = int(network.netmask), int(network.network_address)
+            values = self.vector('ip')
+            if numpy is not None:
+                mask = (values & numpy.uint32(netmask)) == numpy.uint32(start)
+            else:
+                mask = [value & netmask == start for value in values]
+        else:
+            mask = numpy.zeros(size, dtype=bool) if numpy is not None else [False] * size
+        for index, address in self.other_addresses.items():
+            try:
+                mask[index] = ipaddress.ip_address(address) in network
+            except ValueError:
+                mask[index] = False
+        return mask
+
+    def rows(self, **conditions):
+        """Номера находок, удовлетворяющих условиям"""
+        mask = self.mask(**conditions)
+        if numpy is not None:
+            return numpy.flatnonzero(mask)
+        return [index for index, selected in enumerate(mask) if selected]
+
+    def where(self, **conditions):
+        """Новая таблица из находок, удовлетворяющих условиям"""
+        rows = self.rows(**conditions)
+        table = ResultTable()
+        for name, stored in self.numeric.items():
+            table.numeric[name] = self._take(stored, rows)
+        for name, column in self.strings.items():
+            table.strings[name] = column.take(self._take(column.codes, rows))
+        table.other_addresses = {
+            position: self.other_addresses[index]
+            for position, index in enumerate(rows) if index in self.other_addresses
+        }
+        return table
+
+    def _take(self, stored, rows):
+        if numpy is not None:
+            values = numpy.frombuffer(stored.tobytes(), dtype=stored.typecode)
+            return array(stored.typecode, values[rows].tobytes())
+        return array(stored.typecode, (stored[index] for index in rows))
+
+    def count(self, **conditions):
+        """Число находок, удовлетворяющих условиям"""
+        if not conditions:
+            return len(self)
+        mask = self.mask(**conditions)
+        return int(mask.sum()) if numpy is not None else sum(mask)
+
+    def count_by(self, name, **conditions):
+        """
+        Число находок по значениям колонки
+
+        Args:
+            name (str): Колонка
+            **conditions: Условия выборки
+
+        Returns:
+            list: (значение, число) по убыванию числа
+        """
+        if name == 'ip':
+            counts = collections.Counter(
+                address for address, selected in zip(self.column('ip'), self._selected(conditions))
+                if selected
+            )
+            return self._sorted(counts.items())
+
+        values = self.vector(name)
+        if numpy is not None:
+            if conditions:
+                values = values[self.mask(**conditions)]
+            if name in self.strings:
+                column = self.strings[name]
+                counts = numpy.bincount(values, minlength=len(column.values))
+                pairs = [(column.values[code], int(count)) for code, count in enumerate(counts) if count]
+            else:
+                unique, counts = numpy.unique(values, return_counts=True)
+                pairs = [(value.item(), int(count)) for value, count in zip(unique, counts)]
+        else:
+            counts = collections.Counter(
+                value for value, selected in zip(values, self._selected(conditions)) if selected
+            )
+            if name in self.strings:
+                column = self.strings[name]
+                pairs = [(column.values[code], count) for code, count in counts.items()]
+            else:
+                pairs = list(counts.items())
+        if name == 'is_router':
+            pairs = [(bool(value), count) for value, count in pairs]
+        return self._sorted(pairs)
+
+    def _selected(self, conditions):
+        if conditions:
+            return self.mask(**conditions)
+        return [True] * len(self)
+
+    @staticmethod
+    def _sorted(pairs):
+        """По убыванию числа, при равенстве - по значению"""
+        return sorted(pairs, key=lambda pair: (-pair[1], str(pair[0])))
+
+    def top(self, name, limit=10, exclude=(), **conditions):
+        """
+        Самые частые значения колонки
+
+        Args:
+            name (str): Колонка (например, 'title')
+            limit (int): Сколько значений вернуть
+            exclude (iterable): Значения, которые не учитываются ('No title')
+            **conditions: Условия выборки
+
+        Returns:
+            list: (значение, число)
+        """
+        exclude = set(exclude)
+        pairs = [pair for pair in self.count_by(name, **conditions) if pair[0] not in exclude]
+        return pairs[:limit]
+
+    def by_subnet(self, prefix=24, ipv6_prefix=IPV6_PREFIX, **conditions):
+        """
+        Число находок по подсетям
+
+        Args:
+            prefix (int): Длина префикса подсетей IPv4
+            ipv6_prefix (int): Длина префикса подсетей IPv6
+            **conditions: Условия выборки
+
+        Returns:
+            list: (подсеть, число) по порядку подсетей
+        """
+        if not 0 <= prefix <= 32:
+            raise ValueError(f"Префикс подсети IPv4 должен быть от 0 до 32: {prefix}")
+        shift = 32 - prefix
+        selected = self._selected(conditions)
+        ipv4 = numpy.ones(len(self), dtype=bool) if numpy is not None else [True] * len(self)
+        for index in self.other_addresses:
+            ipv4[index] = False
+        if numpy is not None:
+            selected = numpy.asarray(selected, dtype=bool)
+
+        values = self.vector('ip')
+        if numpy is not None:
+            # В uint64: сдвиг uint32 на 32 бита (префикс 0) не определен
+            chosen = values[selected & ipv4].astype('uint64')
+            networks, counts = numpy.unique(chosen >> numpy.uint64(shift), return_counts=True)
+            counted = zip(networks.tolist(), counts.tolist())
+        else:
+            counted = collections.Counter(
+                value >> shift for value, chosen, v4 in zip(values, selected, ipv4) if chosen and v4
+            ).items()
+        pairs = [
+            (ipaddress.IPv4Network((network << shift, prefix)), count)
+            for network, count in sorted(counted)
+        ]
+
+        others = collections.Counter()
+        for index, address in self.other_addresses.items():
+            if selected[index]:
+                try:
+                    others[ipaddress.ip_network(f"{address}/{ipv6_prefix}", strict=False)] += 1
+                except ValueError:
+                    continue
+        pairs.extend(sorted(others.items()))
+        return [(str(network), count) for network, count in pairs]
+
+    def to_arrow(self):
+        """
+        Таблица Arrow: числа - типизированными колонками, строки -
+        словарными (dictionary), адрес - uint32 (null не для IPv4) и строкой
+
+        Returns:
+            pyarrow.Table
+        """
+        if pyarrow is None:
+            raise ImportError("Для экспорта таблицы нужен пакет pyarrow: pip install network-scanner[table]")
+        data, names = [], []
+        for name, (_, _, arrow_type) in NUMERIC_COLUMNS.items():
+            values = self.vector(name)
+            if numpy is None and name == 'is_router':
+                values = [bool(value) for value in values]
+            nulls = self._nulls(self.other_addresses) if name == 'ip' else None
+            data.append(arrow_column(values, getattr(pyarrow, arrow_type)(), nulls))
+            names.append(name)
+        data.append(pyarrow.array(self.column('ip'), type=pyarrow.string()))
+        names.append('address')
+        for name, column in self.strings.items():
+            # null не кладется в словарь Arrow: у таких находок null в номерах
+            dictionary = pyarrow.array(['' if value is None else value for value in column.values],
+                                       type=pyarrow.string())
+            nulls = None
+            if None in column.index:
+                nulls = self.mask(**{name: None})
+            indices = arrow_column(self.vector(name), pyarrow.uint32(), nulls)
+            data.append(pyarrow.DictionaryArray.from_arrays(indices, dictionary))
+            names.append(name)
+        return pyarrow.Table.from_arrays(data, names=names)
+
+    def _nulls(self, rows):
+        """Маска строк rows или None, если их нет"""
+        if not rows:
+            return None
+        mask = numpy.zeros(len(self), dtype=bool) if numpy is not None else [False] * len(self)
+        for index in rows:
+            mask[index] = True
+        return mask
+
+    def save(self, path):
+        """
+        Сохраняет таблицу в Parquet или Feather (по расширению)
+
+        Args:
+            path (str): Файл .parquet или .feather
+        """
+        path = Path(path)
+        if path.suffix not in TABLE_FORMATS:
+            raise ValueError(f"Неизвестный формат таблицы {path.suffix}: нужен .parquet или .feather")
+        table = self.to_arrow()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.parquet':
+            pyarrow.parquet.write_table(table, path)
+        else:
+            pyarrow.feather.write_feather(table, path)
+        return path
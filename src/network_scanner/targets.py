@@ -0,0 +1,213 @@
+"""
+Цели сканирования: сети, диапазоны и исключения
+
+Адреса не разворачиваются в список строк: цели хранятся как
+отсортированные диапазоны целых чисел, а строки адресов создаются
+по одной при обходе. Поэтому /8 занимает столько же памяти, сколько
+/24, а число адресов известно без перебора.
+
+Форматы целей:
+    192.168.1.0/24              - сеть (без адреса сети и широковещательного)
+    192.168.1.10                - один адрес
+    192.168.1.10-192.168.1.50   - диапазон
+    192.168.1.10-50             - диапазон в последнем октете
+Несколько целей можно перечислить через запятую или по одной на строке
+в файле целей (read_targets_file).
+"""
+
+import bisect
+import ipaddress
+
+# Адреса IPv6 сдвигаются за пространство IPv4, чтобы оба семейства
+# жили в одном множестве целых чисел
+IPV6_OFFSET = 1 << 32
+
+
+def address_to_key(ip):
+    """Адрес -> целое число для множества диапазонов"""
+    address = ipaddress.ip_address(ip)
+    return int(address) + (IPV6_OFFSET if address.version == 6 else 0)
+
+
+def key_to_address(key):
+    """Целое число -> строка адреса"""
+    if key < IPV6_OFFSET:
+        return str(ipaddress.IPv4Address(key))
+    return str(ipaddress.IPv6Address(key - IPV6_OFFSET))
+
+
+class RangeSet:
+    """Множество целых чисел в виде отсортированных диапазонов [начало, конец]"""
+
+    def __init__(self, runs=None):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(runs or []):
+            self.add_range(start, end)
+
+    def __contains__(self, value):
+        index = bisect.bisect_right(self.starts, value) - 1
+        return index >= 0 and value <= self.ends[index]
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def __iter__(self):
+        for start, end in self.runs():
+            yield from range(start, end + 1)
+
+    def add(self, value):
+        """Добавляет число, склеивая соседние диапазоны"""
+        self.add_range(value, value)
+
+    def add_range(self, start, end):
+        """Добавляет диапазон [start, end]"""
+        # Диапазоны, пересекающиеся с новым или примыкающие к нему
+        first = bisect.bisect_left(self.ends, start - 1)
+        last = bisect.bisect_right(self.starts, end + 1)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def discard_range(self, start, end):
+        """Убирает диапазон [start, end], разрезая задетые диапазоны"""
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end)
+        if first >= last:
+            return
+        # От крайних задетых диапазонов остаются части снаружи [start, end]
+        starts, ends = [], []
+        if self.starts[first] < start:
+            starts.append(self.starts[first])
+            ends.append(start - 1)
+        if self.ends[last - 1] > end:
+            starts.append(end + 1)
+            ends.append(self.ends[last - 1])
+        self.starts[first:last] = starts
+        self.ends[first:last] = ends
+
+    def difference(self, other):
+        """Новое множество без чисел из other"""
+        result = RangeSet(self.runs())
+        for start, end in other.runs():
+            result.discard_range(start, end)
+        return result
+
+    def runs(self):
+        """Диапазоны в виде списка пар"""
+        return [[start, end] for start, end in zip(self.starts, self.ends)]
+
+
+def split_specs(specs):
+    """Разбивает строку или список строк целей по запятым"""
+    if isinstance(specs, str):
+        specs = [specs]
+    for spec in specs:
+        for part in str(spec).split(','):
+            part = part.strip()
+            if part:
+                yield part
+
+
+def read_targets_file(path):
+    """
+    Читает цели из файла: по одной или несколько через запятую на строке,
+    пустые строки и комментарии после # пропускаются
+
+    Returns:
+        list: Цели в порядке файла
+    """
+    specs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            specs.extend(split_specs(line.split('#', 1)[0]))
+    return specs
+
+
+def parse_target(spec, hosts_only=True):
+    """
+    Разбирает одну цель в диапазон ключей
+
+    Args:
+        spec (str): Сеть, адрес или диапазон
+        hosts_only (bool): Для сети брать только адреса хостов, как
+            ipaddress.ip_network().hosts()
+
+    Returns:
+        tuple: (первый ключ, последний ключ)
+
+    Raises:
+        ValueError: Цель не разобрана
+    """
+    if '-' in spec:
+        first, last = (part.strip() for part in spec.split('-', 1))
+        start = ipaddress.ip_address(first)
+        if start.version == 4 and last.isdigit():
+            # 192.168.1.10-50: меняется только последний октет
+            last = first.rsplit('.', 1)[0] + '.' + last
+        end = ipaddress.ip_address(last)
+        if start.version != end.version or end < start:
+            raise ValueError(f"Неверный диапазон адресов: {spec}")
+        return address_to_key(start), address_to_key(end)
+
+    network = ipaddress.ip_network(spec, strict=False)
+    start = address_to_key(network.network_address)
+    end = address_to_key(network.broadcast_address)
+    if hosts_only:
+        if network.version == 4 and network.prefixlen < 31:
+            # Без адреса сети и широковещательного адреса
+            start, end = start + 1, end - 1
+        elif network.version == 6 and network.prefixlen < 127:
+            # Без anycast-адреса маршрутизаторов подсети
+            start += 1
+    return start, end
+
+
+class TargetSet:
+    """
+    Адреса для сканирования
+
+    Ведет себя как последовательность строк адресов: поддерживает len(),
+    обход и проверку вхождения, но адреса создает лениво.
+    """
+
+    def __init__(self, specs=(), exclude=()):
+        """
+        Args:
+            specs (str | list): Цели сканирования
+            exclude (str | list): Исключаемые сети, адреса и диапазоны
+
+        Raises:
+            ValueError: Цель не разобрана
+        """
+        self.ranges = RangeSet()
+        for spec in split_specs(specs):
+            self.ranges.add_range(*parse_target(spec))
+        for spec in split_specs(exclude):
+            self.ranges.discard_range(*parse_target(spec, hosts_only=False))
+
+    @classmethod
+    def from_ranges(cls, ranges):
+        """Набор целей из готового множества ключей"""
+        targets = cls()
+        targets.ranges = ranges
+        return targets
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __iter__(self):
+        for key in self.ranges:
+            yield key_to_address(key)
+
+    def __contains__(self, ip):
+        try:
+            return address_to_key(ip) in self.ranges
+        except ValueError:
+            return False
+
+    def without(self, ranges):
+        """Цели без ключей из множества ranges (RangeSet)"""
+        return TargetSet.from_ranges(self.ranges.difference(ranges))
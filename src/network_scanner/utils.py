@@ -0,0 +1,151 @@
+"""
+Вспомогательные функции для работы с сокетами
+"""
+
+import collections
+import errno
+import selectors
+import socket
+import time
+
+# Коды connect_ex, означающие что соединение устанавливается
+CONNECT_IN_PROGRESS = {
+    errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+    getattr(errno, 'WSAEWOULDBLOCK', 10035),
+}
+
+# Задержка перебора вызывающим, при которой время ответа еще измеряется
+RTT_PAUSE_TOLERANCE = 0.001
+
+# Сколько задач на поток держать в очереди пула: больше не нужно, чтобы
+# потоки не простаивали, а память не зависит от размера сети
+SUBMIT_AHEAD = 4
+
+# Коды ошибок, по которым видно что хост существует (ответил RST)
+HOST_ALIVE_ERRORS = {
+    0, errno.ECONNREFUSED,
+    getattr(errno, 'WSAECONNREFUSED', 10061),
+}
+
+
+def handover(sock, error, timeout, keep_open):
+    """Закрывает сокет или готовит установленное соединение к передаче"""
+    if keep_open and error == 0:
+        sock.settimeout(timeout)
+        return sock
+    sock.close()
+    return None
+
+
+def connect_many(ip, ports, timeout, keep_open=False, io_timeout=None, observe=None,
+                 gate=None, max_parallel=None):
+    """
+    Открывает неблокирующие соединения на порты хоста
+
+    Результаты отдаются по мере ответа портов, каждое подключение
+    ждет ответа не дольше таймаута. Порты, не ответившие за это время,
+    не попадают в результат.
+
+    Args:
+        ip (str): IP-адрес хоста
+        ports (list): Порты для проверки
+        timeout (float): Таймаут в секундах
+        keep_open (bool): Не закрывать установленные соединения, а отдавать
+            их вызывающему (в блокирующем режиме с таймаутом io_timeout)
+        io_timeout (float): Таймаут отданных соединений (по умолчанию timeout)
+        observe (callable): Вызывается как observe(порт, код ошибки, RTT) для
+            каждого порта: код None - ответа не было, RTT None - время
+            ответа неизвестно (вызывающий задержал перебор)
+        gate (callable): Вызывается перед каждым подключением и может
+            ждать (ограничение скорости)
+        max_parallel (int): Наибольшее число одновременно устанавливаемых
+            соединений (по умолчанию все порты сразу)
+
+    Yields:
+        tuple: (порт, код ошибки, сокет), 0 - порт открыт; сокет
+            передается только при keep_open, закрывает его вызывающий
+    """
+    if io_timeout is None:
+        io_timeout = timeout
+    selector = selectors.DefaultSelector()
+    waiting = iter(ports)
+    ready = collections.deque()
+    # Сколько вызывающий (или gate) держал перебор после прошлого select:
+    # ответы, пришедшие за это время, выглядят медленнее, чем были
+    paused = 0.0
+
+    def open_next():
+        """Начинает подключение к следующему порту, False - порты кончились"""
+        nonlocal paused
+        port = next(waiting, None)
+        if port is None:
+            return False
+        if gate is not None:
+            gated = time.monotonic()
+            gate()
+            paused += time.monotonic() - gated
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        opened = time.monotonic()
+        try:
+            result = sock.connect_ex((str(ip), port))
+        except OSError as e:
+            sock.close()
+            result, sock = e.errno, None
+        else:
+            if result in CONNECT_IN_PROGRESS:
+                selector.register(sock, selectors.EVENT_WRITE, (port, opened))
+                return True
+            sock = handover(sock, result, io_timeout, keep_open)
+        if observe is not None:
+            observe(port, result, time.monotonic() - opened)
+        ready.append((port, result, sock))
+        return True
+
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and (max_parallel is None or len(selector.get_map()) < max_parallel):
+                exhausted = not open_next()
+
+            while ready:
+                yielded = time.monotonic()
+                yield ready.popleft()
+                paused += time.monotonic() - yielded
+
+            connecting = selector.get_map()
+            if not connecting:
+                if exhausted:
+                    break
+                continue
+
+            deadline = min(opened for _, opened in (key.data for key in connecting.values())) + timeout
+            events = selector.select(max(0, deadline - time.monotonic()))
+            now = time.monotonic()
+            fresh = paused < RTT_PAUSE_TOLERANCE
+            paused = 0.0
+            for key, _ in events:
+                sock = key.fileobj
+                selector.unregister(sock)
+                port, opened = key.data
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if observe is not None:
+                    observe(port, error, now - opened if fresh else None)
+                ready.append((port, error, handover(sock, error, io_timeout, keep_open)))
+
+            # Подключения, не получившие ответа за таймаут
+            for key in list(selector.get_map().values()):
+                port, opened = key.data
+                if now - opened >= timeout:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    if observe is not None:
+                        observe(port, None, None)
+    finally:
+        # Вызывающий остановил перебор: отданные, но не полученные им сокеты закрываем сами
+        for _, _, sock in ready:
+            if sock is not None:
+                sock.close()
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
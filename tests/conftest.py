@@ -60,4 +60,153 @@ def mock_requests_response():
             import json
             return json.loads(self.text)
     
-    return MockResponse
\ No newline at end of file
+    return MockResponse
+
+
+ROUTER_PAGE = (
+    "<html><head><title>Router Admin Panel</title></head>"
+    "<body><form>Login: <input name='username'> Password: "
+    "<input type='password'> Wireless settings</form></body></html>"
+)
+
+
+def start_test_server(routes=None, etag=None):
+    """
+    Запускает локальный HTTP-сервер в отдельном потоке
+    
+    Args:
+        routes (dict): Путь -> (Content-Type, тело в байтах); по умолчанию
+            на / отдается страница роутера
+        etag (str): ETag страниц; на запрос с совпадающим If-None-Match
+            сервер отвечает 304 и запоминает путь в server.not_modified
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    routes = routes or {'/': ('text/html; charset=utf-8', ROUTER_PAGE.encode('utf-8'))}
+
+    class PageHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            if self.path not in routes:
+                self.send_error(404)
+                return
+            content_type, body = routes[self.path]
+            if etag is not None and self.headers.get('If-None-Match') == etag:
+                self.server.not_modified.append(self.path)
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Server', 'lighttpd')
+                self.end_headers()
+                return
+            self.send_response(200)
+            if etag is not None:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Server', 'lighttpd')
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Клиент закрыл соединение, не дочитав тело
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    class CountingServer(ThreadingHTTPServer):
+        daemon_threads = True
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.connections = []
+            self.not_modified = []
+        
+        def process_request(self, request, client_address):
+            self.connections.append(client_address)
+            super().process_request(request, client_address)
+
+    server = CountingServer(('127.0.0.1', 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+@pytest.fixture
+def local_http_server():
+    """Фикстура с локальным HTTP-сервером, отдающим страницу роутера"""
+    server = start_test_server()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def counting_http_server():
+    """Фикстура с HTTP-сервером, запоминающим входящие соединения"""
+    server = start_test_server()
+    host, port = server.server_address
+    yield host, port, server.connections
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def etag_http_server():
+    """Фикстура с HTTP-сервером, поддерживающим условные запросы по ETag"""
+    server = start_test_server(etag='"v1"')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def closed_port():
+    """Фикстура с номером заведомо закрытого порта на 127.0.0.1"""
+    import socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+# Страница в 1 МБ с заголовком в начале
+LARGE_PAGE = (
+    b"<html><head><title>Camera Live View</title></head><body>"
+    + b"<div>frame</div>" * 65536 + b"</body></html>"
+)
+
+@pytest.fixture
+def large_page_server():
+    """Фикстура с сервером, отдающим большую страницу и бинарный поток"""
+    server = start_test_server({
+        '/': ('text/html', LARGE_PAGE),
+        '/video': ('multipart/x-mixed-replace; boundary=frame', b"\xff\xd8" * 65536),
+    })
+    host, port = server.server_address
+    yield host, port
+    server.shutdown()
+    server.server_close()
+
+# Иконка устройства для сигнатур по хешу favicon
+FAVICON = b"\x00\x00\x01\x00\x01\x00\x10\x10" + b"\x42" * 300
+
+@pytest.fixture
+def favicon_server():
+    """Фикстура с сервером, отдающим страницу и /favicon.ico"""
+    server = start_test_server({
+        '/': ('text/html; charset=utf-8', b"<html><head><title>Device</title></head><body>Welcome</body></html>"),
+        '/favicon.ico': ('image/x-icon', FAVICON),
+    })
+    host, port = server.server_address
+    yield host, port
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def favicon_matcher():
+    """Фикстура с классификатором, знающим FAVICON как камеру acme"""
+    from network_scanner.fingerprints import FingerprintMatcher, favicon_hash, load_database
+    database = load_database()
+    database['signatures'] = [
+        {'name': 'acme-cam', 'vendor': 'acme', 'device_type': 'camera', 'favicon': [favicon_hash(FAVICON)]},
+    ]
+    return FingerprintMatcher(database)
@@ -0,0 +1,126 @@
+"""
+Тесты адаптивного таймаута и управления параллельностью
+"""
+
+import errno
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from src.network_scanner import AsyncNetworkScanner, NetworkScanner
+from src.network_scanner.adaptive import (
+    ANSWERED, FAILED, SILENT, UNREACHABLE, AdaptiveController, classify_connect, is_connection_reset,
+)
+
+def feed_hosts(controller, count, answered=1, silent=0, rtt=0.001):
+    """Сообщает контроллеру исходы count хостов"""
+    for index in range(count):
+        ip = f'10.0.{index // 256}.{index % 256}'
+        for _ in range(answered):
+            controller.record_port(ip, ANSWERED, rtt)
+        for _ in range(silent):
+            controller.record_port(ip, SILENT)
+        controller.finish_host(ip)
+
+class TestAdaptiveController:
+    """Тесты подстройки таймаута и AIMD"""
+    
+    @pytest.mark.parametrize('error, outcome', [
+        (0, ANSWERED), (errno.ECONNREFUSED, ANSWERED), (None, SILENT),
+        (errno.EHOSTUNREACH, UNREACHABLE), (errno.ENOBUFS, FAILED),
+    ])
+    def test_classify_connect(self, error, outcome):
+        """Тест классификации исходов подключения"""
+        assert classify_connect(error) == outcome
+    
+    def test_timeout_shrinks_on_fast_network(self):
+        """Тест что на быстрой сети таймаут падает до p99 x factor"""
+        controller = AdaptiveController(2.0, 50, min_timeout=0.001, window=10, min_samples=5)
+        feed_hosts(controller, 40, rtt=0.002)
+        assert controller.timeout == pytest.approx(0.006)
+        assert controller.summary()['rtt_p99_ms'] == 2.0
+    
+    def test_timeout_bounds(self):
+        """Тест что таймаут не выходит за пределы min_timeout и max_timeout"""
+        controller = AdaptiveController(1.0, 50, window=10, min_samples=5)
+        feed_hosts(controller, 40, rtt=0.0001)
+        assert controller.timeout == 0.05
+        controller = AdaptiveController(1.0, 50, max_timeout=2.0, window=10, min_samples=5)
+        feed_hosts(controller, 40, rtt=0.9)
+        assert controller.timeout == 2.0
+    
+    def test_no_adjustment_without_samples(self):
+        """Тест что без достаточного числа измерений таймаут исходный"""
+        controller = AdaptiveController(2.0, 50, window=10, min_samples=100)
+        feed_hosts(controller, 20, rtt=0.001)
+        assert controller.timeout == 2.0
+    
+    def test_multiplicative_decrease_and_additive_increase(self):
+        """Тест что всплеск потерь вдвое снижает параллельность, а чистые окна возвращают ее"""
+        controller = AdaptiveController(2.0, 40, window=20)
+        feed_hosts(controller, 5, answered=1, silent=3)
+        assert controller.concurrency == 20
+        assert controller.backoffs == 1
+        feed_hosts(controller, 200, answered=4)
+        assert controller.concurrency == 40
+        summary = controller.summary()
+        assert summary['min_concurrency'] == 20
+        assert summary['max_concurrency'] == 40
+    
+    def test_silent_hosts_are_not_losses(self):
+        """Тест что полностью молчащие (несуществующие) хосты не считаются потерями"""
+        controller = AdaptiveController(2.0, 40, window=20)
+        feed_hosts(controller, 50, answered=0, silent=4)
+        assert controller.concurrency == 40
+        assert controller.backoffs == 0
+    
+    def test_steady_loss_becomes_baseline(self):
+        """Тест что постоянно фильтруемые порты перестают вызывать снижение"""
+        controller = AdaptiveController(2.0, 1000, window=20)
+        feed_hosts(controller, 400, answered=3, silent=1)
+        backoffs = controller.backoffs
+        feed_hosts(controller, 400, answered=3, silent=1)
+        assert controller.backoffs == backoffs
+    
+    def test_connection_reset_detection(self):
+        """Тест распознавания сброса соединения, обернутого requests"""
+        try:
+            try:
+                raise ConnectionResetError(errno.ECONNRESET, 'Connection reset by peer')
+            except ConnectionResetError as e:
+                raise requests.exceptions.ConnectionError(('Connection aborted.', e))
+        except requests.exceptions.ConnectionError as wrapped:
+            assert is_connection_reset(wrapped)
+        assert not is_connection_reset(requests.exceptions.ConnectTimeout('timed out'))
+
+class TestAdaptiveScanning:
+    """Тесты контроллера в движках сканирования"""
+    
+    def test_thread_engine(self, local_http_server, closed_port):
+        """Тест что сканер на потоках передает контроллеру измерения и находит сервис"""
+        host, port = local_http_server
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [port, closed_port]
+        scanner.adaptive = AdaptiveController(1, 10)
+        
+        with patch('builtins.print'):
+            results = scanner.scan_network()
+        
+        assert [r['port'] for r in results] == [port]
+        assert scanner.adaptive.probes == 2
+        assert len(scanner.adaptive.rtts) == 2
+    
+    def test_async_engine(self, local_http_server, closed_port):
+        """Тест что asyncio-сканер передает контроллеру измерения и находит сервис"""
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [port, closed_port]
+        scanner.adaptive = AdaptiveController(1, 10)
+        
+        with patch('builtins.print'):
+            results = scanner.scan_network()
+        
+        assert [r['port'] for r in results] == [port]
+        assert scanner.adaptive.probes == 2
+        assert len(scanner.adaptive.rtts) == 2
@@ -0,0 +1,109 @@
+"""
+Тесты для асинхронного движка AsyncNetworkScanner
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from src.network_scanner import AsyncNetworkScanner, NetworkScanner
+
+class TestAsyncNetworkScanner:
+    """Тесты движка asyncio"""
+    
+    def test_initialization(self):
+        """Тест инициализации с ограничением одновременных проб"""
+        scanner = AsyncNetworkScanner(concurrency=500)
+        assert scanner.concurrency == 500
+        assert scanner.common_ports == NetworkScanner().common_ports
+    
+    def test_check_port_async_open(self, local_http_server):
+        """Тест проверки открытого порта"""
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(timeout=1)
+        assert asyncio.run(scanner.check_port_async(host, port)) is True
+    
+    def test_check_port_async_closed(self, closed_port):
+        """Тест проверки закрытого порта"""
+        scanner = AsyncNetworkScanner(timeout=1)
+        assert asyncio.run(scanner.check_port_async('127.0.0.1', closed_port)) is False
+    
+    def test_same_result_as_threads_engine(self, local_http_server):
+        """Тест что результат совпадает с check_web_service"""
+        host, port = local_http_server
+        async_result = asyncio.run(AsyncNetworkScanner(timeout=2).check_web_service_async(host, port))
+        sync_result = NetworkScanner(timeout=2).check_web_service(host, port)
+        
+        assert async_result == sync_result
+        assert async_result['title'] == 'Router Admin Panel'
+        assert async_result['is_router'] is True
+    
+    def test_scan_network(self, local_http_server, closed_port):
+        """Тест сканирования сети из одного адреса"""
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(network=f"{host}/32", timeout=1, concurrency=10)
+        scanner.common_ports = [port, closed_port]
+        
+        with patch('builtins.print'):
+            results = scanner.scan_network()
+        
+        assert len(results) == 1
+        assert results[0]['port'] == port
+        assert results[0]['url'] == f"http://{host}:{port}"
+    
+    def test_probe_reuses_connection(self, counting_http_server):
+        """Тест что проверка порта и GET-запрос идут по одному соединению"""
+        host, port, connections = counting_http_server
+        scanner = AsyncNetworkScanner(timeout=2)
+        
+        result = asyncio.run(scanner.probe(host, port))
+        
+        assert result['title'] == 'Router Admin Panel'
+        assert len(connections) == 1
+    
+    def test_favicon_signature(self, favicon_server, favicon_matcher):
+        """Тест загрузки favicon в асинхронном движке"""
+        host, port = favicon_server
+        scanner = AsyncNetworkScanner(timeout=2)
+        scanner.matcher = favicon_matcher
+        scanner.favicon = True
+        
+        result = asyncio.run(scanner.check_web_service_async(host, port))
+        
+        assert result['vendor'] == 'acme'
+    
+    def test_favicon_follows_redirect(self, favicon_matcher):
+        """Тест что favicon берется с адреса после редиректов, как в движке потоков"""
+        from src.network_scanner.http_client import PageResponse
+        page = PageResponse('https://10.0.0.1:8443/login', 200, {'Content-Type': 'text/html'},
+                            b"<html><head><title>Device</title></head></html>")
+        scanner = AsyncNetworkScanner(timeout=1)
+        scanner.matcher = favicon_matcher
+        scanner.favicon = True
+        requested = []
+        
+        async def fetch_favicon_async(page_url):
+            requested.append(page_url)
+            return None
+        
+        with patch('src.network_scanner.async_scanner.async_http_get', return_value=page), \
+             patch.object(scanner, 'fetch_favicon_async', side_effect=fetch_favicon_async):
+            result = asyncio.run(scanner.check_web_service_async('10.0.0.1', 80))
+        
+        assert result is not None
+        assert requested == ['https://10.0.0.1:8443/login']
+    
+    def test_iter_scan(self, local_http_server, closed_port):
+        """Тест потоковой выдачи результатов асинхронным движком"""
+        from src.network_scanner.sinks import ListSink
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(network=f"{host}/32", timeout=1, concurrency=10)
+        scanner.common_ports = [port, closed_port]
+        sink = ListSink()
+        scanner.sinks.append(sink)
+        
+        with patch('builtins.print'):
+            results = list(scanner.iter_scan())
+        
+        assert [r['port'] for r in results] == [port]
+        assert sink.results == results
+        assert scanner.results == []
@@ -0,0 +1,113 @@
+"""
+Тесты кеша классификации страниц
+"""
+
+from unittest.mock import patch
+
+from src.network_scanner import NetworkScanner
+from src.network_scanner.cache import ClassificationCache, page_key
+from src.network_scanner.fingerprints import FingerprintMatcher, load_database
+from src.network_scanner.http_client import PageResponse
+
+ROUTER_PAGE = b"<html><head><title>Router Login</title></head><body><form>password</form></body></html>"
+
+def make_entry(title='Router'):
+    """Запись кеша для тестов"""
+    return {'title': title, 'encoding': 'utf-8', 'device_type': 'router', 'vendor': 'unknown',
+            'is_router': True, 'matched_rules': ['router:form']}
+
+class TestClassificationCache:
+    """Тесты LRU-кеша"""
+
+    def test_hit_and_miss_counters(self):
+        """Тест счетчиков попаданий и промахов"""
+        cache = ClassificationCache()
+        assert cache.get('a') is None
+        cache.put('a', make_entry())
+        assert cache.get('a')['title'] == 'Router'
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'hit_rate': 0.5}
+
+    def test_lru_eviction(self):
+        """Тест что вытесняется давно не использованная запись"""
+        cache = ClassificationCache(maxsize=2)
+        cache.put('a', make_entry('A'))
+        cache.put('b', make_entry('B'))
+        cache.get('a')
+        cache.put('c', make_entry('C'))
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a')['title'] == 'A'
+
+    def test_entries_are_copied(self):
+        """Тест что изменение полученного результата не портит кеш"""
+        cache = ClassificationCache()
+        cache.put('a', make_entry())
+        cache.get('a')['matched_rules'].append('extra')
+        assert cache.get('a')['matched_rules'] == ['router:form']
+
+    def test_persistence(self, tmp_path):
+        """Тест сохранения и загрузки с ограничением размера"""
+        path = tmp_path / 'cache.json'
+        cache = ClassificationCache()
+        for name in 'abc':
+            cache.put(name, make_entry(name))
+        cache.save(path)
+
+        restored = ClassificationCache(maxsize=2)
+        assert restored.load(path) == 3
+        assert restored.get('a') is None
+        assert restored.get('c')['title'] == 'c'
+
+    def test_broken_file_is_ignored(self, tmp_path):
+        """Тест что поврежденный файл кеша не мешает работе"""
+        path = tmp_path / 'cache.json'
+        path.write_text('{broken')
+        cache = ClassificationCache()
+        assert cache.load(path) == 0
+        assert cache.load(tmp_path / 'missing.json') == 0
+
+    def test_key_depends_on_inputs(self):
+        """Тест что ключ учитывает базу, заголовки, favicon и тело"""
+        base = page_key('db1', 'lighttpd', 'text/html', ROUTER_PAGE)
+        assert base == page_key('db1', 'lighttpd', 'text/html', ROUTER_PAGE)
+        assert base != page_key('db2', 'lighttpd', 'text/html', ROUTER_PAGE)
+        assert base != page_key('db1', 'nginx', 'text/html', ROUTER_PAGE)
+        assert base != page_key('db1', 'lighttpd', 'text/html; charset=cp1251', ROUTER_PAGE)
+        assert base != page_key('db1', 'lighttpd', 'text/html', ROUTER_PAGE, favicon='123')
+        assert base != page_key('db1', 'lighttpd', 'text/html', ROUTER_PAGE + b' ')
+
+class TestScannerCache:
+    """Тесты кеша в сканере"""
+
+    def test_identical_pages_are_classified_once(self):
+        """Тест что одинаковые страницы разных хостов разбираются один раз"""
+        scanner = NetworkScanner()
+        headers = {'Server': 'lighttpd', 'Content-Type': 'text/html'}
+        with patch.object(scanner, 'classify_page', wraps=scanner.classify_page) as classify_page:
+            results = [
+                scanner.build_result(f'10.0.0.{i}', 80, f'http://10.0.0.{i}:80',
+                                     PageResponse(f'http://10.0.0.{i}:80', 200, headers, ROUTER_PAGE))
+                for i in range(1, 4)
+            ]
+        assert classify_page.call_count == 1
+        assert [r['ip'] for r in results] == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+        assert all(r['title'] == 'Router Login' and r['is_router'] for r in results)
+        assert scanner.classify_cache.stats()['hits'] == 2
+
+    def test_other_database_misses(self):
+        """Тест что после смены базы отпечатков кеш не используется"""
+        scanner = NetworkScanner()
+        response = PageResponse('http://10.0.0.1:80', 200, {'Content-Type': 'text/html'}, ROUTER_PAGE)
+        scanner.build_result('10.0.0.1', 80, response.url, response)
+        database = load_database()
+        database['device_types'] = {'router': {'keywords': ['nothing-matches']}}
+        scanner.matcher = FingerprintMatcher(database)
+        scanner.build_result('10.0.0.1', 80, response.url, response)
+        assert scanner.classify_cache.stats()['misses'] == 2
+
+    def test_cache_can_be_disabled(self):
+        """Тест работы без кеша"""
+        scanner = NetworkScanner()
+        scanner.classify_cache = None
+        response = PageResponse('http://10.0.0.1:80', 200, {'Content-Type': 'text/html'}, ROUTER_PAGE)
+        assert scanner.build_result('10.0.0.1', 80, response.url, response)['title'] == 'Router Login'
@@ -0,0 +1,81 @@
+"""
+Тесты контрольной точки сканирования
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner.checkpoint import Checkpoint
+from src.network_scanner.scanner import NetworkScanner
+
+class TestCheckpoint:
+    """Тесты журнала завершенных хостов"""
+    
+    def test_flush_and_load(self, tmp_path):
+        """Тест сохранения и загрузки журнала"""
+        path = tmp_path / 'scan.ckpt'
+        checkpoint = Checkpoint(path)
+        checkpoint.bind('192.168.1.0/24', [8080, 80], jsonl='scan.jsonl')
+        for last in (1, 2, 3, 7):
+            checkpoint.mark_done(f'192.168.1.{last}')
+        checkpoint.flush()
+        
+        loaded = Checkpoint(path)
+        assert loaded.load()
+        assert loaded.network == '192.168.1.0/24'
+        assert loaded.ports == [80, 8080]
+        assert loaded.jsonl == 'scan.jsonl'
+        assert loaded.is_done('192.168.1.2') and loaded.is_done('192.168.1.7')
+        assert not loaded.is_done('192.168.1.4')
+        assert len(json.loads(path.read_text())['completed']) == 2
+    
+    def test_missing_and_corrupt(self, tmp_path):
+        """Тест отсутствующего и испорченного журнала"""
+        assert not Checkpoint(tmp_path / 'missing.ckpt').load()
+        path = tmp_path / 'broken.ckpt'
+        path.write_text('{"network": ', encoding='utf-8')
+        with pytest.raises(ValueError):
+            Checkpoint(path).load()
+    
+    def test_bind_mismatch(self, tmp_path):
+        """Тест что журнал другого сканирования не подхватывается"""
+        checkpoint = Checkpoint(tmp_path / 'scan.ckpt')
+        checkpoint.bind('192.168.1.0/24', [80])
+        checkpoint.bind('192.168.1.0/24', [80])
+        with pytest.raises(ValueError):
+            checkpoint.bind('10.0.0.0/24', [80])
+        with pytest.raises(ValueError):
+            checkpoint.bind('192.168.1.0/24', [80, 443])
+    
+    def test_periodic_flush(self, tmp_path):
+        """Тест что журнал сбрасывается на диск по таймеру"""
+        path = tmp_path / 'scan.ckpt'
+        checkpoint = Checkpoint(path, flush_interval=0)
+        checkpoint.mark_done('10.0.0.1')
+        assert path.exists()
+    
+    def test_resume_skips_finished_hosts(self, counting_http_server, tmp_path):
+        """Тест что при возобновлении завершенные хосты не сканируются повторно"""
+        host, port, connections = counting_http_server
+        path = tmp_path / 'scan.ckpt'
+        
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [port]
+        scanner.checkpoint = Checkpoint(path)
+        with patch('builtins.print'):
+            assert len(list(scanner.iter_scan())) == 1
+        
+        checkpoint = Checkpoint(path)
+        assert checkpoint.load()
+        assert checkpoint.finished
+        assert checkpoint.is_done(host)
+        
+        served = len(connections)
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [port]
+        scanner.checkpoint = checkpoint
+        with patch('builtins.print'):
+            assert list(scanner.iter_scan()) == []
+        assert len(connections) == served
@@ -2,6 +2,9 @@
 Тесты для CLI интерфейса (использует argparse, не click)
 """
 
+import json
+import os
+import time
 import pytest
 import sys
 from unittest.mock import patch, MagicMock
@@ -208,4 +211,580 @@ class TestCLI:
                     if e.code == 0:
                         assert True
                     else:
-                        raise
\ No newline at end of file
+                        raise
+    
+    def test_cli_asyncio_engine(self):
+        """Тест выбора движка asyncio"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.AsyncNetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--engine', 'asyncio', '--concurrency', '2000']):
+                main()
+            
+            MockScanner.assert_called_once_with(
+                network="192.168.1.0/24",
+                timeout=2,
+                threads=50,
+                concurrency=2000
+            )
+    
+    def test_cli_fingerprints_database(self):
+        """Тест подключения своей базы отпечатков и загрузки favicon"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--fingerprints', 'devices.yaml', '--favicon']):
+                main()
+            
+            mock_scanner.load_fingerprints.assert_called_once_with('devices.yaml')
+            assert mock_scanner.favicon is True
+    
+    def test_cli_jsonl_streaming(self):
+        """Тест потоковой записи находок в JSON Lines"""
+        from src.network_scanner.cli import main
+        
+        router = {'ip': '192.168.1.1', 'port': 80, 'url': 'http://192.168.1.1:80',
+                  'title': 'Router Admin', 'is_router': True}
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.cli.JSONLinesSink') as MockSink, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.sinks = []
+            mock_scanner.iter_scan.return_value = iter([router])
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--jsonl', 'found.jsonl']):
+                main()
+            
+            MockSink.assert_called_once_with('found.jsonl', append=False)
+            assert mock_scanner.sinks == [MockSink.return_value]
+            MockSink.return_value.close.assert_called_once()
+            mock_scanner.scan_network.assert_not_called()
+            mock_scanner.save_results.assert_called_once_with(source='found.jsonl')
+            assert 'Web interfaces found: 1' in mock_stdout.getvalue()
+    
+    def test_cli_resume_from_checkpoint(self, tmp_path):
+        """Тест возобновления сканирования по контрольной точке"""
+        import json
+        from src.network_scanner.checkpoint import Checkpoint
+        from src.network_scanner.cli import main
+        
+        jsonl = tmp_path / 'scan.jsonl'
+        jsonl.write_text(json.dumps({'ip': '10.0.0.1', 'port': 80, 'url': 'http://10.0.0.1:80',
+                                   'title': 'Router', 'is_router': True}) + '\n',
+                         encoding='utf-8')
+        previous = Checkpoint(tmp_path / 'scan.ckpt')
+        previous.bind('10.0.0.0/24', [80], jsonl=jsonl)
+        previous.mark_done('10.0.0.1')
+        previous.flush()
+        
+        new = {'ip': '10.0.0.2', 'port': 80, 'url': 'http://10.0.0.2:80',
+               'title': 'NAS', 'is_router': False}
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.cli.JSONLinesSink') as MockSink, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.sinks = []
+            mock_scanner.common_ports = [80]
+            mock_scanner.iter_scan.return_value = iter([new])
+            MockScanner.return_value = mock_scanner
+            
+            argv = ['network-scanner', '-n', '10.0.0.0/24',
+                    '--checkpoint', str(tmp_path / 'scan.ckpt'), '--resume']
+            with patch('sys.argv', argv):
+                main()
+            
+            MockSink.assert_called_once_with(str(jsonl), append=True)
+            assert mock_scanner.checkpoint.is_done('10.0.0.1')
+            assert 'Web interfaces found: 2' in mock_stdout.getvalue()
+            assert 'POSSIBLE ROUTERS/REPEATERS (1)' in mock_stdout.getvalue()
+    
+    def test_cli_resume_requires_checkpoint(self):
+        """Тест что --resume без --checkpoint отклоняется"""
+        from src.network_scanner.cli import main
+        
+        with patch('sys.argv', ['network-scanner', '--resume']), \
+             patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(SystemExit):
+                main()
+    
+    def test_cli_multiple_networks(self, tmp_path):
+        """Тест нескольких сетей и файла целей в одном запуске"""
+        from src.network_scanner.cli import main
+        
+        targets = tmp_path / 'networks.txt'
+        targets.write_text('172.16.0.0/24\n# резерв\n10.0.0.1-20\n', encoding='utf-8')
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            
+            argv = ['network-scanner', '-n', '192.168.0.0/24', '-n', '192.168.1.0/24',
+                    '--targets-file', str(targets), '-x', '10.0.0.1']
+            with patch('sys.argv', argv):
+                main()
+            
+            MockScanner.assert_called_once_with(
+                network='192.168.0.0/24,192.168.1.0/24,172.16.0.0/24,10.0.0.1-20',
+                timeout=2,
+                threads=50
+            )
+            assert mock_scanner.exclude == ['10.0.0.1']
+    
+    def test_cli_processes(self):
+        """Тест запуска сканирования в нескольких процессах"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.cli.ProcessScanner') as MockRunner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            MockScanner.return_value = mock_scanner
+            MockRunner.return_value.scan_network.return_value = []
+            
+            with patch('sys.argv', ['network-scanner', '--processes', '4']):
+                main()
+            
+            MockRunner.assert_called_once_with(mock_scanner, 4)
+            mock_scanner.scan_network.assert_not_called()
+            assert 'Web interfaces found: 0' in mock_stdout.getvalue()
+    
+    def test_cli_interrupted(self):
+        """Тест что Ctrl-C завершает CLI сообщением, а не трассировкой"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.side_effect = KeyboardInterrupt
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner']):
+                assert main() == 130
+            
+            assert 'Scan interrupted' in mock_stdout.getvalue()
+    
+    def test_cli_worker(self):
+        """Тест подкоманды рабочего узла"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.run_worker', return_value=3) as mock_run, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            with patch('sys.argv', ['network-scanner', 'worker', 'scanhost:9000', '--name', 'site-b',
+                                    '--token', 's3cret']):
+                assert main() == 0
+            
+            mock_run.assert_called_once_with(('scanhost', 9000), name='site-b', fingerprints=None,
+                                             token='s3cret')
+            assert '3 work units' in mock_stdout.getvalue()
+    
+    def test_cli_coordinator(self):
+        """Тест запуска координатора вместо локального сканирования (по умолчанию только localhost)"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.cli.Coordinator') as MockCoordinator, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            MockScanner.return_value = mock_scanner
+            MockCoordinator.return_value.address = ('127.0.0.1', 9000)
+            MockCoordinator.return_value.scan_network.return_value = []
+            
+            with patch('sys.argv', ['network-scanner', '--coordinator', ':9000', '--lease-timeout', '30',
+                                    '--token', 's3cret']):
+                main()
+            
+            MockCoordinator.assert_called_once_with(mock_scanner, '127.0.0.1', 9000, lease_timeout=30.0,
+                                                    token='s3cret')
+            mock_scanner.scan_network.assert_not_called()
+    
+    def test_cli_coordinator_without_token(self):
+        """Тест предупреждения о координаторе без токена на внешнем адресе"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner'), \
+             patch('src.network_scanner.cli.Coordinator') as MockCoordinator, \
+             patch.dict('os.environ', {'NETWORK_SCANNER_TOKEN': ''}), \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            del os.environ['NETWORK_SCANNER_TOKEN']
+            MockCoordinator.return_value.address = ('0.0.0.0', 9000)
+            MockCoordinator.return_value.scan_network.return_value = []
+            
+            with patch('sys.argv', ['network-scanner', '--coordinator', '0.0.0.0:9000']):
+                main()
+            
+            assert MockCoordinator.call_args.kwargs['token'] is None
+            assert 'Warning: no --token' in mock_stdout.getvalue()
+    
+    def test_cli_adaptive(self):
+        """Тест включения адаптивного таймаута и вывода подобранных значений"""
+        from src.network_scanner.adaptive import AdaptiveController
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--adaptive', '--timeout-factor', '4', '-j', '20']):
+                main()
+            
+            assert isinstance(mock_scanner.adaptive, AdaptiveController)
+            assert mock_scanner.adaptive.factor == 4
+            assert mock_scanner.adaptive.max_concurrency == 20
+            output = mock_stdout.getvalue()
+            assert 'Adaptive timeout: 2.000s' in output
+            assert 'Adaptive concurrency: 20 of 20' in output
+    
+    def test_cli_adaptive_with_workers(self):
+        """Тест что --adaptive не сочетается с рабочими процессами и узлами"""
+        from src.network_scanner.cli import main
+        
+        for extra in (['--processes', '2'], ['--coordinator', ':9000']):
+            with patch('sys.argv', ['network-scanner', '--adaptive'] + extra), \
+                 patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+                with pytest.raises(SystemExit):
+                    main()
+                assert '--adaptive cannot be combined' in mock_stderr.getvalue()
+    
+    def test_cli_classify_cache_with_workers(self):
+        """Тест что --classify-cache не сочетается с рабочими процессами и узлами"""
+        from src.network_scanner.cli import main
+        
+        for extra in (['--processes', '2'], ['--coordinator', ':9000']):
+            with patch('sys.argv', ['network-scanner', '--classify-cache', 'pages.json'] + extra), \
+                 patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+                with pytest.raises(SystemExit):
+                    main()
+                assert '--classify-cache cannot be combined' in mock_stderr.getvalue()
+    
+    def test_cli_rate_limit(self):
+        """Тест настройки бюджета подключений и предела на хост"""
+        from src.network_scanner.ratelimit import RateLimiter
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--rate', '500', '--max-per-host', '2']):
+                main()
+            
+            assert isinstance(mock_scanner.rate_limiter, RateLimiter)
+            assert mock_scanner.rate_limiter.rate == 500
+            assert mock_scanner.rate_limiter.per_host == 2
+    
+    def test_cli_rate_must_be_positive(self):
+        """Тест что нулевой бюджет отклоняется"""
+        from src.network_scanner.cli import main
+        
+        with patch('sys.argv', ['network-scanner', '--rate', '0']), \
+             patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(SystemExit):
+                main()
+    
+    def test_cli_incremental(self, tmp_path):
+        """Тест инкрементального режима: выводятся только изменения с прошлого сканирования"""
+        from src.network_scanner.cli import main
+        from src.network_scanner.targets import TargetSet
+        
+        store_path = tmp_path / 'services.db'
+        result = {'ip': '192.168.1.1', 'port': 80, 'url': 'http://192.168.1.1:80', 'status_code': 200,
+                  'title': 'Router', 'server': 'lighttpd', 'device_type': 'router', 'is_router': True}
+        
+        def run(found):
+            with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+                 patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+                mock_scanner = MagicMock()
+                mock_scanner.sinks = []
+                mock_scanner.results = []
+                mock_scanner.common_ports = [80]
+                mock_scanner.stage_timings = {}
+                mock_scanner.get_hosts.return_value = TargetSet('192.168.1.0/24')
+                
+                def iter_scan():
+                    for item in found:
+                        for sink in mock_scanner.sinks:
+                            sink.write(item)
+                        yield item
+                
+                mock_scanner.iter_scan.side_effect = iter_scan
+                MockScanner.return_value = mock_scanner
+                with patch('sys.argv', ['network-scanner', '--incremental', '--store', str(store_path)]):
+                    assert main() == 0
+                mock_scanner.scan_network.assert_not_called()
+                mock_scanner.print_result.assert_not_called()
+                return mock_stdout.getvalue()
+        
+        output = run([result])
+        assert 'Changes since last scan: 1 new, 0 changed, 0 gone, 0 unchanged' in output
+        assert '192.168.1.1:80' in output
+        
+        output = run([result])
+        assert 'Changes since last scan: 0 new, 0 changed, 0 gone, 1 unchanged' in output
+        
+        output = run([dict(result, title='Camera')])
+        assert "title: 'Router' -> 'Camera'" in output
+        
+        output = run([])
+        assert '0 changed, 1 gone' in output
+    
+    def test_cli_incremental_store_error(self, tmp_path):
+        """Тест что ошибка записи хранилища в конце сканирования выводится, а не скрывается"""
+        import sqlite3
+        from src.network_scanner.cli import main
+        from src.network_scanner.targets import TargetSet
+        
+        store_path = tmp_path / 'services.db'
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.store.ResultStore.finish',
+                   side_effect=sqlite3.OperationalError('database is locked')), \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            mock_scanner = MagicMock()
+            mock_scanner.sinks = []
+            mock_scanner.results = []
+            mock_scanner.common_ports = [80]
+            mock_scanner.stage_timings = {}
+            mock_scanner.get_hosts.return_value = TargetSet('192.168.1.0/24')
+            mock_scanner.iter_scan.return_value = iter([])
+            MockScanner.return_value = mock_scanner
+            with patch('sys.argv', ['network-scanner', '--incremental', '--store', str(store_path)]):
+                assert main() == 0
+        
+        assert f'Cannot update store {store_path}: database is locked' in mock_stdout.getvalue()
+        
+    def test_cli_store_requires_incremental(self):
+        """Тест что --store без --incremental отклоняется"""
+        from src.network_scanner.cli import main
+        
+        with patch('sys.argv', ['network-scanner', '--store', 'x.db']), \
+             patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(SystemExit):
+                main()
+    
+    def test_cli_classify_cache(self):
+        """Тест загрузки и сохранения кеша классификации и вывода его счетчиков"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            mock_scanner.classify_cache.stats.return_value = {'hits': 7, 'misses': 3, 'size': 3, 'hit_rate': 0.7}
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--classify-cache', 'pages.json']):
+                main()
+            
+            mock_scanner.classify_cache.load.assert_called_once_with('pages.json')
+            mock_scanner.classify_cache.save.assert_called_once_with('pages.json')
+            assert 'Classification cache: 7 hits, 3 misses, 3 pages cached' in mock_stdout.getvalue()
+    
+    def test_cli_stats_json(self, tmp_path):
+        """Тест сохранения метрик сканирования и вывода задержек этапов"""
+        from src.network_scanner.cli import main
+        from src.network_scanner.metrics import ScanMetrics
+        
+        metrics = ScanMetrics()
+        metrics.observe('connect', 0.002)
+        metrics.increment('connect_timeouts', 4)
+        stats_path = tmp_path / 'stats.json'
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            mock_scanner.network = '10.0.0.0/24'
+            mock_scanner.stage_timings = {'port_scan': 1.5}
+            mock_scanner.metrics = metrics
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--stats-json', str(stats_path), '--verbose']):
+                main()
+        
+        stats = json.loads(stats_path.read_text())
+        assert stats['stage_timings'] == {'port_scan': 1.5}
+        assert stats['stages']['connect']['count'] == 1
+        assert stats['counters']['connect_timeouts'] == 4
+        output = mock_stdout.getvalue()
+        assert 'Stage latency p50/p99 ms: connect' in output
+        assert '4 timeouts' in output
+    
+    def test_cli_metrics_port(self):
+        """Тест что сервер метрик работает во время сканирования и закрывается после"""
+        from src.network_scanner.cli import main
+        
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('src.network_scanner.cli.MetricsServer') as MockServer, \
+             patch('sys.stdout', new_callable=StringIO):
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.return_value = []
+            MockScanner.return_value = mock_scanner
+            MockServer.return_value.address = ('0.0.0.0', 9464)
+            
+            with patch('sys.argv', ['network-scanner', '--metrics-port', '0.0.0.0:9464']):
+                main()
+            
+            MockServer.assert_called_once_with(mock_scanner.metrics, '0.0.0.0', 9464)
+            MockServer.return_value.close.assert_called_once()
+    
+    def test_cli_metrics_port_must_be_number(self):
+        """Тест что неверный адрес сервера метрик отклоняется"""
+        from src.network_scanner.cli import main
+        
+        with patch('sys.argv', ['network-scanner', '--metrics-port', 'localhost:http']), \
+             patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(SystemExit):
+                main()
+    
+    def test_cli_profile(self, tmp_path, monkeypatch):
+        """Тест профилирования сканирования: файлы в results/ и список затратных функций"""
+        from src.network_scanner.cli import main
+        
+        def busy_scan():
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                pass
+            return []
+        
+        monkeypatch.chdir(tmp_path)
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.scan_network.side_effect = busy_scan
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--profile', 'sampling']):
+                main()
+        
+        assert sorted(path.suffix for path in (tmp_path / 'results').iterdir()) == ['.collapsed', '.pstats']
+        output = mock_stdout.getvalue()
+        assert 'Profile (sampling' in output
+        assert 'busy_scan (test_cli.py' in output
+    
+    def test_cli_jsonl_format(self):
+        """Тест что в --format jsonl stdout содержит только находки, а итоги уходят в stderr"""
+        from src.network_scanner.cli import main
+        
+        result = {'ip': '192.168.1.1', 'port': 80, 'url': 'http://192.168.1.1:80', 'status_code': 200,
+                  'title': 'Router Admin', 'server': 'nginx', 'is_router': True, 'content_length': 1000}
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout, \
+             patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.results = []
+            mock_scanner.iter_scan.return_value = iter([result])
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--format', 'jsonl']):
+                main()
+        
+        assert [json.loads(line) for line in mock_stdout.getvalue().splitlines()] == [result]
+        assert 'Web interfaces found: 1' in mock_stderr.getvalue()
+        assert '\033' not in mock_stderr.getvalue()
+        mock_scanner.print_result.assert_not_called()
+    
+    def test_cli_quiet(self):
+        """Тест тихого режима: только итоги без цветов"""
+        from src.network_scanner.cli import main
+        
+        result = {'ip': '192.168.1.1', 'port': 80, 'url': 'http://192.168.1.1:80', 'status_code': 200,
+                  'title': 'Router Admin', 'server': 'nginx', 'is_router': True, 'content_length': 1000}
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.results = []
+            mock_scanner.iter_scan.return_value = iter([result])
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--quiet']):
+                main()
+        
+        output = mock_stdout.getvalue()
+        assert 'Web interfaces found: 1' in output
+        assert '192.168.1.1:80 - Router Admin' in output
+        assert '\033' not in output
+        mock_scanner.print_result.assert_not_called()
+        mock_scanner.scan_network.assert_not_called()
+    
+    def test_cli_table(self, tmp_path):
+        """Тест колоночной таблицы: разбивка в итогах и файл Parquet"""
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.parquet
+        from src.network_scanner.cli import main
+        
+        results = [
+            {'ip': '10.0.0.1', 'port': 80, 'url': 'http://10.0.0.1:80', 'status_code': 200,
+             'title': 'Router Admin', 'server': 'nginx', 'is_router': True, 'device_type': 'router',
+             'content_length': 1000},
+            {'ip': '10.0.0.7', 'port': 80, 'url': 'http://10.0.0.7:80', 'status_code': 200,
+             'title': 'LaserJet', 'server': 'HP HTTP Server', 'is_router': False, 'device_type': 'printer',
+             'content_length': 500},
+        ]
+        table_path = tmp_path / 'scan.parquet'
+        with patch('src.network_scanner.cli.NetworkScanner') as MockScanner, \
+             patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            
+            mock_scanner = MagicMock()
+            mock_scanner.sinks = []
+            
+            def scan_network():
+                for result in results:
+                    for sink in mock_scanner.sinks:
+                        sink.write(result)
+                return results
+            
+            mock_scanner.scan_network.side_effect = scan_network
+            MockScanner.return_value = mock_scanner
+            
+            with patch('sys.argv', ['network-scanner', '--table', str(table_path)]):
+                main()
+        
+        output = mock_stdout.getvalue()
+        assert 'Device types: printer 1, router 1' in output
+        assert 'Top subnets: 10.0.0.0/24 2' in output
+        data = pyarrow.parquet.read_table(table_path)
+        assert data.column('address').to_pylist() == ['10.0.0.1', '10.0.0.7']
+    
+    def test_cli_table_format(self):
+        """Тест что таблица сохраняется только в Parquet или Feather"""
+        from src.network_scanner.cli import main
+        
+        with patch('sys.argv', ['network-scanner', '--table', 'scan.csv']), \
+             patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+            with pytest.raises(SystemExit):
+                main()
+        assert '.parquet or .feather' in mock_stderr.getvalue()
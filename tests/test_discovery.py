@@ -0,0 +1,185 @@
+"""
+Тесты для предварительного поиска живых хостов
+"""
+
+import os
+import socket
+import struct
+from unittest.mock import MagicMock, patch
+
+from src.network_scanner import NetworkScanner
+from src.network_scanner.discovery import (
+    HostDiscovery, icmp_checksum, build_echo_request, parse_arp_output, parse_proc_arp
+)
+from src.network_scanner.checkpoint import Checkpoint
+from src.network_scanner.ratelimit import RateLimiter
+from src.network_scanner.targets import TargetSet
+
+PROC_ARP = """IP address       HW type     Flags       HW address            Mask     Device
+192.168.1.1      0x1         0x2         a4:91:b1:00:11:22     *        wlan0
+192.168.1.50     0x1         0x0         00:00:00:00:00:00     *        wlan0
+192.168.1.77     0x1         0x2         3c:52:82:aa:bb:cc     *        wlan0
+"""
+
+WINDOWS_ARP = """
+Interface: 192.168.1.10 --- 0x5
+  Internet Address      Physical Address      Type
+  192.168.1.1           a4-91-b1-00-11-22     dynamic
+  192.168.1.255         ff-ff-ff-ff-ff-ff     static
+"""
+
+class TestHostDiscovery:
+    """Тесты обнаружения хостов"""
+    
+    def test_parse_proc_arp(self):
+        """Тест разбора /proc/net/arp: неполные записи пропускаются"""
+        assert parse_proc_arp(PROC_ARP) == {'192.168.1.1', '192.168.1.77'}
+    
+    def test_parse_arp_output(self):
+        """Тест разбора вывода arp -a (Windows): широковещательные пропускаются"""
+        assert parse_arp_output(WINDOWS_ARP) == {'192.168.1.1'}
+    
+    def test_echo_request_checksum(self):
+        """Тест что контрольная сумма пакета ICMP сходится"""
+        packet = build_echo_request(0x1234, 1)
+        assert packet[0] == 8
+        assert icmp_checksum(packet) == 0
+    
+    def test_tcp_probe_open_and_refused(self, local_http_server, closed_port):
+        """Тест что и открытый порт, и RST означают живой хост"""
+        host, port = local_http_server
+        assert HostDiscovery(timeout=1, sentinel_ports=[port]).tcp_probe(host) is True
+        assert HostDiscovery(timeout=1, sentinel_ports=[closed_port]).tcp_probe(host) is True
+    
+    def test_icmp_sweep_raw_checks_identifier(self):
+        """Тест что на RAW-сокете ответы на чужие echo request не засчитываются"""
+        ip_header = bytes([0x45]) + bytes(19)
+        
+        def reply(identifier):
+            return ip_header + struct.pack('!BBHHH', 0, 0, 0, identifier, 0)
+        
+        own = os.getpid() & 0xffff
+        sock = MagicMock()
+        sock.recvfrom.side_effect = [
+            (reply(own ^ 0xffff), ('10.0.0.1', 0)),
+            (reply(own), ('10.0.0.2', 0)),
+            socket.timeout,
+        ]
+        discovery = HostDiscovery(timeout=1)
+        
+        with patch.object(discovery, 'open_icmp_socket', return_value=(sock, True)):
+            assert discovery.icmp_sweep(['10.0.0.1', '10.0.0.2']) == {'10.0.0.2'}
+    
+    def test_icmp_sweep_waits_for_rate_limiter(self):
+        """Тест что каждый ICMP-запрос ждет токен общего бюджета"""
+        events = []
+        limiter = MagicMock()
+        limiter.wait.side_effect = lambda: events.append('wait')
+        sock = MagicMock()
+        sock.sendto.side_effect = lambda packet, address: events.append(address[0])
+        sock.recvfrom.side_effect = socket.timeout
+        discovery = HostDiscovery(timeout=0.1, rate_limiter=limiter)
+        
+        with patch.object(discovery, 'open_icmp_socket', return_value=(sock, False)):
+            assert discovery.icmp_sweep(['10.0.0.1', '10.0.0.2']) == set()
+        
+        assert events == ['wait', '10.0.0.1', 'wait', '10.0.0.2']
+    
+    def test_tcp_probe_uses_rate_limiter(self):
+        """Тест что TCP-проба передает бюджет и предел на хост в connect_many"""
+        limiter = RateLimiter(100, per_host=2)
+        discovery = HostDiscovery(timeout=1, sentinel_ports=[80, 443], rate_limiter=limiter)
+        
+        with patch('src.network_scanner.discovery.connect_many', return_value=iter([])) as mock_connect:
+            assert discovery.tcp_probe('10.0.0.1') is False
+        
+        mock_connect.assert_called_once_with('10.0.0.1', [80, 443], 1, gate=limiter.wait, max_parallel=2)
+    
+    def test_discover_combines_methods(self):
+        """Тест объединения результатов ARP, ICMP и TCP"""
+        discovery = HostDiscovery()
+        hosts = ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4']
+        
+        with patch.object(discovery, 'read_arp_table', return_value={'10.0.0.1', '10.9.9.9'}), \
+             patch.object(discovery, 'icmp_sweep', return_value={'10.0.0.3'}) as mock_icmp, \
+             patch.object(discovery, 'tcp_probe', side_effect=lambda ip: ip == '10.0.0.4'):
+            live = discovery.discover(hosts)
+        
+        assert list(live) == ['10.0.0.1', '10.0.0.3', '10.0.0.4']
+        assert list(mock_icmp.call_args.args[0]) == ['10.0.0.2', '10.0.0.3', '10.0.0.4']
+        assert discovery.found_by == {'arp': 1, 'icmp': 1, 'tcp': 1}
+    
+    def test_tcp_sweep_is_bounded(self):
+        """Тест что адреса /20 подаются в пул порциями, а не все сразу"""
+        discovery = HostDiscovery(threads=4)
+        pulled = 0
+        outstanding = []
+        probed = []
+        
+        class CountingTargets(TargetSet):
+            def __iter__(self):
+                nonlocal pulled
+                for ip in TargetSet.__iter__(self):
+                    pulled += 1
+                    yield ip
+        
+        def probe(ip):
+            outstanding.append(pulled - len(probed))
+            probed.append(ip)
+            return ip.endswith('.7')
+        
+        targets = CountingTargets.from_ranges(TargetSet('10.0.0.0/20').ranges)
+        with patch.object(discovery, 'tcp_probe', side_effect=probe):
+            live = discovery.tcp_sweep(targets)
+        
+        assert len(probed) == 4094
+        assert len(live) == 16
+        assert pulled == 4094
+        # В очереди пула не больше threads * SUBMIT_AHEAD адресов
+        assert max(outstanding) <= 4 * 4
+    
+    def test_scanner_discovery_disabled_by_default(self):
+        """Тест что без флага discovery список хостов не меняется"""
+        scanner = NetworkScanner()
+        assert scanner.discovery is False
+        assert scanner.discover_hosts(['10.0.0.1']) == ['10.0.0.1']
+        assert 'discovery' not in scanner.stage_timings
+    
+    def test_scanner_discovery_records_timing(self):
+        """Тест что этап обнаружения записывает время"""
+        scanner = NetworkScanner()
+        scanner.discovery = True
+        
+        with patch.object(HostDiscovery, 'discover', return_value=['10.0.0.2']), \
+             patch('builtins.print'):
+            live = scanner.discover_hosts(['10.0.0.1', '10.0.0.2'])
+        
+        assert live == ['10.0.0.2']
+        assert scanner.stage_timings['discovery'] >= 0
+    
+    def test_scanner_discovery_shares_rate_limiter(self):
+        """Тест что обнаружение расходует бюджет пакетов сканера"""
+        scanner = NetworkScanner()
+        scanner.discovery = True
+        scanner.rate_limiter = RateLimiter(50)
+        
+        with patch('src.network_scanner.scanner.HostDiscovery') as MockDiscovery, \
+             patch('builtins.print'):
+            MockDiscovery.return_value.discover.return_value = []
+            MockDiscovery.return_value.found_by = {}
+            scanner.discover_hosts(['10.0.0.1'])
+        
+        assert MockDiscovery.call_args.kwargs['rate_limiter'] is scanner.rate_limiter
+    
+    def test_prepare_hosts_marks_dead_ranges(self, tmp_path):
+        """Тест что неживые хосты отмечаются в контрольной точке диапазонами"""
+        scanner = NetworkScanner(network='10.0.0.0/24')
+        scanner.discovery = True
+        scanner.checkpoint = Checkpoint(tmp_path / 'scan.ckpt')
+        
+        with patch.object(HostDiscovery, 'discover', return_value=TargetSet('10.0.0.7')), \
+             patch('builtins.print'):
+            live = scanner.prepare_hosts(scanner.get_hosts())
+        
+        assert list(live) == ['10.0.0.7']
+        assert scanner.checkpoint.completed.runs() == [[0x0A000001, 0x0A000006], [0x0A000008, 0x0A0000FE]]
@@ -0,0 +1,172 @@
+"""
+Тесты распределенного сканирования (координатор и узлы на localhost)
+"""
+
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner.checkpoint import Checkpoint
+from src.network_scanner.distributed import (
+    Connection, Coordinator, create_worker_scanner, parse_address, run_worker,
+)
+from src.network_scanner.scanner import NetworkScanner
+
+def make_scanner(host, port, last='127.0.0.6'):
+    """Сканер локального диапазона с одним веб-сервером"""
+    scanner = NetworkScanner(network=f"{host}-{last}", timeout=1, threads=4)
+    scanner.common_ports = [port]
+    return scanner
+
+def lease_unit(connection):
+    """Запрашивает единицу работы, пока координатор не выдаст ее"""
+    while True:
+        connection.send({'type': 'lease'})
+        message = connection.receive()
+        if message['type'] != 'wait':
+            return message
+        time.sleep(0.05)
+
+class TestProtocol:
+    """Тесты вспомогательных функций протокола"""
+    
+    def test_parse_address(self):
+        """Тест разбора адреса координатора"""
+        assert parse_address('scan.local:9000') == ('scan.local', 9000)
+        assert parse_address(':9000', default_host='0.0.0.0') == ('0.0.0.0', 9000)
+        assert parse_address('scan.local') == ('scan.local', 7878)
+        assert parse_address(':9000') == ('127.0.0.1', 9000)
+    
+    def test_worker_settings_are_filtered(self):
+        """Тест что узел применяет только настройки из WORKER_SETTINGS"""
+        scanner = create_worker_scanner({'timeout': 5, 'engine': 'threads', 'network': '0.0.0.0/0',
+                                         'scan_network': None, 'checkpoint': 'evil.ckpt'})
+        assert scanner.timeout == 5
+        assert scanner.network != '0.0.0.0/0'
+        assert callable(scanner.scan_network)
+        assert scanner.checkpoint is None
+    
+    def test_receive_rejects_non_objects(self):
+        """Тест что сообщение, не являющееся объектом JSON, отклоняется"""
+        left, right = socket.socketpair()
+        connection = Connection(left)
+        try:
+            right.sendall(b'[]\n{"type": "heartbeat"}\n')
+            with pytest.raises(ValueError):
+                connection.receive()
+            assert connection.receive() == {'type': 'heartbeat'}
+        finally:
+            connection.close()
+            right.close()
+
+class TestCoordinator:
+    """Тесты координатора с рабочими узлами в потоках"""
+    
+    def test_workers_scan_all_units(self, local_http_server, tmp_path):
+        """Тест что два узла сканируют все единицы, а находки и контрольная точка собираются у координатора"""
+        host, port = local_http_server
+        scanner = make_scanner(host, port)
+        scanner.checkpoint = Checkpoint(tmp_path / 'scan.ckpt')
+        coordinator = Coordinator(scanner, port=0, unit_size=2)
+        units = []
+        
+        with patch('builtins.print'):
+            workers = [
+                threading.Thread(target=lambda: units.append(run_worker(coordinator.address)))
+                for _ in range(2)
+            ]
+            coordinator.start()
+            for worker in workers:
+                worker.start()
+            results = list(coordinator.iter_scan())
+            for worker in workers:
+                worker.join(timeout=10)
+        
+        assert [(r['ip'], r['port']) for r in results] == [(host, port)]
+        assert sum(units) == 3
+        assert scanner.checkpoint.finished
+        assert len(scanner.checkpoint.completed) == 6
+    
+    def test_unit_released_when_worker_disconnects(self, local_http_server):
+        """Тест что единица отключившегося узла переходит к другому без его находок"""
+        host, port = local_http_server
+        scanner = make_scanner(host, port)
+        coordinator = Coordinator(scanner, port=0, unit_size=3)
+        coordinator.start()
+        collected = []
+        
+        with patch('builtins.print'):
+            thread = threading.Thread(target=lambda: collected.extend(coordinator.iter_scan()))
+            fake = Connection(socket.create_connection(coordinator.address))
+            fake.send({'type': 'hello', 'worker': 'fake'})
+            assert fake.receive()['type'] == 'settings'
+            thread.start()
+            
+            unit = lease_unit(fake)
+            assert unit['network'].startswith(host)
+            fake.send({'type': 'result', 'unit': unit['unit'], 'result': {'ip': host, 'port': 1}})
+            fake.close()
+            
+            assert run_worker(coordinator.address) == 2
+            thread.join(timeout=10)
+        
+        assert [(r['ip'], r['port']) for r in collected] == [(host, port)]
+    
+    def test_expired_lease_is_released(self, local_http_server):
+        """Тест что единица молчащего узла передается другому"""
+        host, port = local_http_server
+        scanner = make_scanner(host, port, last='127.0.0.2')
+        coordinator = Coordinator(scanner, port=0, unit_size=2, lease_timeout=0.3)
+        coordinator.start()
+        collected = []
+        
+        with patch('builtins.print'):
+            thread = threading.Thread(target=lambda: collected.extend(coordinator.iter_scan()))
+            silent = Connection(socket.create_connection(coordinator.address))
+            silent.send({'type': 'hello', 'worker': 'silent'})
+            silent.receive()
+            thread.start()
+            assert lease_unit(silent)['type'] == 'unit'
+            
+            assert run_worker(coordinator.address) == 1
+            thread.join(timeout=10)
+            silent.close()
+        
+        assert [(r['ip'], r['port']) for r in collected] == [(host, port)]
+    
+    def test_worker_with_wrong_token_is_rejected(self, local_http_server):
+        """Тест что узел без верного токена не получает ни настроек, ни единиц"""
+        host, port = local_http_server
+        coordinator = Coordinator(make_scanner(host, port), port=0, token='s3cret')
+        coordinator.start()
+        try:
+            intruder = Connection(socket.create_connection(coordinator.address))
+            intruder.send({'type': 'lease'})
+            assert intruder.receive() is None
+            intruder.close()
+            
+            with patch('builtins.print'):
+                assert run_worker(coordinator.address, token='wrong') == 0
+            
+            honest = Connection(socket.create_connection(coordinator.address))
+            honest.send({'type': 'hello', 'worker': 'honest', 'token': 's3cret'})
+            assert honest.receive()['type'] == 'settings'
+            # Сообщение без обязательных полей закрывает только это соединение
+            honest.send({'type': 'done'})
+            assert honest.receive() is None
+            honest.close()
+            
+            # Не объект JSON и поля неверного типа тоже закрывают только соединение
+            for payload in (b'[]\n', b'1\n', b'{"type": "done", "unit": []}\n'):
+                sock = socket.create_connection(coordinator.address)
+                broken = Connection(sock)
+                broken.send({'type': 'hello', 'worker': 'broken', 'token': 's3cret'})
+                assert broken.receive()['type'] == 'settings'
+                sock.sendall(payload)
+                assert broken.receive() is None
+                broken.close()
+        finally:
+            coordinator.close()
@@ -154,4 +154,88 @@ class TestEncodingFunctions:
             
             response = MockResponse(content_type)
             encoding = scanner.detect_encoding(response)
-            assert encoding == expected
\ No newline at end of file
+            assert encoding == expected
+
+class TestCharsetDetection:
+    """Тесты определения кодировки по байтам (модуль encoding)"""
+    
+    @pytest.mark.parametrize('text, encoding', [
+        ("Привет мир, это страница настроек роутера", 'windows-1251'),
+        ("Привет мир, это страница настроек роутера", 'cp866'),
+        ("小米路由器 管理界面 无线设置", 'gbk'),
+        ("繁體中文路由器管理介面設定", 'big5'),
+        ("ルーターの管理画面へようこそ", 'shift-jis'),
+        ("ルーターの管理画面へようこそ", 'euc-jp'),
+        ("Café Müller, naïve résumé", 'iso-8859-1'),
+        ("Привет мир", 'utf-8'),
+    ])
+    def test_byte_statistics(self, text, encoding):
+        """Тест выбора кодировки по статистике старших байтов"""
+        from src.network_scanner.encoding import detect_charset
+        page = b"<html><head><title>" + text.encode(encoding) + b"</title></head></html>"
+        assert detect_charset(page) == encoding
+    
+    def test_meta_charset(self):
+        """Тест что <meta charset> важнее статистики"""
+        from src.network_scanner.encoding import detect_charset
+        page = b'<html><head><meta http-equiv="Content-Type" content="text/html; charset=GB2312">'
+        assert detect_charset(page + "小米".encode('gbk')) == 'gbk'
+        assert detect_charset(b'<meta charset="windows-1251">' + "Вход".encode('cp1251')) == 'windows-1251'
+        # Неизвестное имя игнорируется
+        assert detect_charset(b'<meta charset="no-such-charset">Hello') == 'utf-8'
+    
+    def test_bom(self):
+        """Тест BOM: UTF-16 только при наличии данных после BOM"""
+        from src.network_scanner.encoding import detect_charset
+        assert detect_charset(b'\xef\xbb\xbfHello') == 'utf-8'
+        assert detect_charset("Hi".encode('utf-16')) == 'utf-16'
+        assert detect_charset(b'\xff\xfe') == 'windows-1251'
+    
+    def test_truncated_multibyte_sample(self):
+        """Тест что символ, разрезанный границей образца, не ломает UTF-8"""
+        from src.network_scanner.encoding import SAMPLE_BYTES, detect_charset
+        # Из-за байта 'x' граница образца приходится на середину буквы
+        page = b'x' + ("я" * SAMPLE_BYTES).encode('utf-8')
+        assert detect_charset(page) == 'utf-8'
+    
+    def test_statistics_start_at_first_high_byte(self):
+        """Тест страницы, где текст начинается после длинной ASCII-разметки"""
+        from src.network_scanner.encoding import STATS_BYTES, detect_charset
+        page = b"<html><head>" + b"<!-- padding -->" * (STATS_BYTES // 8) + b"</head><title>"
+        assert detect_charset(page + "Вход в систему".encode('cp1251') + b"</title>") == 'windows-1251'
+
+
+class TestMojibakeRepair:
+    """Тесты однопроходного исправления кракозябр"""
+    
+    @pytest.mark.parametrize('original', [
+        "café niño naïve",
+        "Router – Admin ™",
+        "Настройки роутера",
+        "Página de configuración",
+        "小米路由器 管理",
+    ])
+    def test_roundtrip(self, original):
+        """Тест исправления UTF-8, прочитанного как windows-1252"""
+        from src.network_scanner.encoding import repair_mojibake
+        garbled = ''.join(
+            bytes([byte]).decode('cp1252', errors='ignore') or chr(byte)
+            for byte in original.encode('utf-8')
+        )
+        assert garbled != original
+        assert repair_mojibake(garbled) == (original, 1.0)
+    
+    def test_only_garbled_spans_are_changed(self):
+        """Тест что корректный текст вокруг испорченного фрагмента не трогается"""
+        from src.network_scanner.encoding import repair_mojibake
+        assert repair_mojibake("Привет, cafÃ©!") == ("Привет, café!", 1.0)
+        assert repair_mojibake("Hello") == ("Hello", 1.0)
+        assert repair_mojibake("") == ("", 1.0)
+    
+    def test_confidence_for_unrepairable_text(self):
+        """Тест пониженной уверенности, если кракозябры остались"""
+        from src.network_scanner.encoding import repair_mojibake
+        # Некорректная последовательность UTF-8 (overlong) не декодируется
+        text, confidence = repair_mojibake("Ã©tà\u0080\u0080")
+        assert text.startswith("ét")
+        assert 0 < confidence < 1
@@ -0,0 +1,222 @@
+"""
+Тесты для предкомпилированного классификатора устройств
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+from src.network_scanner.scanner import NetworkScanner
+from src.network_scanner.fingerprints import (
+    FingerprintMatcher,
+    ahocorasick,
+    build_trie_pattern,
+    default_matcher,
+    favicon_hash,
+    load_database,
+    server_keys,
+)
+
+BACKENDS = [
+    'regex',
+    pytest.param('aho-corasick', marks=pytest.mark.skipif(ahocorasick is None, reason='pyahocorasick не установлен')),
+]
+
+@pytest.fixture(params=BACKENDS)
+def matcher(request):
+    """Фикстура с классификатором для каждого доступного движка"""
+    return FingerprintMatcher(backend=request.param)
+
+class TestFingerprintMatcher:
+    """Тесты классификатора"""
+    
+    def test_trie_pattern_prefers_longest(self):
+        """Тест что дерево находит самое длинное слово в позиции"""
+        import re
+        pattern = re.compile(build_trie_pattern(['admin', 'admin panel', 'print', 'printer']))
+        assert pattern.findall("admin panel printer") == ['admin panel', 'printer']
+    
+    def test_scan_matches_substring_checks(self, matcher):
+        """Тест что один проход находит те же слова, что и проверки kw in text"""
+        texts = [
+            "wireless router admin panel",
+            "printerscan wanas lanas",  # перекрывающиеся слова
+            "小米路由器 登录 设置",
+            "routeros mikrotik",
+        ]
+        alphabet = sorted({char for keyword in matcher.keywords for char in keyword if char.isascii()})
+        rng = random.Random(42)
+        texts += [''.join(rng.choice(alphabet) for _ in range(300)) for _ in range(50)]
+        
+        for text in texts:
+            expected = {keyword for keyword in matcher.keywords if keyword in text}
+            assert matcher.scan(text) == expected, text
+    
+    def test_classify_router(self, matcher):
+        """Тест классификации роутера с перечнем сработавших правил"""
+        result = matcher.classify("TP-LINK Wireless Router", "Login and password", "httpd")
+        assert result['device_type'] == 'router'
+        assert result['is_router'] is True
+        assert 'router:keyword:wireless' in result['matched_rules']
+        assert 'router:sign:login+password' in result['matched_rules']
+        assert 'router:server:httpd' in result['matched_rules']
+    
+    def test_classify_nas(self, matcher):
+        """Тест классификации NAS"""
+        result = matcher.classify("Synology DiskStation", "disk volume share folder", "")
+        assert result['device_type'] == 'nas'
+        assert result['is_router'] is False
+    
+    def test_classify_router_fallback(self, matcher):
+        """Тест признаков роутера, когда тип по ключевым словам не определился"""
+        result = matcher.classify("pfSense", "Firewall", "")
+        assert result['device_type'] == 'router'
+        assert result['matched_rules'] == ['brand:pfsense']
+    
+    def test_classify_unknown(self, matcher):
+        """Тест что обычная страница не классифицируется"""
+        result = matcher.classify("Welcome to my site", "This is a personal blog", "Apache")
+        assert result == {'device_type': 'unknown', 'vendor': 'unknown', 'is_router': False, 'matched_rules': []}
+    
+    def test_login_form_uses_whole_content(self, matcher):
+        """Тест что форма входа ищется по всему телу, а не по первым 1000 символам"""
+        content = "x" * 2000 + "<FORM><input name='username'></FORM>"
+        assert matcher.is_router("Device", content) is True
+
+    def test_router_vendor_from_manufacturers(self, matcher):
+        """Тест что у роутера по ключевым словам определяется производитель"""
+        result = matcher.classify("ASUS Wireless Router", "admin settings", "")
+        assert result['device_type'] == 'router'
+        assert result['vendor'] == 'asus'
+
+
+def make_database(signatures):
+    """Встроенная база с заменой сигнатур"""
+    database = load_database()
+    database['signatures'] = signatures
+    return database
+
+
+class TestFingerprintDatabase:
+    """Тесты базы отпечатков и сигнатур"""
+    
+    def test_server_keys(self):
+        """Тест ключей индекса по заголовку Server"""
+        assert server_keys("Boa/0.94.14rc21") == {'boa/0.94.14rc21', 'boa'}
+        assert 'hp http server' in server_keys("HP HTTP Server; HP LaserJet - CF000A")
+        assert server_keys("") == set()
+    
+    def test_server_signature(self, matcher):
+        """Тест сигнатуры по заголовку Server из встроенной базы"""
+        result = matcher.classify("Login", "<html></html>", "App-webs/")
+        assert result['device_type'] == 'camera'
+        assert result['vendor'] == 'hikvision'
+        assert result['matched_rules'] == ['signature:hikvision:server:app-webs']
+    
+    def test_title_signature_requires_title(self):
+        """Тест что слово заголовочной сигнатуры в теле страницы не засчитывается"""
+        matcher = FingerprintMatcher(make_database([
+            {'name': 'keenetic', 'vendor': 'keenetic', 'device_type': 'router', 'title': ['keenetic']},
+        ]))
+        assert matcher.classify("Keenetic Giga", "", "")['vendor'] == 'keenetic'
+        assert matcher.classify("Blog", "I bought a keenetic " * 10, "")['vendor'] == 'unknown'
+    
+    def test_best_signature_wins(self):
+        """Тест что побеждает сигнатура с наибольшим числом совпадений"""
+        matcher = FingerprintMatcher(make_database([
+            {'name': 'generic-cam', 'device_type': 'camera', 'body': ['live view']},
+            {'name': 'acme-cam', 'vendor': 'acme', 'device_type': 'camera',
+             'body': ['live view'], 'server': ['acme-httpd']},
+        ]))
+        result = matcher.classify("Cam", "Live View", "acme-httpd/2.1")
+        assert result['vendor'] == 'acme'
+        assert result['matched_rules'] == [
+            'signature:acme-cam:body:live view', 'signature:acme-cam:server:acme-httpd',
+        ]
+    
+    def test_favicon_signature(self):
+        """Тест сигнатуры по хешу favicon"""
+        icon = favicon_hash(b"icon-bytes")
+        matcher = FingerprintMatcher(make_database([
+            {'name': 'acme-nas', 'vendor': 'acme', 'device_type': 'nas', 'favicon': [icon]},
+        ]))
+        assert matcher.classify("Welcome", "", "", favicon=icon)['device_type'] == 'nas'
+        assert matcher.classify("Welcome", "", "")['device_type'] == 'unknown'
+    
+    def test_load_database_rejects_garbage(self, tmp_path):
+        """Тест что файл не той структуры не принимается за базу"""
+        path = tmp_path / 'bad.json'
+        path.write_text('{"rules": []}', encoding='utf-8')
+        with pytest.raises(ValueError):
+            load_database(path)
+    
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_load_uses_disk_cache(self, tmp_path, monkeypatch, backend):
+        """Тест что повторная загрузка берет разобранную базу и таблицы из кеша"""
+        path = tmp_path / 'db.json'
+        path.write_text(json.dumps(make_database([])), encoding='utf-8')
+        
+        first = FingerprintMatcher.load(path, backend=backend, cache_dir=tmp_path / 'cache')
+        assert len(list((tmp_path / 'cache').glob('*.json'))) == 1
+        
+        # Из кеша база заново не разбирается
+        def fail(*args, **kwargs):
+            raise AssertionError("база разобрана повторно")
+        monkeypatch.setattr('src.network_scanner.fingerprints.load_database', fail)
+        monkeypatch.setattr('src.network_scanner.fingerprints.regex_tables', fail)
+        second = FingerprintMatcher.load(path, backend=backend, cache_dir=tmp_path / 'cache')
+        assert second.keywords == first.keywords
+        assert second.classify("pfSense", "Firewall")['device_type'] == 'router'
+    
+    def test_load_recompiles_changed_database(self, tmp_path):
+        """Тест что изменение файла базы приводит к перекомпиляции"""
+        path = tmp_path / 'db.json'
+        path.write_text(json.dumps(make_database([])), encoding='utf-8')
+        FingerprintMatcher.load(path, cache_dir=tmp_path)
+        
+        path.write_text(json.dumps(make_database([
+            {'name': 'acme', 'vendor': 'acme', 'device_type': 'router', 'title': ['acme box']},
+        ])), encoding='utf-8')
+        matcher = FingerprintMatcher.load(path, cache_dir=tmp_path)
+        assert matcher.classify("ACME Box", "")['vendor'] == 'acme'
+    
+    def test_corrupted_cache_is_rebuilt(self, tmp_path):
+        """Тест что поврежденный кеш не ломает загрузку"""
+        path = tmp_path / 'db.json'
+        path.write_text(json.dumps(make_database([])), encoding='utf-8')
+        FingerprintMatcher.load(path, cache_dir=tmp_path / 'cache')
+        for cache in (tmp_path / 'cache').glob('*.json'):
+            cache.write_bytes(b'not json')
+        assert FingerprintMatcher.load(path, cache_dir=tmp_path / 'cache').is_router("pfSense", "") is True
+    
+    @pytest.mark.skipif(not hasattr(os, 'getuid'), reason='права доступа POSIX')
+    def test_cache_directory_is_private(self, tmp_path):
+        """Тест что каталог кеша создается 0700, а кеш в открытом на запись каталоге не читается"""
+        path = tmp_path / 'db.json'
+        path.write_text(json.dumps(make_database([])), encoding='utf-8')
+        FingerprintMatcher.load(path, cache_dir=tmp_path / 'cache')
+        assert (tmp_path / 'cache').stat().st_mode & 0o777 == 0o700
+        
+        # Подменяем кеш правилом, которого нет в базе
+        cache, = (tmp_path / 'cache').glob('*.json')
+        cached = json.loads(cache.read_text(encoding='utf-8'))
+        cached['database'] = make_database([{'name': 'evil', 'vendor': 'evil', 'title': ['pfsense']}])
+        cache.write_text(json.dumps(cached), encoding='utf-8')
+        assert FingerprintMatcher.load(path, cache_dir=tmp_path / 'cache').classify("pfSense", "")['vendor'] == 'evil'
+        
+        # Из открытого на запись каталога кеш не берется, база компилируется заново
+        (tmp_path / 'cache').chmod(0o777)
+        assert FingerprintMatcher.load(path, cache_dir=tmp_path / 'cache').classify("pfSense", "")['vendor'] != 'evil'
+    
+    def test_default_matcher_does_not_touch_disk(self, tmp_path, monkeypatch):
+        """Тест что сканер со встроенной базой ничего не пишет в каталог кеша"""
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+        monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
+        default_matcher.cache_clear()
+        try:
+            NetworkScanner()
+        finally:
+            default_matcher.cache_clear()
+        assert list(tmp_path.iterdir()) == []
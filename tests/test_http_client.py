@@ -0,0 +1,75 @@
+"""
+Тесты для HTTP-клиента и ограниченного чтения тела ответа
+"""
+
+import asyncio
+
+from src.network_scanner import AsyncNetworkScanner, NetworkScanner
+from src.network_scanner.http_client import BoundedBody, async_http_get, is_html_content_type
+
+class TestBoundedBody:
+    """Тесты накопителя тела ответа"""
+    
+    def test_stops_after_title_and_budget(self):
+        """Тест остановки после </title> и набора бюджета"""
+        body = BoundedBody(budget=16, limit=1024)
+        assert body.feed(b"<title>Router</ti") is True
+        assert body.feed(b"tle>") is False
+        assert body.title_closed is True
+        assert body.content == b"<title>Router</title>"
+    
+    def test_keeps_reading_until_title(self):
+        """Тест что без </title> чтение идет до предела"""
+        body = BoundedBody(budget=4, limit=10)
+        assert body.feed(b"12345") is True
+        assert body.feed(b"67890abc") is False
+        assert body.content == b"1234567890"
+    
+    def test_unlimited(self):
+        """Тест что budget=0 отключает ограничение"""
+        body = BoundedBody(budget=0)
+        assert body.feed(b"<title>x</title>" * 1000) is True
+        assert len(body.content) == 16000
+    
+    def test_html_content_types(self):
+        """Тест выбора типов контента, тело которых читается"""
+        assert is_html_content_type('text/html; charset=utf-8')
+        assert is_html_content_type('application/xhtml+xml')
+        assert is_html_content_type('')
+        assert not is_html_content_type('image/jpeg')
+        assert not is_html_content_type('multipart/x-mixed-replace; boundary=frame')
+
+class TestBoundedFetch:
+    """Тесты потокового чтения больших страниц обоими движками"""
+    
+    def test_sync_large_page(self, large_page_server):
+        """Тест что большая страница читается частично, а размер берется из заголовка"""
+        host, port = large_page_server
+        scanner = NetworkScanner(timeout=2)
+        result = scanner.check_web_service(host, port)
+        
+        assert result['title'] == 'Camera Live View'
+        assert result['content_length'] > 1024 * 1024
+        page = scanner.fetch_page(scanner.get_session(), f"http://{host}:{port}/")
+        assert len(page.content) <= scanner.max_body_bytes
+    
+    def test_sync_skips_non_html(self, large_page_server):
+        """Тест что тело видеопотока не читается"""
+        host, port = large_page_server
+        scanner = NetworkScanner(timeout=2)
+        page = scanner.fetch_page(scanner.get_session(), f"http://{host}:{port}/video")
+        assert page.status_code == 200
+        assert page.content == b""
+    
+    def test_async_large_page(self, large_page_server):
+        """Тест ограниченного чтения в движке asyncio"""
+        host, port = large_page_server
+        response = asyncio.run(async_http_get(
+            f"http://{host}:{port}/", timeout=2, body_budget=8192, max_body_bytes=65536
+        ))
+        assert b"</title>" in response.content
+        assert len(response.content) <= 65536
+        
+        result = asyncio.run(AsyncNetworkScanner(timeout=2).check_web_service_async(host, port))
+        assert result['title'] == 'Camera Live View'
+        assert result['content_length'] == int(response.headers['Content-Length'])
@@ -0,0 +1,175 @@
+"""
+Тесты метрик сканирования
+"""
+
+import asyncio
+import errno
+import ssl
+from unittest.mock import patch
+
+import requests
+
+from src.network_scanner import NetworkScanner
+from src.network_scanner.async_scanner import AsyncNetworkScanner
+from src.network_scanner.http_client import TimedSSLContext, create_ssl_context
+from src.network_scanner.metrics import STAGES, Histogram, MetricsServer, ScanMetrics
+
+class TestHistogram:
+    """Тесты гистограммы длительностей"""
+
+    def test_buckets_and_totals(self):
+        """Тест распределения по корзинам, суммы и максимума"""
+        histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+        for seconds in (0.005, 0.01, 0.05, 0.5, 3.0):
+            histogram.observe(seconds)
+        assert histogram.counts == [2, 1, 1, 1]
+        assert histogram.count == 5
+        assert abs(histogram.sum - 3.565) < 1e-9
+        assert histogram.max == 3.0
+
+    def test_quantile_estimate(self):
+        """Тест оценки перцентиля интерполяцией внутри корзины"""
+        histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+        assert histogram.quantile(0.5) is None
+        for _ in range(100):
+            histogram.observe(0.05)
+        # Все наблюдения в корзине (0.01, 0.1], но не больше максимума
+        assert 0.01 < histogram.quantile(0.5) <= 0.05
+        assert histogram.quantile(0.99) == 0.05
+
+    def test_merge(self):
+        """Тест объединения гистограмм"""
+        first, second = Histogram(), Histogram()
+        first.observe(0.001)
+        second.observe(2.0)
+        first.merge(second.state())
+        assert first.count == 2
+        assert first.max == 2.0
+
+class TestScanMetrics:
+    """Тесты метрик сканера"""
+
+    def test_record_connect_outcomes(self):
+        """Тест счетчиков исходов подключения"""
+        metrics = ScanMetrics()
+        metrics.record_connect(0, 0.002)
+        metrics.record_connect(errno.ECONNREFUSED, 0.001)
+        metrics.record_connect(None)
+        metrics.record_connect(errno.EHOSTUNREACH, 0.5)
+        metrics.record_connect(errno.EMFILE, 0.0)
+        counters = metrics.counters
+        assert counters['ports_probed'] == 5
+        assert counters['ports_open'] == 1
+        assert counters['connect_refused'] == 1
+        assert counters['connect_timeouts'] == 1
+        assert counters['connect_unreachable'] == 1
+        assert counters['connect_failed'] == 1
+        # Время подключения - только по ответившим портам
+        assert metrics.histograms['connect'].count == 2
+
+    def test_timer(self):
+        """Тест замера блока"""
+        metrics = ScanMetrics()
+        with metrics.timer('classify'):
+            pass
+        assert metrics.histograms['classify'].count == 1
+
+    def test_take_and_merge(self):
+        """Тест передачи метрик из рабочего процесса"""
+        worker = ScanMetrics()
+        worker.observe('body', 0.01)
+        worker.increment('services', 2)
+        state = worker.take()
+        assert worker.counters['services'] == 0
+        assert worker.histograms['body'].count == 0
+
+        parent = ScanMetrics()
+        parent.merge(state)
+        parent.merge(state)
+        assert parent.counters['services'] == 4
+        assert parent.histograms['body'].count == 2
+
+    def test_snapshot(self):
+        """Тест сводки для JSON"""
+        metrics = ScanMetrics()
+        metrics.observe('first_byte', 0.004)
+        snapshot = metrics.snapshot()
+        assert set(snapshot['stages']) == set(STAGES)
+        stats = snapshot['stages']['first_byte']
+        assert stats['count'] == 1
+        assert stats['max_ms'] == 4.0
+        assert stats['buckets']['0.005'] == 1
+        assert snapshot['stages']['tls']['p50_ms'] is None
+
+    def test_prometheus_format(self):
+        """Тест текстового формата Prometheus: корзины накопительные"""
+        metrics = ScanMetrics()
+        metrics.observe('connect', 0.0003)
+        metrics.observe('connect', 0.2)
+        metrics.increment('connection_resets')
+        text = metrics.prometheus()
+        assert '# TYPE network_scanner_stage_seconds histogram' in text
+        assert 'network_scanner_stage_seconds_bucket{stage="connect",le="0.0005"} 1' in text
+        assert 'network_scanner_stage_seconds_bucket{stage="connect",le="0.25"} 2' in text
+        assert 'network_scanner_stage_seconds_bucket{stage="connect",le="+Inf"} 2' in text
+        assert 'network_scanner_stage_seconds_count{stage="connect"} 2' in text
+        assert 'network_scanner_events_total{event="connection_resets"} 1' in text
+
+    def test_metrics_server(self):
+        """Тест отдачи метрик по HTTP"""
+        metrics = ScanMetrics()
+        metrics.increment('hosts', 3)
+        server = MetricsServer(metrics, port=0)
+        try:
+            host, port = server.address
+            response = requests.get(f'http://{host}:{port}/metrics', timeout=5)
+            assert response.status_code == 200
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'network_scanner_events_total{event="hosts"} 3' in response.text
+            assert requests.get(f'http://{host}:{port}/other', timeout=5).status_code == 404
+        finally:
+            server.close()
+
+class TestScannerMetrics:
+    """Тесты замеров в движках сканирования"""
+
+    def test_threads_engine_stages(self, local_http_server, closed_port):
+        """Тест что проверка сервиса записывает все этапы движка потоков"""
+        host, port = local_http_server
+        scanner = NetworkScanner(timeout=2)
+        scanner.common_ports = [port, closed_port]
+        assert len(scanner.scan_ip(host)) == 1
+        metrics = scanner.metrics
+        # Закрытый порт тоже ответил (RST) - его время подключения учитывается
+        assert metrics.histograms['connect'].count == 2
+        for stage in ('first_byte', 'body', 'detect_encoding', 'classify'):
+            assert metrics.histograms[stage].count == 1, stage
+        assert metrics.counters['ports_open'] == 1
+        assert metrics.counters['connect_refused'] == 1
+
+    def test_async_engine_stages(self, local_http_server):
+        """Тест замеров движка asyncio"""
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(timeout=2)
+        scanner.common_ports = [port]
+        assert len(asyncio.run(scanner.scan_ip_async(host))) == 1
+        metrics = scanner.metrics
+        for stage in ('connect', 'first_byte', 'body', 'detect_encoding', 'classify'):
+            assert metrics.histograms[stage].count == 1, stage
+        assert metrics.counters['ports_open'] == 1
+
+    def test_tls_error_counted(self, local_http_server):
+        """Тест что HTTPS-запрос к HTTP-серверу учитывается как ошибка TLS"""
+        host, port = local_http_server
+        scanner = NetworkScanner(timeout=2)
+        with patch.object(scanner, 'candidate_urls', return_value=[f'https://{host}:{port}']):
+            assert scanner.check_web_service(host, port) is None
+        assert scanner.metrics.counters['tls_errors'] == 1
+
+    def test_timed_ssl_context(self):
+        """Тест контекста с замером рукопожатий"""
+        context = create_ssl_context(observe=lambda stage, seconds: None)
+        assert isinstance(context, TimedSSLContext)
+        assert context.verify_mode == ssl.CERT_NONE
+        assert not context.check_hostname
+        assert not isinstance(create_ssl_context(), TimedSSLContext)
@@ -0,0 +1,68 @@
+"""
+Тесты компактной записи результата
+"""
+
+import json
+import pickle
+
+from src.network_scanner.models import DeviceType, ScanResult, as_dict, pack_ip, unpack_ip
+
+RESULT = {
+    'ip': '192.168.1.1', 'port': 443, 'url': 'https://192.168.1.1:443', 'status_code': 200,
+    'title': 'Router Login', 'server': 'lighttpd', 'content_type': 'text/html', 'is_router': True,
+    'device_type': 'router', 'vendor': 'tp-link', 'matched_rules': ['router:keyword:router'],
+    'content_length': 512, 'encoding': 'utf-8', 'etag': '"abc"', 'last_modified': None,
+    'body_hash': 'a9993e364706816aba3e25717850c26c9cd0d89d',
+}
+
+class TestScanResult:
+    """Тесты ScanResult"""
+
+    def test_same_json_as_dict(self):
+        """Тест что JSON совпадает с прежним словарем, включая порядок ключей"""
+        result = ScanResult.from_dict(RESULT)
+        assert json.dumps(as_dict(result)) == json.dumps(RESULT)
+        assert dict(result) == RESULT
+        assert result == RESULT
+
+    def test_mapping_access(self):
+        """Тест доступа как к словарю и атрибутами"""
+        result = ScanResult.from_dict(RESULT)
+        assert result['ip'] == result.ip == '192.168.1.1'
+        assert result.get('vendor') == 'tp-link'
+        assert result.get('missing', 'default') == 'default'
+        assert 'etag' in result and 'missing' not in result
+        assert result.device_type == DeviceType.ROUTER
+        assert type(result['device_type']) is str
+
+    def test_compact_storage(self):
+        """Тест упаковки: адрес числом, URL не хранится, повторяющиеся строки общие"""
+        first = ScanResult.from_dict(RESULT)
+        second = ScanResult.from_dict(dict(RESULT, ip='192.168.1.2', url='https://192.168.1.2:443',
+                                           server=''.join(['light', 'tpd'])))
+        assert first._ip == 0xC0A80101
+        assert first._url is None and second.url == 'https://192.168.1.2:443'
+        assert first.server is second.server
+        assert first._device_type is DeviceType.ROUTER
+
+    def test_non_canonical_values_are_kept(self):
+        """Тест что URL с другим путем, имя хоста и не-hex хеш сохраняются как есть"""
+        result = ScanResult.from_dict(dict(RESULT, ip='router.lan', url='http://router.lan:443/login',
+                                           device_type='smart-tv', body_hash='abc'))
+        assert result['ip'] == 'router.lan'
+        assert result['url'] == 'http://router.lan:443/login'
+        assert result['device_type'] == 'smart-tv'
+        assert result['body_hash'] == 'abc'
+
+    def test_pickle(self):
+        """Тест передачи между процессами"""
+        result = ScanResult.from_dict(RESULT)
+        assert pickle.loads(pickle.dumps(result)) == RESULT
+
+    def test_pack_ip(self):
+        """Тест упаковки адресов IPv4 и IPv6"""
+        for ip in ('10.0.0.1', '255.255.255.255', '::1', 'fe80::1'):
+            assert unpack_ip(pack_ip(ip)) == ip
+            assert isinstance(pack_ip(ip), int)
+        assert pack_ip('::1') != pack_ip('0.0.0.1')
+        assert pack_ip('010.0.0.1') == '010.0.0.1'
@@ -0,0 +1,165 @@
+"""
+Тесты консольного вывода
+"""
+
+import json
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner.metrics import ScanMetrics
+from src.network_scanner.output import CLEAR_LINE, ConsoleWriter, ScanOutput, format_result, status_line
+
+RESULT = {
+    'ip': '192.168.1.1', 'port': 80, 'url': 'http://192.168.1.1:80', 'status_code': 200,
+    'title': 'Router Login', 'server': 'lighttpd', 'vendor': 'tp-link', 'is_router': True,
+    'content_length': 512, 'content_type': 'text/html',
+}
+
+class TerminalStream(StringIO):
+    """Поток, притворяющийся терминалом и считающий вызовы write"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def isatty(self):
+        return True
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+class TestFormatResult:
+    """Тесты блока о находке"""
+
+    def test_colored(self):
+        """Тест цветного блока"""
+        text = format_result(RESULT)
+        assert '\033[92m🚀 РОУТЕР! Найден веб-интерфейс:\033[0m' in text
+        assert '  Заголовок: Router Login' in text
+        assert '  Вендор:    tp-link' in text
+        assert text.endswith('-' * 60)
+
+    def test_plain(self):
+        """Тест блока без ANSI-последовательностей"""
+        text = format_result(dict(RESULT, status_code=401, title='No title'), color=False)
+        assert '\033' not in text
+        assert 'IP:        192.168.1.1' in text
+        assert 'Заголовок' not in text
+
+class TestConsoleWriter:
+    """Тесты буфера вывода"""
+
+    def test_batches_writes(self):
+        """Тест что много строк записываются несколькими вызовами write"""
+        stream = TerminalStream()
+        writer = ConsoleWriter(stream, interval=60)
+        for i in range(100):
+            print(f"line {i}", file=writer)
+        writer.close()
+        assert stream.getvalue() == ''.join(f"line {i}\n" for i in range(100))
+        assert stream.writes == 1
+
+    def test_status_line_keeps_partial_lines(self):
+        """Тест что строка прогресса не разрывает незавершенную строку и убирается в конце"""
+        stream = TerminalStream()
+        writer = ConsoleWriter(stream, interval=60)
+        writer.status = lambda: 'progress'
+        writer.write('abc')
+        writer.drain()
+        assert stream.getvalue() == 'progress'
+
+        writer.write('def\n')
+        writer.drain()
+        assert stream.getvalue() == f'progress{CLEAR_LINE}abcdef\nprogress'
+
+        writer.close()
+        assert stream.getvalue().endswith(CLEAR_LINE)
+
+    def test_no_status_line_when_not_a_terminal(self):
+        """Тест что в файл или канал строка прогресса не пишется"""
+        stream = StringIO()
+        writer = ConsoleWriter(stream, interval=60)
+        writer.status = lambda: 'progress'
+        writer.write('found\n')
+        writer.close()
+        assert stream.getvalue() == 'found\n'
+
+    def test_write_not_blocked_by_slow_stream(self):
+        """Тест что write не ждет, пока медленный терминал принимает запись"""
+        entered, release = threading.Event(), threading.Event()
+
+        class SlowStream(StringIO):
+            def write(self, text):
+                entered.set()
+                release.wait(5)
+                return super().write(text)
+
+        stream = SlowStream()
+        writer = ConsoleWriter(stream, interval=60)
+        writer.write('first\n')
+        drain = threading.Thread(target=writer.drain)
+        drain.start()
+        assert entered.wait(5)
+        second = threading.Thread(target=writer.write, args=('second\n',))
+        second.start()
+        second.join(1)
+        blocked = second.is_alive()
+        release.set()
+        second.join(5)
+        assert not blocked
+        drain.join(5)
+        writer.close()
+        assert stream.getvalue() == 'first\nsecond\n'
+
+    def test_status_line(self):
+        """Тест текста строки прогресса"""
+        metrics = ScanMetrics()
+        metrics.increment('hosts', 50)
+        metrics.increment('ports_open', 7)
+        metrics.increment('services', 3)
+        assert status_line(metrics.counters, 2.0) == \
+            '50 hosts scanned, 25.0 hosts/s, 7 open ports, 3 services found'
+
+class TestScanOutput:
+    """Тесты режимов вывода"""
+
+    def test_text_mode_goes_through_writer(self):
+        """Тест что print во время вывода буферизуется и доходит до stdout"""
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            with ScanOutput('text', interval=60) as output:
+                print('scanning')
+                assert stdout.getvalue() == ''
+                assert output.color
+        assert stdout.getvalue() == 'scanning\n'
+
+    def test_jsonl_mode(self):
+        """Тест что в jsonl в stdout попадают только находки"""
+        with patch('sys.stdout', new_callable=StringIO) as stdout, \
+             patch('sys.stderr', new_callable=StringIO) as stderr:
+            with ScanOutput('jsonl') as output:
+                with output.scanning(ScanMetrics()):
+                    print('Начало сканирования')
+                    output.show(RESULT)
+                print('SCAN COMPLETED')
+                assert not output.color
+        assert json.loads(stdout.getvalue()) == RESULT
+        assert stderr.getvalue() == 'Начало сканирования\nSCAN COMPLETED\n'
+
+    def test_quiet_mode(self):
+        """Тест что в тихом режиме сообщения сканера не выводятся, а итоги - да"""
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            with ScanOutput('text', quiet=True) as output:
+                with output.scanning(ScanMetrics()):
+                    print('Прогресс: 10%')
+                    output.show(RESULT)
+                print('SCAN COMPLETED')
+        assert stdout.getvalue() == 'SCAN COMPLETED\n'
+
+    def test_unknown_format(self):
+        """Тест неизвестного формата"""
+        with pytest.raises(ValueError):
+            ScanOutput('xml')
@@ -0,0 +1,74 @@
+"""
+Тесты сканирования в нескольких процессах
+"""
+
+from unittest.mock import patch
+
+from src.network_scanner.checkpoint import Checkpoint
+from src.network_scanner.parallel import ProcessScanner, chunk_network, iter_chunks
+from src.network_scanner.scanner import NetworkScanner
+from src.network_scanner.targets import RangeSet, TargetSet
+
+class TestChunks:
+    """Тесты деления целей на порции"""
+    
+    def test_chunks_cover_all_addresses(self):
+        """Тест что порции не превышают размер и покрывают все адреса ровно один раз"""
+        ranges = RangeSet([[1, 5], [10, 10], [20, 27]])
+        chunks = list(iter_chunks(ranges, 4))
+        assert chunks == [[[1, 4]], [[5, 5], [10, 10], [20, 21]], [[22, 25]], [[26, 27]]]
+        covered = RangeSet()
+        for chunk in chunks:
+            for start, end in chunk:
+                covered.add_range(start, end)
+        assert covered.runs() == ranges.runs()
+    
+    def test_chunk_network(self):
+        """Тест что порция превращается в цели, понятные TargetSet"""
+        targets = TargetSet('10.0.0.1-10.0.0.3,10.0.0.9')
+        chunk = next(iter_chunks(targets.ranges, 10))
+        assert chunk_network(chunk) == '10.0.0.1-10.0.0.3,10.0.0.9-10.0.0.9'
+        assert list(TargetSet(chunk_network(chunk))) == list(targets)
+
+class TestProcessScanner:
+    """Тесты ProcessScanner на локальном сервере"""
+    
+    def test_scan_in_processes(self, local_http_server, tmp_path):
+        """Тест что результаты рабочих процессов доходят до родителя, приемников и контрольной точки"""
+        from src.network_scanner.sinks import ListSink
+        host, port = local_http_server
+        scanner = NetworkScanner(network=f"{host}-127.0.0.8", timeout=1, threads=4)
+        scanner.common_ports = [port]
+        sink = ListSink()
+        scanner.sinks.append(sink)
+        scanner.checkpoint = Checkpoint(tmp_path / 'scan.ckpt')
+        
+        with patch('builtins.print') as mock_print:
+            results = list(ProcessScanner(scanner, 2).iter_scan())
+        
+        assert [(r['ip'], r['port']) for r in results] == [(host, port)]
+        assert results[0]['is_router'] is True
+        assert sink.results == results
+        assert scanner.checkpoint.finished
+        assert len(scanner.checkpoint.completed) == 8
+        assert 'port_scan' in scanner.stage_timings
+        # Метрики рабочих процессов объединяются в родительском сканере
+        assert scanner.metrics.counters['hosts'] == 8
+        assert scanner.metrics.counters['services'] == 1
+        printed = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        assert 'Прогресс: 100.0% (8/8)' in printed
+    
+    def test_closing_generator_stops_workers(self, local_http_server):
+        """Тест что прерванный перебор останавливает рабочие процессы"""
+        import multiprocessing
+        host, port = local_http_server
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1, threads=2)
+        scanner.common_ports = [port]
+        
+        with patch('builtins.print'):
+            scan = ProcessScanner(scanner, 2).iter_scan()
+            next(scan)
+            assert multiprocessing.active_children()
+            scan.close()
+        
+        assert multiprocessing.active_children() == []
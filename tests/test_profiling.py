@@ -0,0 +1,111 @@
+"""
+Тесты профилирования сканирования
+"""
+
+import pstats
+import threading
+import time
+
+import pytest
+
+from src.network_scanner.profiling import SamplingProfiler, ScanProfiler, ThreadProfiler
+
+def spin(seconds):
+    """Занимает процессор заданное время"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def run_in_threads(target, count=2):
+    """Выполняет функцию в нескольких потоках и ждет их"""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+class TestSamplingProfiler:
+    """Тесты выборочного профилировщика"""
+
+    def test_samples_worker_threads(self):
+        """Тест что стеки рабочих потоков складываются в один профиль"""
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        # Вращающиеся потоки держат GIL, выборки идут примерно раз в sys.getswitchinterval()
+        run_in_threads(lambda: spin(0.3))
+        profiler.stop()
+
+        stats = pstats.Stats(profiler).stats
+        spins = [value for key, value in stats.items() if key[2] == 'spin']
+        assert len(spins) == 1
+        calls, _, tottime, cumtime, callers = spins[0]
+        assert calls > 10
+        assert 0 < tottime <= cumtime
+        assert [key[2] for key in callers] == ['<lambda>']
+
+    def test_idle_threads_are_skipped(self):
+        """Тест что ждущие потоки не попадают в профиль"""
+        event = threading.Event()
+
+        def idle():
+            event.wait(0.1)
+
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        run_in_threads(idle)
+        profiler.stop()
+        assert not any('idle' in key[2] for stack in profiler.samples for key in stack)
+
+    def test_collapsed_stacks(self):
+        """Тест формата свернутых стеков для flame graph"""
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        run_in_threads(lambda: spin(0.05), count=1)
+        profiler.stop()
+
+        lines = [line for line in profiler.collapsed() if 'spin (test_profiling.py' in line]
+        assert lines
+        frames, _, weight = lines[0].rpartition(' ')
+        assert frames.split(';')[-1].startswith('spin (test_profiling.py:')
+        assert int(weight) > 0
+
+class TestScanProfiler:
+    """Тесты профилирования в обоих режимах"""
+
+    def test_cprofile_sees_worker_threads(self):
+        """Тест что cProfile записывает вызовы в рабочих потоках"""
+        profiler = ThreadProfiler()
+        profiler.start()
+        run_in_threads(lambda: spin(0.01))
+        profiler.stop()
+        calls = [value[1] for key, value in profiler.stats().stats.items() if key[2] == 'spin']
+        assert sum(calls) == 2
+
+    @pytest.mark.parametrize('mode', ['cprofile', 'sampling'])
+    def test_save_and_top(self, mode, tmp_path):
+        """Тест сохранения профиля и списка затратных функций"""
+        profiler = ScanProfiler(mode)
+        profiler.start()
+        run_in_threads(lambda: spin(0.1), count=1)
+        profiler.stop()
+
+        paths = profiler.save(tmp_path, name='scan')
+        assert paths[0] == tmp_path / 'scan.pstats'
+        assert pstats.Stats(str(paths[0])).stats
+        if mode == 'sampling':
+            assert paths[1] == tmp_path / 'scan.collapsed'
+        labels = [label for label, _, _, _ in profiler.top()]
+        assert any(label.startswith('spin (test_profiling.py') for label in labels)
+
+    def test_empty_profile(self, tmp_path):
+        """Тест что пустой профиль не сохраняется"""
+        profiler = ScanProfiler('sampling')
+        profiler.start()
+        profiler.stop()
+        assert profiler.top() == []
+        assert profiler.save(tmp_path) == []
+
+    def test_unknown_mode(self):
+        """Тест неизвестного режима"""
+        with pytest.raises(ValueError):
+            ScanProfiler('perf')
@@ -0,0 +1,114 @@
+"""
+Тесты ограничения скорости сканирования
+"""
+
+import pickle
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner import AsyncNetworkScanner, NetworkScanner
+from src.network_scanner.ratelimit import RateLimiter, TokenBucket, interleave, rotated_ports
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket:
+    """Тесты ведра токенов"""
+
+    def test_burst_then_paced(self):
+        """Тест что после емкости ведра токены выдаются с шагом 1/rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(10, burst=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1)
+        assert bucket.reserve() == pytest.approx(0.2)
+
+    def test_refill_is_capped_by_burst(self):
+        """Тест что простой не накапливает больше burst токенов"""
+        clock = FakeClock()
+        bucket = TokenBucket(10, burst=2, clock=clock)
+        clock.now += 60
+        assert [bucket.reserve() for _ in range(3)] == [0, 0, pytest.approx(0.1)]
+
+    def test_default_burst(self):
+        """Тест емкости ведра по умолчанию"""
+        assert TokenBucket(1000).burst == 100
+        assert TokenBucket(5).burst == 1
+
+    def test_wait_paces_threads(self):
+        """Тест что wait выдерживает заданную скорость"""
+        bucket = TokenBucket(50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            bucket.wait()
+        assert time.monotonic() - started >= 0.09
+
+    def test_split_and_pickle(self):
+        """Тест деления бюджета между процессами и передачи ограничителя в процесс"""
+        limiter = RateLimiter(100, per_host=2, burst=10).split(4)
+        assert limiter.rate == 25
+        assert limiter.per_host == 2
+        assert limiter.bucket.burst == 2.5
+        copy = pickle.loads(pickle.dumps(limiter))
+        assert copy.bucket.reserve() == 0
+        assert RateLimiter(per_host=3).split(2).bucket is None
+
+class TestProbeOrder:
+    """Тесты порядка проб"""
+
+    def test_rotated_ports(self):
+        """Тест что соседние хосты начинают с разных портов"""
+        ports = [80, 443, 8080]
+        assert rotated_ports(ports, '10.0.0.5') == ports
+        assert rotated_ports(ports, '10.0.0.3') == [443, 8080, 80]
+        assert rotated_ports(ports, '10.0.0.4') == [8080, 80, 443]
+        assert rotated_ports([], '10.0.0.1') == []
+
+    def test_interleave(self):
+        """Тест что пробы одного хоста разнесены пробами остальных хостов блока"""
+        hosts = [f'10.0.0.{i}' for i in range(5)]
+        probes = list(interleave(hosts, [80, 443], block=2))
+        assert len(probes) == 10
+        assert set(probes) == {(ip, port) for ip in hosts for port in (80, 443)}
+        assert [ip for ip, _ in probes] == hosts[0:2] * 2 + hosts[2:4] * 2 + hosts[4:] * 2
+
+class TestRateLimitedScanning:
+    """Тесты ограничителя в движках сканирования"""
+
+    def test_thread_engine(self, local_http_server, closed_port):
+        """Тест что сканер на потоках соблюдает бюджет и находит сервис"""
+        host, port = local_http_server
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [closed_port] * 4 + [port]
+        scanner.rate_limiter = RateLimiter(20, per_host=1, burst=1)
+
+        started = time.monotonic()
+        with patch('builtins.print'):
+            results = scanner.scan_network()
+
+        assert [r['port'] for r in results] == [port]
+        assert time.monotonic() - started >= 0.18
+
+    def test_async_engine(self, local_http_server, closed_port):
+        """Тест что asyncio-сканер соблюдает бюджет и предел на хост"""
+        host, port = local_http_server
+        scanner = AsyncNetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [closed_port] * 4 + [port]
+        scanner.rate_limiter = RateLimiter(20, per_host=1, burst=1)
+
+        started = time.monotonic()
+        with patch('builtins.print'):
+            results = scanner.scan_network()
+
+        assert [r['port'] for r in results] == [port]
+        assert time.monotonic() - started >= 0.18
+        assert scanner._host_slots == {}
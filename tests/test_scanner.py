@@ -172,8 +172,8 @@ class TestNetworkScanner:
         """Тест сканирования IP без открытых портов"""
         scanner = NetworkScanner()
         
-        # Мокаем check_port чтобы возвращать False для всех портов
-        with patch.object(scanner, 'check_port', return_value=False):
+        # Мокаем probe_ports чтобы ни один порт не оказался открытым
+        with patch.object(scanner, 'probe_ports', return_value=iter([])):
             results = scanner.scan_ip("192.168.1.100")
             assert results == []
     
@@ -188,4 +188,103 @@ class TestNetworkScanner:
             
             # Должно вывести сообщение
             mock_print.assert_any_call("Нет результатов для сохранения")
-            mock_mkdir.assert_not_called()  # Папка не должна создаваться
\ No newline at end of file
+            mock_mkdir.assert_not_called()  # Папка не должна создаваться
+    
+    def test_probe_ports_open_and_closed(self, local_http_server, closed_port):
+        """Тест одновременной проверки открытого и закрытого портов"""
+        host, port = local_http_server
+        scanner = NetworkScanner(timeout=1)
+        open_ports = list(scanner.probe_ports(host, [closed_port, port]))
+        assert open_ports == [port]
+    
+    def test_scan_ip_checks_web_service_for_open_ports(self):
+        """Тест что веб-сервис проверяется только на открытых портах"""
+        scanner = NetworkScanner()
+        
+        with patch.object(scanner, 'probe_ports', return_value=iter([(8080, None)])), \
+             patch.object(scanner, 'check_web_service', return_value={'port': 8080}) as mock_check:
+            results = scanner.scan_ip("192.168.1.100")
+        
+        mock_check.assert_called_once_with("192.168.1.100", 8080, sock=None)
+        assert results == [{'port': 8080}]
+    
+    def test_session_is_per_thread(self):
+        """Тест что HTTP-сессия переиспользуется в потоке и своя у каждого потока"""
+        import threading
+        scanner = NetworkScanner()
+        session = scanner.get_session()
+        assert scanner.get_session() is session
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(scanner.get_session()))
+        thread.start()
+        thread.join()
+        assert other[0] is not session
+    
+    def test_scan_ip_reuses_probe_connection(self, counting_http_server):
+        """Тест что проверка порта и GET-запрос идут по одному соединению"""
+        host, port, connections = counting_http_server
+        scanner = NetworkScanner(timeout=2)
+        scanner.common_ports = [port]
+        
+        results = scanner.scan_ip(host)
+        
+        assert len(results) == 1
+        assert results[0]['title'] == 'Router Admin Panel'
+        assert len(connections) == 1
+    
+    def test_favicon_signature(self, favicon_server, favicon_matcher):
+        """Тест классификации по хешу favicon, загруженного с сервиса"""
+        host, port = favicon_server
+        scanner = NetworkScanner(timeout=2)
+        scanner.matcher = favicon_matcher
+        
+        assert scanner.check_web_service(host, port)['vendor'] == 'unknown'
+        
+        scanner.favicon = True
+        result = scanner.check_web_service(host, port)
+        assert result['vendor'] == 'acme'
+        assert result['device_type'] == 'camera'
+    
+    def test_iter_scan_streams_to_sink(self, local_http_server, closed_port, tmp_path):
+        """Тест что iter_scan отдает результаты и пишет их в приемник, не копя в self.results"""
+        from src.network_scanner.sinks import JSONLinesSink, read_jsonl
+        host, port = local_http_server
+        scanner = NetworkScanner(network=f"{host}/32", timeout=1)
+        scanner.common_ports = [port, closed_port]
+        sink = JSONLinesSink(tmp_path / 'scan.jsonl')
+        scanner.sinks.append(sink)
+        
+        with patch('builtins.print'):
+            results = list(scanner.iter_scan())
+        sink.close()
+        
+        assert [r['port'] for r in results] == [port]
+        assert scanner.results == []
+        assert list(read_jsonl(tmp_path / 'scan.jsonl')) == results
+    
+    def test_save_results_from_jsonl(self, tmp_path, monkeypatch):
+        """Тест построения отчетов JSON/TXT из файла JSON Lines"""
+        import json
+        from src.network_scanner.sinks import JSONLinesSink
+        monkeypatch.chdir(tmp_path)
+        results = [
+            {'ip': '10.0.0.1', 'port': 80, 'url': 'http://10.0.0.1:80', 'status_code': 200,
+             'title': 'Router', 'server': 'httpd', 'is_router': True},
+            {'ip': '10.0.0.2', 'port': 80, 'url': 'http://10.0.0.2:80', 'status_code': 200,
+             'title': 'No title', 'server': 'Unknown', 'is_router': False},
+        ]
+        with JSONLinesSink(tmp_path / 'scan.jsonl') as sink:
+            for result in results:
+                sink.write(result)
+        
+        scanner = NetworkScanner(network="10.0.0.0/24")
+        with patch('builtins.print'):
+            scanner.save_results('report', source=tmp_path / 'scan.jsonl')
+        
+        report = json.loads((tmp_path / 'results' / 'report.json').read_text(encoding='utf-8'))
+        assert report['total_found'] == 2
+        assert report['routers_found'] == 1
+        assert report['results'] == results
+        text = (tmp_path / 'results' / 'report.txt').read_text(encoding='utf-8')
+        assert text.index('10.0.0.1') < text.index('ДРУГИЕ УСТРОЙСТВА') < text.index('10.0.0.2')
@@ -0,0 +1,77 @@
+"""
+Тесты приемников результатов и потоковых отчетов
+"""
+
+import json
+
+from src.network_scanner.sinks import JSONLinesSink, ListSink, read_jsonl, write_json_report
+
+RESULTS = [
+    {'ip': '192.168.1.1', 'port': 80, 'title': 'Роутер', 'is_router': True},
+    {'ip': '192.168.1.20', 'port': 8080, 'title': 'NAS', 'is_router': False},
+]
+
+class TestJSONLinesSink:
+    """Тесты записи JSON Lines"""
+    
+    def test_file_created_on_first_write(self, tmp_path):
+        """Тест что без находок файл не создается"""
+        path = tmp_path / 'out' / 'scan.jsonl'
+        with JSONLinesSink(path):
+            pass
+        assert not path.exists()
+    
+    def test_each_result_is_flushed(self, tmp_path):
+        """Тест что каждая находка сразу видна в файле"""
+        path = tmp_path / 'scan.jsonl'
+        sink = JSONLinesSink(path)
+        sink.write(RESULTS[0])
+        # Файл еще открыт, но строка уже записана
+        assert list(read_jsonl(path)) == RESULTS[:1]
+        sink.write(RESULTS[1])
+        sink.close()
+        assert list(read_jsonl(path)) == RESULTS
+        assert sink.count == 2
+    
+    def test_append_mode(self, tmp_path):
+        """Тест дописывания в существующий файл"""
+        path = tmp_path / 'scan.jsonl'
+        with JSONLinesSink(path) as sink:
+            sink.write(RESULTS[0])
+        with JSONLinesSink(path, append=True) as sink:
+            sink.write(RESULTS[1])
+        assert list(read_jsonl(path)) == RESULTS
+    
+    def test_truncated_line_is_skipped(self, tmp_path):
+        """Тест чтения файла, оборванного посреди строки"""
+        path = tmp_path / 'scan.jsonl'
+        path.write_text(json.dumps(RESULTS[0]) + '\n{"ip": "192.168', encoding='utf-8')
+        assert list(read_jsonl(path)) == RESULTS[:1]
+        assert list(read_jsonl(tmp_path / 'missing.jsonl')) == []
+    
+    def test_append_after_truncated_line(self, tmp_path):
+        """Тест что дописывание после оборванной строки начинается с новой строки"""
+        path = tmp_path / 'scan.jsonl'
+        path.write_text(json.dumps(RESULTS[0]) + '\n{"ip": "192.168', encoding='utf-8')
+        with JSONLinesSink(path, append=True) as sink:
+            sink.write(RESULTS[1])
+        assert list(read_jsonl(path)) == RESULTS
+    
+    def test_list_sink(self):
+        """Тест сбора результатов в список"""
+        sink = ListSink()
+        for result in RESULTS:
+            sink.write(result)
+        assert sink.results == RESULTS
+
+class TestJSONReport:
+    """Тесты потокового отчета JSON"""
+    
+    def test_matches_json_dump(self, tmp_path):
+        """Тест что потоковый отчет совпадает с json.dump(indent=2)"""
+        header = {'scan_time': '2024-01-01T00:00:00', 'network': '192.168.1.0/24', 'total_found': 2}
+        for results in (RESULTS, []):
+            path = tmp_path / 'report.json'
+            write_json_report(path, header, iter(results))
+            expected = json.dumps({**header, 'results': results}, ensure_ascii=False, indent=2)
+            assert path.read_text(encoding='utf-8') == expected
@@ -0,0 +1,156 @@
+"""
+Тесты хранилища сервисов и инкрементальных сканирований
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner import AsyncNetworkScanner, NetworkScanner
+from src.network_scanner.http_client import PageResponse
+from src.network_scanner.store import (
+    ResultStore, body_hash, changed_fields, conditional_headers, reuse_result,
+)
+from src.network_scanner.targets import TargetSet
+
+def make_result(ip='10.0.0.1', port=80, title='Router', **fields):
+    """Результат сканирования для тестов"""
+    result = {
+        'ip': ip, 'port': port, 'url': f'http://{ip}:{port}', 'status_code': 200, 'title': title,
+        'server': 'lighttpd', 'content_type': 'text/html', 'is_router': True, 'device_type': 'router',
+        'vendor': 'unknown', 'matched_rules': [], 'content_length': len(title), 'encoding': 'utf-8',
+        'etag': None, 'last_modified': None, 'body_hash': body_hash(title.encode()),
+    }
+    result.update(fields)
+    return result
+
+def run_scan(store, results, network='10.0.0.0/24', ports=(80, 443)):
+    """Проводит одно сканирование через хранилище"""
+    store.begin(network)
+    for result in results:
+        store.write(result)
+    store.finish(TargetSet(network), ports)
+    return {(item['ip'], item['port']): item for item in store.changes()}
+
+class TestValidators:
+    """Тесты условных запросов и повторного использования результата"""
+
+    def test_conditional_headers(self):
+        """Тест что валидаторы отправляются только для прошлого URL"""
+        previous = make_result(etag='"abc"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+        assert conditional_headers(previous, previous['url']) == {
+            'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        }
+        assert conditional_headers(previous, 'https://10.0.0.1:80') == {}
+        assert conditional_headers(None, previous['url']) == {}
+
+    def test_reuse_on_not_modified(self):
+        """Тест что ответ 304 возвращает прошлый результат с новым ETag"""
+        previous = make_result(etag='"abc"')
+        response = PageResponse(previous['url'], 304, {'ETag': '"abd"'}, b'')
+        result = reuse_result(previous, previous['url'], response)
+        assert result['title'] == 'Router'
+        assert result['etag'] == '"abd"'
+        assert previous['etag'] == '"abc"'
+
+    def test_reuse_on_same_body(self):
+        """Тест что то же тело с тем же Server не классифицируется заново"""
+        previous = make_result()
+        same = PageResponse(previous['url'], 200, {'Server': 'lighttpd'}, b'Router')
+        other = PageResponse(previous['url'], 200, {'Server': 'lighttpd'}, b'Camera')
+        other_server = PageResponse(previous['url'], 200, {'Server': 'nginx'}, b'Router')
+        assert reuse_result(previous, previous['url'], same) == previous
+        assert reuse_result(previous, previous['url'], other) is None
+        assert reuse_result(previous, previous['url'], other_server) is None
+        assert reuse_result(None, previous['url'], same) is None
+
+class TestResultStore:
+    """Тесты учета изменений между сканированиями"""
+
+    def test_new_unchanged_changed_gone(self, tmp_path):
+        """Тест полного цикла: появление, без изменений, изменение и пропажа"""
+        store = ResultStore(tmp_path / 'services.db')
+        first = run_scan(store, [make_result('10.0.0.1'), make_result('10.0.0.2')])
+        assert {key: item['change'] for key, item in first.items()} == {
+            ('10.0.0.1', 80): 'new', ('10.0.0.2', 80): 'new',
+        }
+
+        second = run_scan(store, [make_result('10.0.0.1'), make_result('10.0.0.2', title='Camera')])
+        assert list(second) == [('10.0.0.2', 80)]
+        assert second[('10.0.0.2', 80)]['change'] == 'changed'
+        assert second[('10.0.0.2', 80)]['fields'] == ['title', 'body_hash']
+        assert second[('10.0.0.2', 80)]['previous']['title'] == 'Router'
+        assert store.counts() == {'new': 0, 'changed': 1, 'gone': 0, 'unchanged': 1}
+
+        third = run_scan(store, [make_result('10.0.0.1')])
+        assert {key: item['change'] for key, item in third.items()} == {('10.0.0.2', 80): 'gone'}
+
+        fourth = run_scan(store, [make_result('10.0.0.1'), make_result('10.0.0.2', title='Camera')])
+        assert fourth[('10.0.0.2', 80)]['change'] == 'new'
+        store.close()
+
+    def test_unscanned_services_are_not_gone(self, tmp_path):
+        """Тест что сервисы вне просканированных адресов и портов не пропадают"""
+        store = ResultStore(tmp_path / 'services.db')
+        run_scan(store, [make_result('10.0.0.1'), make_result('10.0.1.1'), make_result('10.0.0.3', port=8080)],
+                 network='10.0.0.0/23', ports=(80, 8080))
+        changes = run_scan(store, [], network='10.0.0.0/24', ports=(80,))
+        assert list(changes) == [('10.0.0.1', 80)]
+        store.close()
+
+    def test_resume_continues_scan(self, tmp_path):
+        """Тест что возобновленное сканирование не теряет сервисы прерванного запуска"""
+        path = tmp_path / 'services.db'
+        store = ResultStore(path)
+        run_scan(store, [make_result('10.0.0.1'), make_result('10.0.0.2')])
+
+        store.begin('10.0.0.0/24')
+        store.write(make_result('10.0.0.1', title='Camera'))
+        store.close()
+
+        store = ResultStore(path)
+        store.begin('10.0.0.0/24', resume=True)
+        store.write(make_result('10.0.0.2'))
+        store.finish(TargetSet('10.0.0.0/24'), [80])
+        changes = store.changes()
+        assert [(item['ip'], item['change']) for item in changes] == [('10.0.0.1', 'changed')]
+        store.close()
+
+    def test_changed_fields(self):
+        """Тест сравнения результатов по значимым полям"""
+        assert changed_fields(make_result(), make_result(content_length=10)) == []
+        assert changed_fields(make_result(), make_result(server='nginx')) == ['server']
+
+class TestIncrementalScanning:
+    """Тесты инкрементального режима в движках сканирования"""
+
+    @pytest.mark.parametrize('scanner_class', [NetworkScanner, AsyncNetworkScanner])
+    def test_rescan_uses_conditional_request(self, scanner_class, etag_http_server, tmp_path):
+        """Тест что повторное сканирование получает 304 и не классифицирует страницу"""
+        host, port = etag_http_server.server_address
+        store = ResultStore(tmp_path / 'services.db')
+
+        def scan():
+            scanner = scanner_class(network=f"{host}/32", timeout=1)
+            scanner.common_ports = [port]
+            scanner.store = store
+            scanner.sinks.append(store)
+            store.begin(scanner.network)
+            with patch('builtins.print'):
+                results = scanner.scan_network()
+            store.finish(scanner.get_hosts(), scanner.common_ports)
+            return scanner, results
+
+        _, results = scan()
+        assert results[0]['etag'] == '"v1"'
+        assert results[0]['is_router'] is True
+        assert etag_http_server.not_modified == []
+
+        with patch.object(scanner_class, 'build_result') as build_result:
+            _, results = scan()
+        build_result.assert_not_called()
+        assert etag_http_server.not_modified == ['/']
+        assert results[0]['title'] == 'Router Admin Panel'
+        assert store.changes() == []
+        assert store.counts()['unchanged'] == 1
+        store.close()
@@ -0,0 +1,134 @@
+"""
+Тесты колоночной таблицы результатов
+"""
+
+import pytest
+
+from src.network_scanner import table as table_module
+from src.network_scanner.models import ScanResult
+from src.network_scanner.table import ResultTable
+
+def make_result(ip, port=80, title='No title', server='Unknown', device_type='unknown',
+                vendor='unknown', status_code=200):
+    """Результат сканирования для тестов"""
+    return ScanResult(
+        ip=ip, port=port, url=f'http://{ip}:{port}', status_code=status_code, title=title,
+        server=server, content_type='text/html', is_router=device_type == 'router',
+        device_type=device_type, vendor=vendor, content_length=100, encoding='utf-8',
+    )
+
+RESULTS = [
+    make_result('10.0.0.1', title='TP-LINK Router', server='httpd', device_type='router', vendor='tp-link'),
+    make_result('10.0.0.2', title='TP-LINK Router', server='httpd', device_type='router', vendor='tp-link'),
+    make_result('10.0.1.5', title='Keenetic', server='nginx', device_type='router', vendor='keenetic'),
+    make_result('10.0.1.9', port=443, title='HP LaserJet', server='HP HTTP Server', device_type='printer'),
+    make_result('192.168.1.20', port=8080, server='nginx', status_code=401),
+    make_result('fe80::1', server='nginx', device_type='camera', status_code=401),
+]
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Оба способа выполнения запросов: NumPy и циклы Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(table_module, 'numpy', None)
+    return request.param
+
+@pytest.fixture
+def table(backend):
+    return ResultTable.from_results(RESULTS)
+
+class TestResultTable:
+    """Тесты выборок и подсчетов"""
+
+    def test_rows(self, table):
+        """Тест что находки восстанавливаются из колонок"""
+        assert len(table) == 6
+        assert table.row(0) == {
+            'ip': '10.0.0.1', 'port': 80, 'status_code': 200, 'content_length': 100, 'is_router': True,
+            'title': 'TP-LINK Router', 'server': 'httpd', 'content_type': 'text/html',
+            'device_type': 'router', 'vendor': 'tp-link', 'encoding': 'utf-8',
+        }
+        assert table.row(5)['ip'] == 'fe80::1'
+        assert table.column('ip') == [str(result['ip']) for result in RESULTS]
+
+    def test_dictionary_encoding(self, table):
+        """Тест что одинаковые строки хранятся один раз"""
+        assert table.strings['server'].values == ['httpd', 'nginx', 'HP HTTP Server']
+        assert list(table.strings['server'].codes) == [0, 0, 1, 2, 1, 1]
+
+    def test_count_by(self, table):
+        """Тест подсчетов по значениям колонки с условиями"""
+        assert table.count_by('device_type') == [('router', 3), ('camera', 1), ('printer', 1), ('unknown', 1)]
+        assert table.count_by('vendor', device_type='router') == [('tp-link', 2), ('keenetic', 1)]
+        assert table.count_by('status_code') == [(200, 4), (401, 2)]
+        assert table.count_by('is_router') == [(False, 3), (True, 3)]
+
+    def test_top(self, table):
+        """Тест самых частых заголовков"""
+        assert table.top('title', limit=2, exclude=['No title']) == [('TP-LINK Router', 2), ('HP LaserJet', 1)]
+
+    def test_by_subnet(self, table):
+        """Тест группировки по подсетям, включая IPv6"""
+        assert table.by_subnet(24) == [
+            ('10.0.0.0/24', 2), ('10.0.1.0/24', 2), ('192.168.1.0/24', 1), ('fe80::/64', 1),
+        ]
+        assert table.by_subnet(16, device_type='router') == [('10.0.0.0/16', 3)]
+        assert table.by_subnet(0) == [('0.0.0.0/0', 5), ('fe80::/64', 1)]
+
+    def test_where(self, table):
+        """Тест выборки по подсети, Server и коду ответа"""
+        assert table.count(subnet='10.0.0.0/23') == 4
+        assert table.count(server=['nginx', 'httpd'], status_code=401) == 2
+        assert table.count(subnet='fe80::/10') == 1
+        assert table.count(ip='10.0.1.5') == 1
+        assert table.count(vendor='missing') == 0
+
+        nginx = table.where(server='nginx')
+        assert len(nginx) == 3
+        assert nginx.column('ip') == ['10.0.1.5', '192.168.1.20', 'fe80::1']
+        assert nginx.count_by('status_code') == [(401, 2), (200, 1)]
+
+    def test_sink(self, backend):
+        """Тест что таблица пополняется как приемник результатов"""
+        table = ResultTable()
+        with table:
+            table.write(RESULTS[0])
+        assert table.count_by('vendor') == [('tp-link', 1)]
+
+    def test_unknown_column(self, table):
+        """Тест неизвестной колонки"""
+        with pytest.raises(KeyError):
+            table.count(color='red')
+
+class TestExport:
+    """Тесты экспорта в Parquet и Feather"""
+
+    @pytest.mark.parametrize('suffix', ['.parquet', '.feather'])
+    def test_save(self, tmp_path, suffix):
+        """Тест что файл читается pyarrow с теми же данными и словарными колонками"""
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        path = ResultTable.from_results(RESULTS).save(tmp_path / f'results{suffix}')
+        read = pyarrow.parquet.read_table if suffix == '.parquet' else pyarrow.feather.read_table
+        data = read(path)
+        assert data.num_rows == 6
+        assert data.column('ip').type == pyarrow.uint32()
+        assert data.column('ip').null_count == 1
+        assert data.column('address').to_pylist()[-1] == 'fe80::1'
+        assert pyarrow.types.is_dictionary(data.column('server').type)
+        assert data.column('server').to_pylist() == [result['server'] for result in RESULTS]
+
+    def test_save_without_pyarrow(self, tmp_path, monkeypatch):
+        """Тест понятной ошибки без pyarrow"""
+        monkeypatch.setattr(table_module, 'pyarrow', None)
+        with pytest.raises(ImportError):
+            ResultTable.from_results(RESULTS).save(tmp_path / 'results.parquet')
+
+    def test_unknown_format(self, tmp_path):
+        """Тест неизвестного расширения"""
+        with pytest.raises(ValueError):
+            ResultTable().save(tmp_path / 'results.csv')
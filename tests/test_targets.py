@@ -0,0 +1,162 @@
+"""
+Тесты целей сканирования
+"""
+
+import ipaddress
+from unittest.mock import patch
+
+import pytest
+
+from src.network_scanner.scanner import NetworkScanner
+from src.network_scanner.targets import RangeSet, TargetSet, read_targets_file
+
+class TestRangeSet:
+    """Тесты множества диапазонов"""
+    
+    def test_adjacent_values_merge(self):
+        """Тест что соседние числа склеиваются в один диапазон"""
+        ranges = RangeSet()
+        for value in [5, 3, 4, 10, 1]:
+            ranges.add(value)
+        assert ranges.runs() == [[1, 1], [3, 5], [10, 10]]
+        ranges.add(2)
+        assert ranges.runs() == [[1, 5], [10, 10]]
+        assert len(ranges) == 6
+    
+    def test_overlapping_ranges(self):
+        """Тест поглощения нескольких диапазонов одним"""
+        ranges = RangeSet([[1, 2], [5, 6], [9, 9]])
+        ranges.add_range(2, 8)
+        assert ranges.runs() == [[1, 9]]
+    
+    def test_contains(self):
+        """Тест проверки вхождения"""
+        ranges = RangeSet([[10, 20], [30, 30]])
+        assert 10 in ranges and 20 in ranges and 30 in ranges
+        assert 9 not in ranges and 21 not in ranges and 31 not in ranges
+    
+    def test_discard_range(self):
+        """Тест вырезания диапазона из середины и с краев"""
+        ranges = RangeSet([[1, 10], [20, 30]])
+        ranges.discard_range(5, 6)
+        assert ranges.runs() == [[1, 4], [7, 10], [20, 30]]
+        ranges.discard_range(9, 25)
+        assert ranges.runs() == [[1, 4], [7, 8], [26, 30]]
+        ranges.discard_range(0, 100)
+        assert ranges.runs() == []
+    
+    def test_difference(self):
+        """Тест разности без изменения исходного множества"""
+        ranges = RangeSet([[1, 10]])
+        assert ranges.difference(RangeSet([[3, 4]])).runs() == [[1, 2], [5, 10]]
+        assert ranges.runs() == [[1, 10]]
+
+class TestTargetSet:
+    """Тесты разбора и обхода целей"""
+    
+    @pytest.mark.parametrize('network', [
+        '192.168.1.0/24', '10.0.0.0/30', '10.0.0.0/31', '10.0.0.5/32', '10.0.0.7/29', 'fd00::/125',
+    ])
+    def test_network_matches_hosts(self, network):
+        """Тест что сеть дает те же адреса, что ipaddress.hosts()"""
+        expected = [str(ip) for ip in ipaddress.ip_network(network, strict=False).hosts()]
+        targets = TargetSet(network)
+        assert list(targets) == expected
+        assert len(targets) == len(expected)
+    
+    def test_ranges_and_lists(self):
+        """Тест диапазонов и нескольких целей через запятую"""
+        targets = TargetSet('10.0.0.5-7, 10.0.0.6-10.0.0.9')
+        assert list(targets) == [f'10.0.0.{last}' for last in range(5, 10)]
+        targets = TargetSet(['10.0.1.1', '10.0.0.1,10.0.0.2'])
+        assert list(targets) == ['10.0.0.1', '10.0.0.2', '10.0.1.1']
+    
+    def test_exclude(self):
+        """Тест исключения адресов, диапазонов и сетей"""
+        targets = TargetSet('10.0.0.0/24', exclude=['10.0.0.1', '10.0.0.100-10.0.0.254', '10.0.0.8/29'])
+        hosts = list(targets)
+        assert hosts[0] == '10.0.0.2'
+        assert hosts[-1] == '10.0.0.99'
+        assert '10.0.0.8' not in targets and '10.0.0.15' not in targets
+        assert '10.0.0.16' in targets
+        assert len(targets) == len(hosts) == 90
+    
+    def test_large_network_is_lazy(self):
+        """Тест что /8 не разворачивается в список"""
+        targets = TargetSet('10.0.0.0/8')
+        assert len(targets) == 2 ** 24 - 2
+        assert targets.ranges.runs() == [[int(ipaddress.ip_address('10.0.0.1')),
+                                          int(ipaddress.ip_address('10.255.255.254'))]]
+        assert next(iter(targets)) == '10.0.0.1'
+    
+    @pytest.mark.parametrize('spec', ['10.0.0.0/33', 'router.local', '10.0.0.9-10.0.0.1', '10.0.0.1-fd00::1'])
+    def test_invalid(self, spec):
+        """Тест ошибок разбора"""
+        with pytest.raises(ValueError):
+            TargetSet(spec)
+
+    def test_targets_file(self, tmp_path):
+        """Тест чтения файла целей с комментариями"""
+        path = tmp_path / 'networks.txt'
+        path.write_text('# офис\n10.0.0.0/30\n\n10.0.1.1, 10.0.1.2  # принтеры\n', encoding='utf-8')
+        assert read_targets_file(path) == ['10.0.0.0/30', '10.0.1.1', '10.0.1.2']
+
+class TestMultipleNetworks:
+    """Тесты сканирования нескольких сетей одним сканером"""
+    
+    def test_overlapping_networks_are_merged(self):
+        """Тест что пересекающиеся сети сканируются одним набором адресов"""
+        scanner = NetworkScanner(network=['10.0.0.0/30', '10.0.0.2-10.0.0.5', '10.0.0.1'])
+        assert scanner.network == '10.0.0.0/30,10.0.0.2-10.0.0.5,10.0.0.1'
+        assert list(scanner.get_hosts()) == [f'10.0.0.{last}' for last in range(1, 6)]
+    
+    def test_save_results_deduplicates(self, tmp_path, monkeypatch):
+        """Тест что отчет содержит каждый сервис (ip, port) один раз"""
+        import json
+        monkeypatch.chdir(tmp_path)
+        result = {'ip': '10.0.0.1', 'port': 80, 'url': 'http://10.0.0.1:80', 'status_code': 200,
+                  'title': 'Router', 'server': 'httpd', 'is_router': True}
+        scanner = NetworkScanner(network=['10.0.0.0/24', '10.0.1.0/24'])
+        scanner.results = [result, dict(result), {**result, 'port': 8080}]
+        with patch('builtins.print'):
+            scanner.save_results('merged')
+        
+        report = json.loads((tmp_path / 'results' / 'merged.json').read_text(encoding='utf-8'))
+        assert report['network'] == '10.0.0.0/24,10.0.1.0/24'
+        assert report['total_found'] == 2
+        assert [r['port'] for r in report['results']] == [80, 8080]
+
+class TestBoundedSubmission:
+    """Тесты ограниченной постановки задач в пул"""
+    
+    def test_iter_scan_pulls_targets_lazily(self):
+        """Тест что адреса берутся из набора по мере завершения, а не все сразу"""
+        scanner = NetworkScanner(network='10.0.0.0/20', threads=4)
+        pulled = 0
+        outstanding = []
+        
+        class CountingTargets:
+            def __len__(self):
+                return 4094
+            
+            def __iter__(self):
+                nonlocal pulled
+                for ip in TargetSet('10.0.0.0/20'):
+                    pulled += 1
+                    yield ip
+        
+        scanned = []
+        
+        def scan_ip(ip):
+            outstanding.append(pulled - len(scanned))
+            scanned.append(ip)
+            return []
+        
+        with patch.object(scanner, 'get_hosts', return_value=CountingTargets()), \
+             patch.object(scanner, 'scan_ip', side_effect=scan_ip), \
+             patch('builtins.print'):
+            assert list(scanner.iter_scan()) == []
+        
+        assert len(scanned) == 4094
+        # В очереди пула не больше threads * SUBMIT_AHEAD адресов
+        assert max(outstanding) <= 4 * 4
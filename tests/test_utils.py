@@ -0,0 +1,49 @@
+"""
+Тесты общих функций подключения
+"""
+
+import errno
+import gc
+import warnings
+
+from src.network_scanner.utils import connect_many
+
+class TestConnectMany:
+    """Тесты неблокирующих подключений к портам хоста"""
+    
+    def test_observes_ports(self, local_http_server, closed_port):
+        """Тест что connect_many сообщает исход и RTT каждого порта"""
+        host, port = local_http_server
+        seen = {}
+        list(connect_many(host, [port, closed_port], 1, observe=lambda p, e, rtt: seen.update({p: (e, rtt)})))
+        assert seen[port][0] == 0
+        assert seen[closed_port][0] == errno.ECONNREFUSED
+        assert all(rtt is not None and rtt < 1 for _, rtt in seen.values())
+    
+    def test_closes_unclaimed_sockets(self, local_http_server):
+        """Тест что при остановке перебора отданные в очередь соединения закрываются"""
+        host, port = local_http_server
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            probes = connect_many(host, [port, port, port], 1, keep_open=True)
+            _, error, sock = next(probes)
+            sock.close()
+            probes.close()
+            del probes
+            gc.collect()
+        assert error == 0
+        assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    
+    def test_max_parallel(self, local_http_server, closed_port):
+        """Тест что при max_parallel=1 следующее подключение ждет ответа на предыдущее"""
+        host, port = local_http_server
+        answered = []
+        answered_before_open = []
+        results = list(connect_many(
+            host, [port, closed_port, port], 1,
+            observe=lambda p, error, rtt: answered.append(p),
+            gate=lambda: answered_before_open.append(len(answered)),
+            max_parallel=1,
+        ))
+        assert answered_before_open == [0, 1, 2]
+        assert sorted(p for p, error, _ in results if error == 0) == [port, port]